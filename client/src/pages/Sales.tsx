@@ -68,7 +68,8 @@ const Sales = () => {
   const { data: medicines } = useQuery({
     queryKey: ["medicines-for-sale"],
     queryFn: async () => {
-      const data = await api.get<any>("/api/medicines/");
+      // Only the columns the sale form needs (skips description etc.)
+      const data = await api.get<any>("/api/medicines/?fields=id,name,unit_price");
       return Array.isArray(data) ? data : data?.results ?? data?.data ?? [];
     },
     staleTime: 5 * 60 * 1000, // 5 minutes - medicines don't change often
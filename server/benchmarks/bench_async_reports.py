@@ -0,0 +1,176 @@
+"""
+Compare the report and stock summary endpoints served by sync gunicorn
+workers (WSGI, queries in order) with uvicorn workers (ASGI, the async
+variants that run each endpoint's queries concurrently) under the same load.
+
+Seed a database first (``manage.py seed_benchmark_data --password <pw>``),
+then let the benchmark start both servers on it, one after the other, with
+the same number of workers and the single-flight cache disabled:
+
+    DB_ENGINE=sqlite SQLITE_PATH=/tmp/bench.sqlite3 \\
+        python -m benchmarks.bench_async_reports --password <pw> --workers 2 --users 8
+
+Or point it at servers you started yourself:
+
+    python -m benchmarks.bench_async_reports --password <pw> \\
+        --sync-url http://127.0.0.1:8000 --async-url http://127.0.0.1:8001
+
+Every endpoint is driven by ``--users`` closed-loop clients for
+``--duration`` seconds; latency percentiles and throughput are reported per
+endpoint and mode, plus the change from sync to async.
+
+ASGI mode stays experimental until this shows a gain against PostgreSQL.
+On SQLite the queries share the worker's core, so running them concurrently
+overlaps no waiting, and the async mode measured slower there.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+from benchmarks.common import SERVER_DIR, report
+from benchmarks.loadtest import Stats, aiohttp
+
+ENDPOINTS = [
+    ('reports.summary', '/api/reports/summary/'),
+    ('reports.sales_trends', '/api/reports/sales-trends/?days=365'),
+    ('reports.stock_analysis', '/api/reports/stock-analysis/'),
+    ('reports.inventory_turnover', '/api/reports/inventory-turnover/'),
+    ('stock.summary', '/api/stock/summary/'),
+]
+
+MODES = {
+    'sync': ('pharma_backend.wsgi:application', 'sync', '0'),
+    'async': ('pharma_backend.asgi:application', 'uvicorn_worker.UvicornWorker', '1'),
+}
+
+
+def start_server(mode, port, args):
+    app, worker_class, async_views = MODES[mode]
+    env = dict(os.environ, SINGLE_FLIGHT_ENABLED='0', ASYNC_VIEWS=async_views,
+               QUERY_POOL_SIZE=str(args.pool_size), DJANGO_DEBUG='0')
+    # -c /dev/null: gunicorn.conf.py is the production configuration
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.devnull, app, '-k', worker_class,
+         '-w', str(args.workers), '-b', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        cwd=SERVER_DIR, env=env,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'{mode} server exited with {process.returncode}')
+        try:
+            urllib.request.urlopen(f'{base_url}/livez', timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f'{mode} server did not start')
+
+
+async def drive(base_url, args):
+    stats = {}
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=args.users)) as session:
+        credentials = {'username': args.username, 'password': args.password}
+        async with session.post(f'{base_url}/api/auth/login/', json=credentials) as response:
+            if response.status != 200:
+                raise SystemExit(f'Login failed: {response.status} {(await response.text())[:200]}')
+            headers = {'Authorization': f"Bearer {(await response.json())['access']}"}
+
+        for name, path in ENDPOINTS:
+            for _ in range(args.warmup):
+                async with session.get(base_url + path, headers=headers) as response:
+                    await response.read()
+
+            stats[name] = endpoint_stats = Stats()
+            deadline = time.perf_counter() + args.duration
+
+            async def client():
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        async with session.get(base_url + path, headers=headers) as response:
+                            await response.read()
+                            outcome = response.status
+                    except asyncio.TimeoutError:
+                        outcome = 'timeout'
+                    except aiohttp.ClientError as exc:
+                        outcome = type(exc).__name__
+                    endpoint_stats.record(name, time.perf_counter() - started, outcome)
+
+            await asyncio.gather(*(client() for _ in range(args.users)))
+            endpoint_stats.finished = time.perf_counter()
+    return {name: s.summary()[1][name] for name, s in stats.items()}
+
+
+def run_mode(mode, args):
+    url = getattr(args, f'{mode}_url')
+    process = None
+    if url is None:
+        process, url = start_server(mode, args.port + (mode == 'async'), args)
+    try:
+        return asyncio.run(drive(url.rstrip('/'), args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--username', default='bench_admin')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--sync-url', help='Running WSGI server to use instead of starting one')
+    parser.add_argument('--async-url', help='Running ASGI server to use instead of starting one')
+    parser.add_argument('--workers', type=int, default=2, help='Workers for each started server (default: 2)')
+    parser.add_argument('--pool-size', type=int, default=4, help='QUERY_POOL_SIZE of the started servers')
+    parser.add_argument('--port', type=int, default=8790, help='Started servers use this port and the next')
+    parser.add_argument('--users', type=int, default=8, help='Concurrent clients per endpoint')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per endpoint and mode')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    if aiohttp is None:
+        raise SystemExit('aiohttp is required: pip install aiohttp')
+
+    results = {mode: run_mode(mode, args) for mode in MODES}
+
+    comparison = {}
+    for name, _ in ENDPOINTS:
+        before, after = results['sync'][name], results['async'][name]
+        row = {}
+        for key in ('p50_ms', 'p95_ms', 'rps'):
+            row[f'sync_{key}'], row[f'async_{key}'] = before[key], after[key]
+            if before[key]:
+                row[f"change_{key.replace('_ms', '')}"] = f'{(after[key] - before[key]) / before[key] * 100:+.0f}%'
+        row['errors'] = f"{before['error_rate']}/{after['error_rate']}"
+        comparison[name] = row
+    report(f'sync vs async, {args.users} clients for {args.duration:g}s per endpoint', comparison)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created': datetime.now(timezone.utc).isoformat(),
+                    'users': args.users,
+                    'duration_s': args.duration,
+                    'workers': args.workers,
+                    'pool_size': args.pool_size,
+                },
+                'results': results,
+                'comparison': comparison,
+            }, f, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Time every read endpoint in-process and/or over HTTP and write JSON results
+that can be compared between commits.
+
+In-process, against a throw-away test database seeded by ``core.datagen``:
+
+    DB_ENGINE=sqlite python -m benchmarks.bench_endpoints --sales 100000 --output before.json
+
+Over HTTP, against a running server seeded with
+``manage.py seed_benchmark_data --password <pw>``:
+
+    python -m benchmarks.bench_endpoints --client http --base-url http://127.0.0.1:8000 \\
+        --username bench_admin --password <pw> --output after.json
+
+Compare two result files:
+
+    python -m benchmarks.bench_endpoints --compare before.json after.json
+
+Both clients log in through ``/api/auth/login/`` and send the JWT, so
+authentication cost is part of every measurement. In-process runs disable
+the single-flight report cache unless ``--cache`` is given; HTTP runs measure
+whatever the server is configured with.
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import SERVER_DIR, percentile, report, setup_django, test_database
+
+BENCH_PASSWORD = 'Bench-Endpoints-Pass-1'
+
+# (name, path); {medicine}, {stock}, {sale} and {supplier} become real ids
+ENDPOINTS = [
+    ('auth.me', '/api/auth/me/'),
+    ('medicines.list', '/api/medicines/'),
+    ('medicines.list.fields', '/api/medicines/?fields=id,name,unit_price'),
+    ('medicines.search', '/api/medicines/?search=Amox'),
+    ('medicines.detail', '/api/medicines/{medicine}/'),
+    ('stock.list', '/api/stock/'),
+    ('stock.list.expand', '/api/stock/?expand=medicine'),
+    ('stock.detail', '/api/stock/{stock}/'),
+    ('stock.low_stock_alerts', '/api/stock/low_stock_alerts/'),
+    ('stock.expiring_soon', '/api/stock/expiring_soon/'),
+    ('stock.expired', '/api/stock/expired/'),
+    ('stock.summary', '/api/stock/summary/'),
+    ('sales.list', '/api/sales/'),
+    ('sales.list.recent', '/api/sales/?ordering=-sale_date'),
+    ('sales.detail', '/api/sales/{sale}/'),
+    ('suppliers.list', '/api/suppliers/'),
+    ('suppliers.detail', '/api/suppliers/{supplier}/'),
+    ('reports.summary', '/api/reports/summary/'),
+    ('reports.sales_trends', '/api/reports/sales-trends/?days=365'),
+    ('reports.stock_analysis', '/api/reports/stock-analysis/'),
+    ('reports.inventory_turnover', '/api/reports/inventory-turnover/'),
+]
+
+_QUERY_COUNT = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+class InProcessClient:
+    """Full middleware stack through Django's test client, no sockets"""
+
+    def __init__(self, username, password):
+        from django.test import Client
+        self.client = Client()
+        response = self.client.post(
+            '/api/auth/login/', {'username': username, 'password': password}, content_type='application/json',
+        )
+        if response.status_code != 200:
+            raise SystemExit(f'Login failed: {response.status_code} {response.content[:200]!r}')
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+
+    def get(self, path):
+        response = self.client.get(path, **self.headers)
+        return response.status_code, response.content, response.headers.get('Server-Timing', '')
+
+
+class HTTPClient:
+    def __init__(self, base_url, username, password):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        response = self.session.post(f'{self.base_url}/api/auth/login/', json={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise SystemExit(f'Login failed: {response.status_code} {response.text[:200]}')
+        self.session.headers['Authorization'] = f"Bearer {response.json()['access']}"
+
+    def get(self, path):
+        response = self.session.get(f'{self.base_url}{path}')
+        return response.status_code, response.content, response.headers.get('Server-Timing', '')
+
+
+def first_ids(client):
+    """One existing id per resource, looked up through the API itself"""
+    ids = {}
+    for key, path in [('medicine', '/api/medicines/'), ('stock', '/api/stock/'),
+                      ('sale', '/api/sales/'), ('supplier', '/api/suppliers/')]:
+        status, body, _ = client.get(f'{path}?fields=id')
+        results = json.loads(body).get('results') if status == 200 else None
+        ids[key] = results[0]['id'] if results else 0
+    return ids
+
+
+def run(client, repeat, warmup):
+    ids = first_ids(client)
+    results = {}
+    for name, template in ENDPOINTS:
+        path = template.format(**ids)
+        for _ in range(warmup):
+            client.get(path)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            status, body, server_timing = client.get(path)
+            samples.append((time.perf_counter() - start) * 1000)
+        match = _QUERY_COUNT.search(server_timing)
+        results[name] = {
+            'path': path,
+            'status': status,
+            'bytes': len(body),
+            'queries': int(match.group(1)) if match else None,
+            'min_ms': round(min(samples), 3),
+            'median_ms': round(statistics.median(samples), 3),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'max_ms': round(max(samples), 3),
+        }
+    return results
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=SERVER_DIR).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{revision}-dirty' if dirty else revision
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    rows = {}
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old is None:
+            continue
+        change = (new['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+        rows[name] = {
+            'before_ms': old['median_ms'],
+            'after_ms': new['median_ms'],
+            'change': f'{change:+.1f}%',
+            'queries': f"{old['queries']}->{new['queries']}",
+        }
+    report(f"{before['meta'].get('revision')} -> {after['meta'].get('revision')} (median)", rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--client', choices=['inprocess', 'http', 'both'], default='inprocess')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', default='bench_admin', help='HTTP only; in-process creates its own user')
+    parser.add_argument('--password', help='HTTP only')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--medicines', type=int, default=500, help='In-process dataset size')
+    parser.add_argument('--batches-per-medicine', type=int, default=4)
+    parser.add_argument('--suppliers', type=int, default=50)
+    parser.add_argument('--sales', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache', action='store_true', help='Keep the single-flight cache on in-process')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    setup_django()
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    output = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+        },
+        'results': {},
+    }
+
+    if args.client in ('inprocess', 'both'):
+        from core import datagen
+        from core.models import User
+
+        settings.SINGLE_FLIGHT_ENABLED = args.cache
+        with test_database():
+            dataset = datagen.generate(
+                medicines=args.medicines, batches_per_medicine=args.batches_per_medicine,
+                suppliers=args.suppliers, sales=args.sales, seed=args.seed,
+            )
+            User.objects.create_user('bench', password=BENCH_PASSWORD, role=User.Role.ADMIN, is_staff=True)
+            results = run(InProcessClient('bench', BENCH_PASSWORD), args.repeat, args.warmup)
+            output['meta'].update(dataset=dataset, database=connection.vendor, single_flight=args.cache)
+        output['results'].update({f'inprocess:{name}': stats for name, stats in results.items()})
+        report('In-process', {name: {k: v for k, v in s.items() if k != 'path'} for name, s in results.items()})
+
+    if args.client in ('http', 'both'):
+        if not args.password:
+            parser.error('--password is required for HTTP runs')
+        results = run(HTTPClient(args.base_url, args.username, args.password), args.repeat, args.warmup)
+        output['meta']['base_url'] = args.base_url
+        output['results'].update({f'http:{name}': stats for name, stats in results.items()})
+        report(f'HTTP {args.base_url}', {name: {k: v for k, v in s.items() if k != 'path'} for name, s in results.items()})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
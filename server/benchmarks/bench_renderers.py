@@ -0,0 +1,73 @@
+"""
+Compare DRF's JSONRenderer with core.renderers.FastJSONRenderer.
+
+Payloads are the full stock and sales listings plus the report endpoints,
+captured once as ``Response.data`` and then rendered repeatedly.
+
+    DB_ENGINE=sqlite python -m benchmarks.bench_renderers [--rows 20000]
+"""
+import argparse
+
+from benchmarks.common import measure, measure_allocations, report, seed_minimal, setup_django, test_database
+
+
+def collect_payloads():
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from core.models import User
+    from reports import views as report_views
+    from sales.models import Sale
+    from sales.serializers import SaleValuesSerializer
+    from stock.models import Stock
+    from stock.serializers import StockValuesSerializer
+
+    user = User.objects.create_user('bench', password='bench', role=User.Role.ADMIN)
+    factory = APIRequestFactory()
+
+    def view_data(view, path, **params):
+        request = factory.get(path, params)
+        force_authenticate(request, user=user)
+        return view(request).data
+
+    stock, sales = StockValuesSerializer(), SaleValuesSerializer()
+    return {
+        '/api/stock/': stock.to_representation(stock.rows(Stock.objects.order_by('id'))),
+        '/api/sales/': sales.to_representation(sales.rows(Sale.objects.order_by('id'))),
+        '/api/reports/summary/': view_data(report_views.summary, '/api/reports/summary/'),
+        '/api/reports/sales-trends/': view_data(report_views.sales_trends, '/api/reports/sales-trends/', days=365),
+        '/api/reports/stock-analysis/': view_data(report_views.stock_analysis, '/api/reports/stock-analysis/'),
+        '/api/reports/inventory-turnover/': view_data(report_views.inventory_turnover, '/api/reports/inventory-turnover/'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000, help='Sales rows (stock is rows // 5)')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import FastJSONRenderer, orjson
+
+    if orjson is None:
+        print('orjson is not installed; FastJSONRenderer falls back to the stdlib encoder')
+
+    with test_database():
+        seed_minimal(medicines=max(args.rows // 25, 1), batches_per_medicine=5, sales=args.rows)
+        payloads = collect_payloads()
+
+    renderers = {'JSONRenderer': JSONRenderer(), 'FastJSONRenderer': FastJSONRenderer()}
+    for path, data in payloads.items():
+        outputs = {name: r.render(data, 'application/json') for name, r in renderers.items()}
+        if len(set(outputs.values())) != 1:
+            raise SystemExit(f'{path}: renderers produced different output')
+        results = {}
+        for name, renderer in renderers.items():
+            def render():
+                renderer.render(data, 'application/json')
+            results[name] = {**measure(render, args.repeat), **measure_allocations(render)}
+        report(f'{path} ({len(outputs["JSONRenderer"]) // 1024} KiB)', results)
+
+
+if __name__ == '__main__':
+    main()
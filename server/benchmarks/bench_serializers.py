@@ -0,0 +1,49 @@
+"""
+Compare ModelSerializer and ValuesSerializer list paths for stock and sales.
+
+    DB_ENGINE=sqlite python -m benchmarks.bench_serializers [--rows 5000]
+"""
+import argparse
+import json
+
+from benchmarks.common import measure, report, seed_minimal, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000, help='Sales rows to serialize (stock is rows // 5)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from sales.models import Sale
+    from sales.serializers import SaleSerializer, SaleValuesSerializer
+    from stock.models import Stock
+    from stock.serializers import StockSerializer, StockValuesSerializer
+
+    with test_database():
+        seed_minimal(medicines=max(args.rows // 25, 1), batches_per_medicine=5, sales=args.rows)
+        cases = {
+            'stock': (Stock.objects.select_related('medicine').order_by('id'), StockSerializer, StockValuesSerializer),
+            'sales': (Sale.objects.select_related('medicine', 'stock').order_by('id'), SaleSerializer, SaleValuesSerializer),
+        }
+        renderer = JSONRenderer()
+        for name, (queryset, model_serializer, values_serializer) in cases.items():
+            def model_path():
+                return renderer.render(model_serializer(queryset.all(), many=True).data)
+
+            def values_path():
+                serializer = values_serializer()
+                return renderer.render(serializer.to_representation(serializer.rows(queryset.all())))
+
+            if json.loads(model_path()) != json.loads(values_path()):
+                raise SystemExit(f'{name}: values path output differs from ModelSerializer output')
+            report(f'{name} ({queryset.count()} rows)', {
+                'ModelSerializer': measure(model_path, args.repeat),
+                'ValuesSerializer': measure(values_path, args.repeat),
+            })
+
+
+if __name__ == '__main__':
+    main()
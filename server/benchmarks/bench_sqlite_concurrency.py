@@ -0,0 +1,167 @@
+"""
+Concurrent tills and dashboards on SQLite: the stock profile (rollback
+journal, deferred transactions) against the tuned one (``SQLITE_TUNED``:
+WAL, busy_timeout, BEGIN IMMEDIATE for sales).
+
+Each profile gets a fresh copy of a seeded database. Worker processes, like
+gunicorn's, then call the API views in-process (no HTTP or login cost, so
+their transactions overlap as much as possible): ``--tills`` post sales in
+a loop, ``--readers`` fetch the dashboard reports.
+
+    DB_ENGINE=sqlite SQLITE_PATH=/tmp/bench.sqlite3 \\
+        python -m benchmarks.bench_sqlite_concurrency --tills 4 --readers 2 --duration 15
+
+Reported per profile and operation: throughput, latency percentiles and the
+requests that failed with "database is locked" or another error.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from benchmarks.common import SERVER_DIR, percentile, report, setup_django
+
+PROFILES = {
+    'stock': {'SQLITE_TUNED': '0'},
+    'tuned': {'SQLITE_TUNED': '1'},
+}
+REPORTS = ['/api/reports/summary/', '/api/reports/sales-trends/', '/api/stock/summary/']
+LOCKED = 'database is locked'
+
+
+def copy_database(source, directory, profile):
+    path = os.path.join(directory, f'{profile}.sqlite3')
+    shutil.copyfile(source, path)
+    conn = sqlite3.connect(path)
+    try:
+        # WAL is persistent: the stock profile must start from a rollback journal
+        conn.execute(f"PRAGMA journal_mode = {'WAL' if profile == 'tuned' else 'DELETE'}")
+    finally:
+        conn.close()
+    return path
+
+
+def worker(role, duration, seed):
+    """One worker process; prints its samples as JSON"""
+    setup_django()
+    import random
+    from datetime import date
+    from decimal import Decimal
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+
+    from stock.models import Stock
+
+    client = APIClient(SERVER_NAME='localhost')
+    client.force_authenticate(get_user_model().objects.get(username='bench_admin'))
+    rng = random.Random(seed)
+    batches = list(
+        Stock.objects.filter(quantity__gte=50, expiry_date__gte=date.today())
+        .values_list('id', 'medicine_id', 'purchase_price')[:200]
+    )
+
+    samples, outcomes = [], Counter()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'till':
+                stock_id, medicine_id, price = rng.choice(batches)
+                response = client.post('/api/sales/', {
+                    'medicine': medicine_id, 'stock': stock_id, 'quantity_sold': 1,
+                    'sale_price': str((price * Decimal('1.25')).quantize(Decimal('0.01'))),
+                }, format='json')
+            else:
+                response = client.get(rng.choice(REPORTS))
+            outcome = response.status_code
+        except Exception as exc:
+            outcome = 'locked' if LOCKED in str(exc) else type(exc).__name__
+        samples.append((time.perf_counter() - started) * 1000)
+        outcomes[outcome] += 1
+    print(json.dumps({'role': role, 'samples': samples, 'outcomes': outcomes}))
+
+
+def run_profile(profile, args, directory):
+    env = dict(os.environ, **PROFILES[profile], DB_ENGINE='sqlite', DJANGO_DEBUG='0', ALLOWED_HOSTS='*',
+               SQLITE_PATH=copy_database(args.database, directory, profile), SINGLE_FLIGHT_ENABLED='0')
+    roles = ['till'] * args.tills + ['reader'] * args.readers
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.bench_sqlite_concurrency', '--worker', role,
+             '--duration', str(args.duration), '--seed', str(seed)],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.PIPE,
+        )
+        for seed, role in enumerate(roles)
+    ]
+    merged = {}
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode:
+            raise SystemExit(f'{profile} worker exited with {process.returncode}')
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        samples, outcomes = merged.setdefault(result['role'], ([], Counter()))
+        samples += result['samples']
+        outcomes.update(result['outcomes'])
+
+    results = {}
+    for role, (samples, outcomes) in merged.items():
+        failed = sum(count for outcome, count in outcomes.items() if not outcome.isdigit() or int(outcome) >= 400)
+        results[role] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / args.duration, 1),
+            'p50_ms': round(percentile(samples, 0.50), 1),
+            'p95_ms': round(percentile(samples, 0.95), 1),
+            'p99_ms': round(percentile(samples, 0.99), 1),
+            'locked': outcomes.get('locked', 0),
+            'errors': failed - outcomes.get('locked', 0),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=os.environ.get('SQLITE_PATH'),
+                        help='Seeded SQLite database to copy (default: $SQLITE_PATH)')
+    parser.add_argument('--tills', type=int, default=4, help='Processes posting sales')
+    parser.add_argument('--readers', type=int, default=2, help='Processes fetching reports')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per profile')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--worker', choices=['till', 'reader'], help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.duration, args.seed)
+    if not args.database or not os.path.exists(args.database):
+        raise SystemExit('Pass --database or set SQLITE_PATH to a seeded SQLite database')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PROFILES:
+            results[profile] = run_profile(profile, args, directory)
+            report(f'{profile}: {args.tills} tills, {args.readers} readers for {args.duration:g}s', results[profile])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created': datetime.now(timezone.utc).isoformat(),
+                    'tills': args.tills,
+                    'readers': args.readers,
+                    'duration_s': args.duration,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Shared helpers for the standalone benchmark scripts.
+
+Every benchmark runs against a throw-away test database so it can be run on a
+developer machine without touching real data:
+
+    DB_ENGINE=sqlite python -m benchmarks.bench_serializers
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(SERVER_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVER_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pharma_backend.settings')
+    os.environ.setdefault('DJANGO_DEBUG', '0')
+    import django
+    django.setup()
+    # Benchmarks must not be skewed by DEBUG-level SQL logging.
+    import logging
+    logging.disable(logging.CRITICAL)
+
+
+@contextmanager
+def test_database():
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """Run ``func`` ``repeat`` times and return timing stats in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty sequence, ``fraction`` in [0, 1]"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure_allocations(func):
+    """Peak memory (KiB) allocated by Python while running ``func`` once"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_kib': round(peak / 1024, 1)}
+
+
+def seed_minimal(medicines=200, batches_per_medicine=5, sales=5000, seed=42):
+    """Small deterministic dataset for micro-benchmarks (see core.datagen)"""
+    from core import datagen
+    return datagen.generate(
+        medicines=medicines, batches_per_medicine=batches_per_medicine,
+        suppliers=0, sales=sales, years=1, seed=seed,
+    )
+
+
+def report(title, results):
+    print(f'\n{title}')
+    width = max(len(name) for name in results)
+    for name, stats in results.items():
+        cells = '  '.join(f'{k}={v}' for k, v in stats.items())
+        print(f'  {name.ljust(width)}  {cells}')
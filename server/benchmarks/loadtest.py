@@ -0,0 +1,256 @@
+"""
+Closed-loop load generator modelling pharmacy traffic against a running server.
+
+Each virtual user logs in once, then repeatedly picks an action from a
+weighted mix and waits a think time between actions:
+
+    login      POST /api/auth/login/ (password hashing included)
+    sale       POST /api/sales/ on a sellable batch, like the POS screen
+    stock      a page of /api/stock/ plus one of the alert lists
+    dashboard  summary, sales-trends and stock-analysis fetched concurrently,
+               like the dashboard page polling
+
+Seed the server first (``manage.py seed_benchmark_data --password <pw>``),
+start it the way you want to measure it, then:
+
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --password <pw> \\
+        --users 50 --duration 60 --mix login=1,sale=5,stock=3,dashboard=1 \\
+        --label "gthread w=4 t=8 CONN_MAX_AGE=60" --output gthread.json
+
+Throughput, latency percentiles and error rates are reported per endpoint.
+Runs are reproducible for a given ``--seed`` apart from server timing.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from benchmarks.common import percentile, report
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+DEFAULT_MIX = 'login=1,sale=5,stock=3,dashboard=1'
+DASHBOARD = [
+    ('reports.summary', '/api/reports/summary/'),
+    ('reports.sales_trends', '/api/reports/sales-trends/'),
+    ('reports.stock_analysis', '/api/reports/stock-analysis/'),
+]
+STOCK_ALERTS = [
+    ('stock.low_stock_alerts', '/api/stock/low_stock_alerts/'),
+    ('stock.expiring_soon', '/api/stock/expiring_soon/'),
+]
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ('login', 'sale', 'stock', 'dashboard'):
+            raise argparse.ArgumentTypeError(f'Unknown action: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, name, elapsed, outcome):
+        """``outcome`` is the HTTP status or an error kind such as 'timeout'"""
+        self.latencies[name].append(elapsed * 1000)
+        self.statuses[name][outcome] += 1
+
+    def summary(self):
+        duration = (self.finished or time.perf_counter()) - self.started
+        results = {}
+        for name in sorted(self.latencies):
+            samples = self.latencies[name]
+            statuses = self.statuses[name]
+            errors = sum(count for outcome, count in statuses.items() if not isinstance(outcome, int) or outcome >= 400)
+            results[name] = {
+                'requests': len(samples),
+                'rps': round(len(samples) / duration, 2),
+                'error_rate': round(errors / len(samples), 4),
+                'p50_ms': round(percentile(samples, 0.50), 1),
+                'p90_ms': round(percentile(samples, 0.90), 1),
+                'p95_ms': round(percentile(samples, 0.95), 1),
+                'p99_ms': round(percentile(samples, 0.99), 1),
+                'max_ms': round(max(samples), 1),
+                'statuses': {str(k): v for k, v in statuses.items()},
+            }
+        total = sum(len(s) for s in self.latencies.values())
+        return {'duration_s': round(duration, 2), 'requests': total, 'rps': round(total / duration, 2)}, results
+
+
+class VirtualUser:
+    def __init__(self, session, args, stats, rng, batches):
+        self.session = session
+        self.base_url = args.base_url.rstrip('/')
+        self.credentials = {'username': args.username, 'password': args.password}
+        self.stats = stats
+        self.rng = rng
+        self.batches = batches
+        self.headers = {}
+
+    async def request(self, name, method, path, payload=None):
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, self.base_url + path, json=payload, headers=self.headers) as response:
+                body = await response.read()
+                outcome = response.status
+        except asyncio.TimeoutError:
+            body, outcome = None, 'timeout'
+        except aiohttp.ClientError as exc:
+            body, outcome = None, type(exc).__name__
+        self.stats.record(name, time.perf_counter() - started, outcome)
+        return outcome, body
+
+    async def login(self):
+        status, body = await self.request('auth.login', 'POST', '/api/auth/login/', self.credentials)
+        if status == 200:
+            self.headers = {'Authorization': f"Bearer {json.loads(body)['access']}"}
+        return status == 200
+
+    async def sale(self):
+        stock_id, medicine_id, price = self.rng.choice(self.batches)
+        await self.request('sales.create', 'POST', '/api/sales/', {
+            'medicine': medicine_id, 'stock': stock_id, 'quantity_sold': 1, 'sale_price': price,
+        })
+
+    async def stock(self):
+        await self.request('stock.list', 'GET', f'/api/stock/?page={self.rng.randint(1, 5)}')
+        name, path = self.rng.choice(STOCK_ALERTS)
+        await self.request(name, 'GET', path)
+
+    async def dashboard(self):
+        await asyncio.gather(*(self.request(name, 'GET', path) for name, path in DASHBOARD))
+
+    async def run(self, mix, deadline, think):
+        if not await self.login():
+            return
+        actions, weights = zip(*mix.items())
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(actions, weights)[0])()
+            if think:
+                await asyncio.sleep(self.rng.expovariate(1 / think))
+
+
+async def sellable_batches(session, base_url, credentials):
+    """Non-expired batches with stock left, as (stock, medicine, sale price)"""
+    async with session.post(f'{base_url}/api/auth/login/', json=credentials) as response:
+        if response.status != 200:
+            raise SystemExit(f'Login failed: {response.status} {(await response.text())[:200]}')
+        headers = {'Authorization': f"Bearer {(await response.json())['access']}"}
+    query = f'fields=id,medicine,purchase_price&quantity__gte=50&expiry_date__gte={date.today().isoformat()}'
+    batches = []
+    for page in range(1, 6):
+        async with session.get(f'{base_url}/api/stock/?{query}&page={page}', headers=headers) as response:
+            if response.status != 200:
+                break
+            data = await response.json()
+        batches += [
+            (row['id'], row['medicine'], str((Decimal(row['purchase_price']) * Decimal('1.25')).quantize(Decimal('0.01'))))
+            for row in data['results']
+        ]
+        if not data.get('next'):
+            break
+    if not batches:
+        raise SystemExit('No sellable stock found; seed the database with seed_benchmark_data first')
+    return batches
+
+
+async def progress(stats, deadline, interval):
+    last = 0
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(interval)
+        total = sum(len(s) for s in stats.latencies.values())
+        print(f'  {time.perf_counter() - stats.started:6.1f}s  {(total - last) / interval:8.1f} req/s')
+        last = total
+
+
+async def main_async(args):
+    base_url = args.base_url.rstrip('/')
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.users * len(DASHBOARD))
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        credentials = {'username': args.username, 'password': args.password}
+        batches = await sellable_batches(session, base_url, credentials)
+
+        stats = Stats()
+        rng = random.Random(args.seed)
+        deadline = time.perf_counter() + args.ramp_up + args.duration
+        users = [VirtualUser(session, args, stats, random.Random(rng.random()), batches) for _ in range(args.users)]
+
+        async def start(user, delay):
+            await asyncio.sleep(delay)
+            await user.run(args.mix, deadline, args.think_ms / 1000)
+
+        ticker = asyncio.create_task(progress(stats, deadline, args.progress)) if args.progress else None
+        await asyncio.gather(*(start(user, args.ramp_up * i / args.users) for i, user in enumerate(users)))
+        stats.finished = time.perf_counter()
+        if ticker:
+            ticker.cancel()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', default='bench_admin')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--think-ms', type=float, default=500, help='Mean pause between actions (0 = none)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'default: {DEFAULT_MIX}')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--progress', type=float, default=5, help='Seconds between progress lines (0 = off)')
+    parser.add_argument('--label', default='', help='Free text stored with the results, e.g. the server config')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    if aiohttp is None:
+        raise SystemExit('aiohttp is required: pip install aiohttp')
+
+    stats = asyncio.run(main_async(args))
+    totals, results = stats.summary()
+    report(
+        f"{args.label or args.base_url}: {totals['requests']} requests in {totals['duration_s']}s "
+        f"({totals['rps']} req/s, {args.users} users)",
+        {name: {k: v for k, v in r.items() if k != 'statuses'} for name, r in results.items()},
+    )
+
+    if args.output:
+        output = {
+            'meta': {
+                'label': args.label,
+                'base_url': args.base_url,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'users': args.users,
+                'duration': args.duration,
+                'ramp_up': args.ramp_up,
+                'think_ms': args.think_ms,
+                'mix': args.mix,
+                'seed': args.seed,
+            },
+            'totals': totals,
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
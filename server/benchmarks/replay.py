@@ -0,0 +1,238 @@
+"""
+Replay production traffic recorded in gunicorn access logs against a local
+instance and compare per-route latency with what was recorded.
+
+    python -m benchmarks.replay access.log.gz --base-url http://127.0.0.1:8000 \\
+        --password <pw> --speed 2 --output replay.json
+
+Requests are sent with the original spacing divided by ``--speed`` (``0``
+sends as fast as ``--max-inflight`` allows). Access logs carry neither
+bodies nor credentials, so:
+
+- every request uses a JWT obtained with ``--username``/``--password``;
+- ``POST /api/auth/login/`` performs a real login with those credentials;
+- ``POST /api/sales/`` creates a sale on a sellable local batch;
+- other writes are counted and skipped;
+- row ids in detail URLs are mapped onto ids that exist locally (the same
+  recorded id always maps to the same local id), unless ``--no-remap``.
+
+Recorded latency is gunicorn's ``%(D)s``; replayed latency is the server's
+``Server-Timing`` total when present, else the client-side time.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile, report
+from benchmarks.loadtest import aiohttp, sellable_batches
+from core.accesslog import AccessLogReader, route_template
+
+REMAPPED = re.compile(r'^/api/(medicines|stock|sales|suppliers)/(\d+)/')
+_TOTAL = re.compile(r'total;dur=([\d.]+)')
+
+
+class RouteStats:
+    def __init__(self):
+        self.recorded = []
+        self.server = []
+        self.client = []
+        self.statuses = Counter()
+
+    def summary(self):
+        row = {'requests': len(self.recorded)}
+        for name, samples in (('recorded', self.recorded), ('replay', self.server), ('client', self.client)):
+            if samples:
+                row[f'{name}_p50_ms'] = round(percentile(samples, 0.50), 1)
+                row[f'{name}_p95_ms'] = round(percentile(samples, 0.95), 1)
+        for q in ('p50', 'p95'):
+            before, after = row.get(f'recorded_{q}_ms'), row.get(f'replay_{q}_ms')
+            if before and after is not None:
+                row[f'change_{q}'] = f'{(after - before) / before * 100:+.0f}%'
+        errors = sum(count for status, count in self.statuses.items() if not isinstance(status, int) or status >= 400)
+        row['error_rate'] = round(errors / max(len(self.server), 1), 4)
+        row['statuses'] = {str(k): v for k, v in self.statuses.items()}
+        return row
+
+
+class Replayer:
+    def __init__(self, session, args):
+        self.session = session
+        self.base_url = args.base_url.rstrip('/')
+        self.credentials = {'username': args.username, 'password': args.password}
+        self.remap = not args.no_remap
+        self.routes = defaultdict(RouteStats)
+        self.skipped = Counter()
+        self.headers = {}
+        self.id_pools = {}
+        self.batches = []
+        self.max_lag = 0.0
+        self.rng = random.Random(args.seed)
+
+    async def login(self):
+        async with self.session.post(f'{self.base_url}/api/auth/login/', json=self.credentials) as response:
+            if response.status != 200:
+                raise SystemExit(f'Login failed: {response.status} {(await response.text())[:200]}')
+            self.headers = {'Authorization': f"Bearer {(await response.json())['access']}"}
+
+    async def prepare(self):
+        await self.login()
+        self.batches = await sellable_batches(self.session, self.base_url, self.credentials)
+        if self.remap:
+            for resource in ('medicines', 'stock', 'sales', 'suppliers'):
+                async with self.session.get(f'{self.base_url}/api/{resource}/?fields=id', headers=self.headers) as response:
+                    data = await response.json() if response.status == 200 else {}
+                self.id_pools[resource] = [row['id'] for row in data.get('results', [])]
+
+    def target(self, record):
+        target = record.target
+        match = REMAPPED.match(target) if self.remap else None
+        pool = match and self.id_pools.get(match[1])
+        if pool:
+            local_id = pool[int(match[2]) % len(pool)]
+            target = f'/api/{match[1]}/{local_id}/' + target[match.end():]
+        return target
+
+    def request_for(self, record):
+        """(method, target, json body) to send, or None to skip"""
+        if record.method in ('GET', 'HEAD', 'OPTIONS'):
+            return record.method, self.target(record), None
+        if record.method == 'POST' and record.path == '/api/auth/login/':
+            return 'POST', record.path, self.credentials
+        if record.method == 'POST' and record.path == '/api/sales/':
+            stock_id, medicine_id, price = self.rng.choice(self.batches)
+            return 'POST', record.path, {'medicine': medicine_id, 'stock': stock_id, 'quantity_sold': 1, 'sale_price': price}
+        return None
+
+    async def send(self, record, route, request):
+        method, target, body = request
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                async with self.session.request(method, self.base_url + target, json=body, headers=self.headers) as response:
+                    await response.read()
+                    outcome = response.status
+                    server_timing = response.headers.get('Server-Timing', '')
+            except asyncio.TimeoutError:
+                outcome, server_timing = 'timeout', ''
+            except aiohttp.ClientError as exc:
+                outcome, server_timing = type(exc).__name__, ''
+            elapsed = (time.perf_counter() - started) * 1000
+            if outcome == 401 and attempt == 0:
+                await self.login()  # the access token expired during a long replay
+                continue
+            break
+
+        stats = self.routes[route]
+        stats.recorded.append(record.duration * 1000)
+        stats.client.append(elapsed)
+        match = _TOTAL.search(server_timing)
+        stats.server.append(float(match[1]) if match else elapsed)
+        stats.statuses[outcome] += 1
+
+    async def replay(self, records, speed, max_inflight, prefix):
+        semaphore = asyncio.Semaphore(max_inflight)
+        tasks = set()
+        origin = wall_start = None
+
+        async def run(record, route, request):
+            try:
+                await self.send(record, route, request)
+            finally:
+                semaphore.release()
+
+        # %(t)s has one-second resolution: spread each second's requests evenly.
+        for timestamp, group in itertools.groupby(records, key=lambda r: r.timestamp):
+            group = [r for r in group if r.path.startswith(prefix)]
+            if origin is None:
+                origin, wall_start = timestamp, time.perf_counter()
+            for i, record in enumerate(group):
+                request = self.request_for(record)
+                if request is None:
+                    self.skipped[f'{record.method} {route_template(record.path)}'] += 1
+                    continue
+                if speed:
+                    due = ((timestamp - origin).total_seconds() + i / len(group)) / speed
+                    delay = due - (time.perf_counter() - wall_start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+                await semaphore.acquire()  # back-pressure: falling behind shows up as lag
+                route = f'{record.method} {route_template(record.path)}'
+                task = asyncio.create_task(run(record, route, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+async def main_async(args, records):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=args.max_inflight)) as session:
+        replayer = Replayer(session, args)
+        await replayer.prepare()
+        started = time.perf_counter()
+        await replayer.replay(records, args.speed, args.max_inflight, args.prefix)
+        return replayer, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='+', help='Access log files (.gz ok, - for stdin)')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--username', default='bench_admin')
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--speed', type=float, default=1.0, help='1 = recorded pace, 2 = twice as fast, 0 = flat out')
+    parser.add_argument('--max-inflight', type=int, default=100)
+    parser.add_argument('--limit', type=int, help='Replay at most this many log records')
+    parser.add_argument('--prefix', default='/api/', help='Only replay paths starting with this (default: /api/)')
+    parser.add_argument('--no-remap', action='store_true', help='Send recorded row ids unchanged')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42, help='Picks the batches synthetic sales use')
+    parser.add_argument('--output', help='Write the comparison as JSON to this file')
+    args = parser.parse_args()
+
+    if aiohttp is None:
+        raise SystemExit('aiohttp is required: pip install aiohttp')
+
+    reader = AccessLogReader(args.logs)
+    records = itertools.islice(reader, args.limit) if args.limit else iter(reader)
+    replayer, elapsed = asyncio.run(main_async(args, records))
+
+    results = {route: stats.summary() for route, stats in sorted(replayer.routes.items())}
+    replayed = sum(r['requests'] for r in results.values())
+    report(
+        f'Replayed {replayed} requests in {elapsed:.1f}s at speed {args.speed} '
+        f'(max lag {replayer.max_lag:.2f}s, {reader.skipped} unparsable lines, '
+        f'{sum(replayer.skipped.values())} writes skipped)',
+        {route: {k: v for k, v in row.items() if k != 'statuses'} for route, row in results.items()},
+    )
+
+    if args.output:
+        output = {
+            'meta': {
+                'logs': args.logs,
+                'base_url': args.base_url,
+                'created': datetime.now(timezone.utc).isoformat(),
+                'speed': args.speed,
+                'elapsed_s': round(elapsed, 2),
+                'max_lag_s': round(replayer.max_lag, 3),
+                'lines': reader.lines,
+                'unparsable': reader.skipped,
+                'skipped_writes': dict(replayer.skipped),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Parsing for the gunicorn access log format configured in ``gunicorn.conf.py``:
+
+    %(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s
+
+e.g.::
+
+    10.0.0.1 - - [19/Oct/2026:08:15:02 +0000] "GET /api/stock/?page=2 HTTP/1.1" 200 9090 "-" "Mozilla/5.0" 18234
+
+Lines may carry a platform prefix (timestamps added by the log collector);
+anything that does not parse is counted and skipped. Readers stream, so logs
+of any size can be processed with constant memory.
+"""
+import gzip
+import io
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import NamedTuple
+
+_LINE = re.compile(
+    r'(?P<host>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)(?: [^"]*)?" '
+    r'(?P<status>\d{3}) (?P<bytes>\d+|-) '
+    r'"(?:[^"\\]|\\.)*" "(?P<agent>(?:[^"\\]|\\.)*)" (?P<duration>\d+)\s*$'
+)
+_MONTHS = {m: i for i, m in enumerate(('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+# Path segments that identify a row rather than a route
+_ID_SEGMENT = re.compile(r'^(?:\d+|[0-9a-f]{8}-[0-9a-f-]{27}|[0-9a-f]{24,}|\d{8}T\d+-[0-9a-f]{8})$', re.I)
+
+
+class AccessRecord(NamedTuple):
+    timestamp: datetime
+    method: str
+    path: str
+    query: str
+    status: int
+    bytes: int
+    duration: float  # seconds, from %(D)s
+    user_agent: str
+
+    @property
+    def target(self):
+        return f'{self.path}?{self.query}' if self.query else self.path
+
+
+@lru_cache(maxsize=4096)
+def _parse_time(value):
+    # '19/Oct/2026:08:15:02 +0000'; strptime is slow and the value repeats
+    # for every request in the same second.
+    return datetime(
+        int(value[7:11]), _MONTHS[value[3:6]], int(value[0:2]),
+        int(value[12:14]), int(value[15:17]), int(value[18:20]),
+        tzinfo=datetime.strptime(value[21:], '%z').tzinfo,
+    )
+
+
+def parse_line(line):
+    """``AccessRecord`` for one log line, or None if it is not an access line"""
+    match = _LINE.search(line)
+    if match is None:
+        return None
+    try:
+        timestamp = _parse_time(match['time'])
+    except (KeyError, ValueError):
+        return None
+    path, _, query = match['target'].partition('?')
+    size = match['bytes']
+    return AccessRecord(
+        timestamp=timestamp,
+        method=match['method'],
+        path=path,
+        query=query,
+        status=int(match['status']),
+        bytes=0 if size == '-' else int(size),
+        duration=int(match['duration']) / 1_000_000,
+        user_agent=match['agent'],
+    )
+
+
+def open_log(path):
+    """Text stream for a log file; ``-`` is stdin and ``.gz`` is decompressed"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+class AccessLogReader:
+    """Iterate over the records of several log files; ``skipped`` counts
+    lines that were not access log lines"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.lines = 0
+        self.skipped = 0
+
+    def __iter__(self):
+        for path in self.paths:
+            with open_log(path) as stream:
+                for line in stream:
+                    self.lines += 1
+                    record = parse_line(line)
+                    if record is None:
+                        self.skipped += 1
+                        continue
+                    yield record
+
+
+def route_template(path):
+    """``/api/stock/123/`` -> ``/api/stock/{id}/``"""
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+@lru_cache(maxsize=1024)
+def _resolves(path):
+    from django.urls import Resolver404, resolve
+    try:
+        resolve(path)
+    except Resolver404:
+        return False
+    return True
+
+
+class RouteNormalizer:
+    """
+    Map request paths to a bounded set of route templates.
+
+    With ``resolve=True`` (needs Django set up) paths that match no URL
+    pattern, such as scanners probing for ``/wp-login.php``, collapse into
+    ``<unmatched>`` so they cannot grow the number of routes without bound.
+    """
+
+    UNMATCHED = '<unmatched>'
+
+    def __init__(self, resolve=False):
+        self.resolve = resolve
+        self.valid = set()  # bounded by the URLconf
+
+    def __call__(self, path):
+        template = route_template(path)
+        if not self.resolve or template in self.valid:
+            return template
+        if _resolves(path):
+            self.valid.add(template)
+            return template
+        return self.UNMATCHED
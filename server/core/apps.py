@@ -5,5 +5,11 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .databases import apply_statement_timeout
+        connection_created.connect(apply_statement_timeout)
+
 
 
@@ -0,0 +1,83 @@
+"""
+DRF-compatible wrapper for async function views.
+
+DRF views are synchronous, so under ASGI an ``@api_view`` runs in a worker
+thread however it is written. ``async_api_view`` gives a coroutine view the
+parts of the DRF stack the read-only report endpoints rely on: the
+``REST_FRAMEWORK`` authentication and permission classes, DRF's exception
+handler for error bodies, and ``FastJSONRenderer``, so a response is
+byte-for-byte what the ``@api_view`` version of the same view returns.
+
+The view receives a DRF ``Request`` (``query_params``, authenticated
+``user``) and returns plain data.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .renderers import FastJSONRenderer
+
+_renderer = FastJSONRenderer()
+
+
+def _authorize(request, permission_classes):
+    # Same order and outcomes as APIView.initial()
+    request.user
+    for permission_class in permission_classes:
+        permission = permission_class()
+        if not permission.has_permission(request, None):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+def _render(data, status=200, headers=None):
+    response = HttpResponse(_renderer.render(data), status=status, content_type=_renderer.media_type)
+    for name, value in (headers or {}).items():
+        response[name] = value
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def _handle_exception(exc, request):
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        authenticators = request.authenticators
+        header = authenticators[0].authenticate_header(request) if authenticators else None
+        if header:
+            exc.auth_header = header
+        else:
+            exc.status_code = 403
+    response = api_settings.EXCEPTION_HANDLER(exc, {'request': request})
+    if response is None:
+        raise exc
+    headers = {name: value for name, value in response.items() if name.lower() != 'content-type'}
+    return _render(response.data, response.status_code, headers)
+
+
+def async_api_view(methods=('GET',), permission_classes=None):
+    """Decorate ``async def view(request, ...)`` returning response data"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            drf_request = Request(
+                request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                # Authentication may hit the database (JWT user lookup).
+                await sync_to_async(_authorize)(
+                    drf_request, permission_classes or api_settings.DEFAULT_PERMISSION_CLASSES,
+                )
+                return _render(await view(drf_request, *args, **kwargs))
+            except exceptions.APIException as exc:
+                return _handle_exception(exc, drf_request)
+
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
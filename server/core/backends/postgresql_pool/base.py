@@ -0,0 +1,96 @@
+"""
+PostgreSQL backend that checks connections out of a per-process pool
+(core/dbpool.py) and returns them when Django closes the connection.
+
+Configured with ``OPTIONS['pool']`` (``min_size``, ``max_size``, ``timeout``,
+``check_after``, ``max_idle``, ``max_lifetime``); see ``DB_POOL`` in
+settings. Use it with ``CONN_MAX_AGE = 0`` so every request hands its
+connection back.
+
+The alias's statement timeout (``DATABASE_STATEMENT_TIMEOUTS``) is sent as a
+startup parameter, so it is set once per physical connection rather than
+with a ``SET`` on every checkout.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.databases import statement_timeout
+from core.dbpool import ConnectionPool, PoolTimeout
+
+# Transaction status shared by psycopg2 and psycopg 3
+STATUS_IDLE = 0
+STATUS_UNKNOWN = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _check(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def _reset(connection):
+    """Roll back what the last user left open; False if unusable"""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == STATUS_UNKNOWN:
+        return False
+    if status != STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+def get_pool(alias, options):
+    pool = _pools.get(alias)
+    if pool is None or pool.pid != os.getpid():
+        with _pools_lock:
+            pool = _pools.get(alias)
+            # A forked worker starts its own pool; the parent's connections
+            # are left alone rather than closed under the parent.
+            if pool is None or pool.pid != os.getpid():
+                pool = _pools[alias] = ConnectionPool(alias, _check, _reset, **options)
+    return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Read by core.databases.apply_statement_timeout
+    statement_timeout_on_connect = True
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict['OPTIONS'].get('pool', {}))
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        timeout = statement_timeout(self.alias)
+        if timeout:
+            params['options'] = f"{params.get('options', '')} -c statement_timeout={timeout}".strip()
+        return params
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+        # Set by the parent class when it opens a connection, so also on reuse
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def fill_pool(self):
+        """Open the pool's ``min_size`` connections ahead of the first request"""
+        self.pool.fill(lambda: super(DatabaseWrapper, self).get_new_connection(self.get_connection_params()))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Closed inside atomic(): Django keeps the object until the
+                # block exits, so it must not be lent to another thread.
+                self.pool.putconn(self.connection, discard=self.in_atomic_block)
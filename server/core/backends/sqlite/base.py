@@ -0,0 +1,39 @@
+"""
+SQLite backend for single-store deployments with several tills.
+
+``OPTIONS['pragmas']`` are applied to every new connection (WAL journaling,
+``busy_timeout``, ``synchronous=NORMAL``, mmap and page cache sizes; see
+``SQLITE_TUNED`` in settings). With WAL, report reads no longer block the
+tills' writes, and a writer waits up to ``busy_timeout`` for the lock
+instead of failing at once.
+
+That wait does not help a transaction that read before it writes: SQLite
+cannot upgrade its deferred read lock while another connection writes, and
+raises "database is locked" right away. Transactions opened by
+``core.databases.write_transaction`` therefore start with ``BEGIN
+IMMEDIATE``, which takes the write lock up front and queues on
+``busy_timeout``.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Set by write_transaction(), consumed by the next BEGIN
+        self.begin_immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode, self.begin_immediate = ('IMMEDIATE' if self.begin_immediate else ''), False
+        self.cursor().execute(f'BEGIN {mode}'.strip())
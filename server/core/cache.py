@@ -0,0 +1,176 @@
+"""
+Single-flight caching with stale-while-revalidate for expensive aggregates.
+
+Only one worker recomputes a given key at a time (guarded by a cache-based
+lock); everyone else either receives the previous value or waits briefly for
+the first computation to land. A computation that outlives ``lock_timeout``
+loses the lock to the next caller, so the lock holds a per-holder token and
+is only released by the holder that set it.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .metrics import observe_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'fresh': 60,          # seconds a value is served without revalidation
+    'stale': 300,         # extra seconds a value may be served while refreshing
+    'lock_timeout': 30,   # upper bound on a single computation
+    'wait': 2.0,          # how long a cold-cache caller waits for the lock holder
+}
+
+
+def get_policy(name):
+    """Return the freshness budget for ``name`` merged over the defaults"""
+    policy = dict(DEFAULT_POLICY)
+    policy.update(getattr(settings, 'SINGLE_FLIGHT_POLICIES', {}).get(name, {}))
+    return policy
+
+
+def _acquire(lock_key, policy):
+    """The lock's token, or None if another caller holds it"""
+    token = uuid.uuid4().hex
+    return token if cache.add(lock_key, token, policy['lock_timeout']) else None
+
+
+def _release(lock_key, token):
+    # Not atomic, but the lock can only change hands here if it expires
+    # between these two calls.
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _store(key, lock, compute, policy):
+    try:
+        value = compute()
+        cache.set(key, {'value': value, 'computed_at': time.time()}, policy['fresh'] + policy['stale'])
+        return value
+    finally:
+        _release(*lock)
+
+
+def _refresh_in_background(key, lock, compute, policy):
+    def run():
+        try:
+            _store(key, lock, compute, policy)
+        except Exception:
+            logger.exception('Background refresh of %s failed', key)
+        finally:
+            # The thread owns its own DB connections; don't leak them.
+            connections.close_all()
+
+    threading.Thread(target=run, name=f'refresh:{key}', daemon=True).start()
+
+
+def single_flight(name, compute, key_suffix=''):
+    """
+    Return the cached result of ``compute()`` for ``name``.
+
+    Fresh values are returned as-is. Stale values are returned immediately
+    while one caller refreshes them in a background thread. On a cold cache
+    the lock holder computes synchronously and the others poll for up to
+    ``wait`` seconds before falling back to computing themselves.
+    """
+    if not getattr(settings, 'SINGLE_FLIGHT_ENABLED', True):
+        return compute()
+
+    policy = get_policy(name)
+    key = f'single-flight:{name}{key_suffix}'
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        if time.time() - entry['computed_at'] < policy['fresh']:
+            observe_cache(name, 'hit')
+        else:
+            observe_cache(name, 'stale')
+            token = _acquire(lock_key, policy)
+            if token:
+                _refresh_in_background(key, (lock_key, token), compute, policy)
+        return entry['value']
+
+    observe_cache(name, 'miss')
+    token = _acquire(lock_key, policy)
+    if token:
+        return _store(key, (lock_key, token), compute, policy)
+
+    deadline = time.time() + policy['wait']
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value']
+
+    logger.info('Timed out waiting for %s; computing without the lock', key)
+    return compute()
+
+
+async def _aacquire(lock_key, policy):
+    token = uuid.uuid4().hex
+    return token if await cache.aadd(lock_key, token, policy['lock_timeout']) else None
+
+
+async def _arelease(lock_key, token):
+    if await cache.aget(lock_key) == token:
+        await cache.adelete(lock_key)
+
+
+async def _astore(key, lock, compute, policy):
+    try:
+        value = await compute()
+        await cache.aset(key, {'value': value, 'computed_at': time.time()}, policy['fresh'] + policy['stale'])
+        return value
+    finally:
+        await _arelease(*lock)
+
+
+async def asingle_flight(name, compute, key_suffix=''):
+    """
+    ``single_flight`` for async views, with ``compute`` a coroutine function.
+
+    Shares keys and policies with ``single_flight``. Cold-cache waiters sleep
+    on the event loop instead of blocking a thread; stale values are still
+    refreshed in a background thread so the refresh outlives the request.
+    """
+    if not getattr(settings, 'SINGLE_FLIGHT_ENABLED', True):
+        return await compute()
+
+    policy = get_policy(name)
+    key = f'single-flight:{name}{key_suffix}'
+    lock_key = f'{key}:lock'
+
+    entry = await cache.aget(key)
+    if entry is not None:
+        if time.time() - entry['computed_at'] < policy['fresh']:
+            observe_cache(name, 'hit')
+        else:
+            observe_cache(name, 'stale')
+            token = await _aacquire(lock_key, policy)
+            if token:
+                _refresh_in_background(key, (lock_key, token), async_to_sync(compute), policy)
+        return entry['value']
+
+    observe_cache(name, 'miss')
+    token = await _aacquire(lock_key, policy)
+    if token:
+        return await _astore(key, (lock_key, token), compute, policy)
+
+    deadline = time.time() + policy['wait']
+    while time.time() < deadline:
+        await asyncio.sleep(0.05)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry['value']
+
+    logger.info('Timed out waiting for %s; computing without the lock', key)
+    return await compute()
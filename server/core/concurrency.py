@@ -0,0 +1,84 @@
+"""
+Run a view's independent read queries concurrently.
+
+Django's async ORM (``acount()``, ``aaggregate()``, ...) hands every query of
+a request to the same thread-sensitive executor, so an async view awaiting
+three aggregates still runs them one after another. ``gather_queries`` runs
+each callable on a small process-wide thread pool instead, one database
+connection per pool thread, and awaits them together: the view takes as long
+as its slowest query rather than the sum of all of them.
+
+``QUERY_POOL_SIZE`` bounds the extra database connections every process
+opens. The queries run in order on the request's own connection when the pool
+is disabled (size 0) or that connection is inside a transaction, whose
+uncommitted rows other connections cannot see (which is also what keeps
+``TestCase`` working).
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+from .instrumentation import current_metrics
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # Created lazily so every forked worker gets its own threads.
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.QUERY_POOL_SIZE, thread_name_prefix='query-pool',
+                )
+    return _executor
+
+
+def _run(query, metrics):
+    # Pool threads keep their connection between tasks the way request
+    # threads do: reused within CONN_MAX_AGE, replaced once unusable.
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            if metrics is not None:
+                # Count these queries in the request's Server-Timing/N+1 checks.
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+            return query()
+    finally:
+        close_old_connections()
+
+
+def run_queries(queries):
+    """Run ``{name: callable}`` in order on this thread; ``{name: result}``"""
+    return {name: query() for name, query in queries.items()}
+
+
+def _in_transaction():
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+async def gather_queries(queries):
+    """Run ``{name: callable}`` concurrently and return ``{name: result}``"""
+    # The request's connection belongs to its thread-sensitive executor, so
+    # it has to be inspected from there, not from the event loop.
+    if not getattr(settings, 'QUERY_POOL_SIZE', 0) or await sync_to_async(_in_transaction)():
+        return await sync_to_async(run_queries)(queries)
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    metrics = current_metrics()
+    results = await asyncio.gather(*(
+        # In the request's context, so replica routing applies in pool threads
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run, query, metrics)
+        for query in queries.values()
+    ))
+    return dict(zip(queries, results))
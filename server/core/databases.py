@@ -0,0 +1,192 @@
+"""
+Read-replica routing, per-alias statement timeouts and write transactions.
+
+With a ``replica`` database configured (``SQLITE_REPLICA_PATH`` or
+``POSTGRES_REPLICA_HOST``), the reads of report views marked
+``@replica_reads`` and of ViewSet actions listed in ``replica_actions``
+(``list`` for every values-serialized ViewSet) go to the replica. Every
+other query and every write uses ``default``.
+
+Read-your-writes: once a request writes, the rest of its reads use the
+primary, and so do the replica-eligible requests of the same client (same
+``Authorization`` header, else address) for ``REPLICA_PIN_SECONDS``, which
+should exceed the replication lag.
+
+``DATABASE_STATEMENT_TIMEOUTS`` caps each statement per alias: PostgreSQL
+gets ``SET statement_timeout`` (the pooled backend passes it when opening
+the connection instead), SQLite an interrupt from its progress handler.
+
+``write_transaction`` is ``atomic()`` for transactions that read and then
+write (a sale reads the batch it decrements); on the tuned SQLite backend it
+takes the write lock at ``BEGIN``.
+"""
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('db_routing', default=None)
+
+
+class Routing:
+    """Routing state of one request: ``replica`` reads allowed, ``wrote`` yet"""
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica=False):
+        self.replica = replica
+        self.wrote = False
+
+
+@contextmanager
+def replica_routing(replica=True):
+    """Route reads inside the block as for a replica-eligible request"""
+    state = Routing(replica)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def replica_reads(view):
+    """Mark a (function) view whose reads may go to the replica"""
+    view.replica_reads = True
+    return view
+
+
+def replica_enabled():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.replica or state.wrote:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        # Rows written in an open transaction exist only on the primary
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema by replication
+        return False if db == REPLICA else None
+
+
+def _pin_key(request):
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'db-pin:' + hashlib.sha256(client.encode()).hexdigest()[:32]
+
+
+class ReplicaMiddleware:
+    """Per-request routing state, replica eligibility and read-your-writes pins"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = replica_enabled()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        with replica_routing(replica=False) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            cache.set(_pin_key(request), 1, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if state is not None and self.eligible(request, view_func):
+            state.replica = not cache.get(_pin_key(request))
+
+    @staticmethod
+    def eligible(request, view_func):
+        if request.method not in SAFE_METHODS:
+            return False
+        if getattr(view_func, 'replica_reads', False):
+            return True
+        actions = getattr(view_func, 'actions', None) or {}
+        view_class = getattr(view_func, 'cls', None)
+        return actions.get(request.method.lower()) in getattr(view_class, 'replica_actions', ())
+
+
+@contextmanager
+def write_transaction(using=None):
+    """``transaction.atomic(using)``, started with ``BEGIN IMMEDIATE`` on SQLite"""
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    immediate = hasattr(connection, 'begin_immediate') and not connection.in_atomic_block
+    if immediate:
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        if immediate:
+            connection.begin_immediate = False
+
+
+class _SQLiteDeadline:
+    """Execute wrapper noting when the running statement has to be interrupted"""
+
+    def __init__(self, timeout_ms):
+        self.timeout = timeout_ms / 1000
+        self.deadline = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.deadline = time.monotonic() + self.timeout
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.deadline = None
+
+    def expired(self):
+        # Non-zero makes SQLite abort the statement ("interrupted")
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+
+def statement_timeout(alias):
+    """Milliseconds; 0 means none"""
+    return int(settings.DATABASE_STATEMENT_TIMEOUTS.get(alias, 0))
+
+
+def apply_statement_timeout(sender=None, connection=None, **kwargs):
+    """``connection_created`` receiver"""
+    timeout = statement_timeout(connection.alias)
+    if connection.vendor == 'postgresql':
+        # connection_created also fires for each checkout from the pool, so
+        # the pooled backend sets the timeout as a startup parameter instead.
+        if timeout and not getattr(connection, 'statement_timeout_on_connect', False):
+            with connection.cursor() as cursor:
+                cursor.execute(f'SET statement_timeout = {timeout}')
+    elif connection.vendor == 'sqlite':
+        connection.execute_wrappers[:] = [
+            wrapper for wrapper in connection.execute_wrappers if not isinstance(wrapper, _SQLiteDeadline)
+        ]
+        if timeout:
+            deadline = _SQLiteDeadline(timeout)
+            # First, so request-scoped wrappers pushed before the connection
+            # was opened still pop themselves off the end.
+            connection.execute_wrappers.insert(0, deadline)
+            connection.connection.set_progress_handler(deadline.expired, 1000)
+        else:
+            connection.connection.set_progress_handler(None, 0)
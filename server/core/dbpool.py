@@ -0,0 +1,197 @@
+"""
+Thread-safe database connection pool behind the pooled PostgreSQL backend
+(``core.backends.postgresql_pool``).
+
+There is one pool per database alias and process, shared by all of its
+threads: gthread worker threads, the ASGI thread-sensitive executor and the
+query pool (``QUERY_POOL_SIZE``) all check connections out of it. So
+``max_size`` bounds the connections a worker opens however many threads it
+runs, and a request's connection is handed back at the end of the request
+(``CONN_MAX_AGE = 0``) instead of being closed. The next request then skips
+the TCP, TLS and authentication handshakes.
+
+Checkout takes the most recently returned connection. If it sat idle for
+``check_after`` seconds it is checked with a round trip first, and it is
+replaced when broken or older than ``max_lifetime``. Idle connections above
+``min_size`` are closed after ``max_idle`` seconds. With ``max_size``
+connections checked out, callers wait up to ``timeout`` seconds and then get
+``PoolTimeout``.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from . import metrics as prometheus
+
+logger = logging.getLogger('pharma.performance')
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _Entry:
+    __slots__ = ('connection', 'created', 'returned')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.returned = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, name, check, reset, min_size=0, max_size=4, timeout=10.0,
+                 check_after=5.0, max_idle=300.0, max_lifetime=3600.0):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(f'Invalid pool size: min_size={min_size}, max_size={max_size}')
+        self.name = name
+        self.check = check
+        self.reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.pid = os.getpid()
+
+        self._condition = threading.Condition()
+        self._idle = deque()  # most recently returned last
+        self._in_use = {}  # id(connection) -> _Entry
+        self._size = 0  # idle + in use + being opened
+
+    def stats(self):
+        with self._condition:
+            return {'size': self._size, 'idle': len(self._idle), 'in_use': len(self._in_use)}
+
+    def getconn(self, connect):
+        """A pooled connection, or a new one from ``connect()`` while below ``max_size``"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                try:
+                    entry = _Entry(connect())
+                except BaseException:
+                    self._release_slot()
+                    raise
+                outcome = 'new'
+            elif self._usable(entry):
+                outcome = 'reused'
+            else:
+                continue
+            with self._condition:
+                self._in_use[id(entry.connection)] = entry
+            prometheus.observe_pool_checkout(self.name, outcome, time.monotonic() - started)
+            self._report()
+            return entry.connection
+
+    def _reserve(self, deadline):
+        # An idle entry, or None after reserving a slot for a new connection
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    prometheus.observe_pool_checkout(self.name, 'timeout', self.timeout)
+                    raise PoolTimeout(
+                        f'No connection available in pool {self.name!r} within {self.timeout:g}s '
+                        f'({self.max_size} in use)'
+                    )
+                self._condition.wait(remaining)
+
+    def _usable(self, entry):
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created > self.max_lifetime:
+            self._discard(entry, 'expired')
+            return False
+        if now - entry.returned > self.check_after:
+            try:
+                self.check(entry.connection)
+            except Exception:
+                logger.info('Discarding broken connection from pool %r', self.name, exc_info=True)
+                self._discard(entry, 'broken')
+                return False
+        return True
+
+    def putconn(self, connection, discard=False):
+        """Return a checked-out connection; ``discard`` closes it instead"""
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Not from this pool (e.g. opened before a fork)
+            _close_quietly(connection)
+            return
+        if discard:
+            self._discard(entry, 'discarded')
+            return
+        try:
+            usable = self.reset(connection)
+        except Exception:
+            usable = False
+        if not usable:
+            self._discard(entry, 'broken')
+            return
+
+        now = entry.returned = time.monotonic()
+        stale = []
+        with self._condition:
+            self._idle.append(entry)
+            while len(self._idle) > self.min_size and now - self._idle[0].returned > self.max_idle:
+                stale.append(self._idle.popleft())
+            self._condition.notify()
+        for old in stale:
+            self._discard(old, 'idle')
+        self._report()
+
+    def fill(self, connect):
+        """Open connections until ``min_size`` are open"""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = _Entry(connect())
+            except BaseException:
+                self._release_slot()
+                raise
+            with self._condition:
+                self._idle.appendleft(entry)
+                self._condition.notify()
+            self._report()
+
+    def close(self):
+        """Close the idle connections; checked-out ones close when returned"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._discard(entry, 'closed')
+
+    def _discard(self, entry, reason):
+        _close_quietly(entry.connection)
+        self._release_slot()
+        prometheus.observe_pool_discard(self.name, reason)
+        self._report()
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _report(self):
+        stats = self.stats()
+        prometheus.set_pool_connections(self.name, stats['idle'], stats['in_use'])
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
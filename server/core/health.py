@@ -0,0 +1,136 @@
+"""
+Liveness and readiness probes.
+
+``/livez`` answers from memory and touches nothing: it only proves the worker
+can serve a request. ``/readyz`` serves the last result of the database, cache
+and migration probes. Those run in at most one background thread per process,
+no more often than every ``HEALTH_READINESS_TTL`` seconds, so a slow database
+delays the next result instead of piling up probe requests and connections.
+A result older than ``HEALTH_READINESS_MAX_AGE`` (e.g. a probe stuck on a hung
+database) is reported as not ready.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import JsonResponse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def check_database():
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def check_cache():
+    cache.set('health:readiness', 1, 60)
+    if cache.get('health:readiness') != 1:
+        raise RuntimeError('write/read failed')
+
+
+def check_migrations():
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migration(s)')
+
+
+def _run(check):
+    started = time.perf_counter()
+    try:
+        check()
+        result = {'status': 'ok'}
+    except Exception as e:
+        result = {'status': 'error', 'error': str(e)}
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+class Readiness:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.result = None
+        self.migrated = False
+
+    def refresh(self):
+        """Run the probes unless another thread already is; returns whether it ran"""
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            checks = {'database': _run(check_database), 'cache': _run(check_cache)}
+            if self.migrated:
+                # Migrations are not unapplied under a running process.
+                checks['migrations'] = {'status': 'ok'}
+            else:
+                checks['migrations'] = _run(check_migrations)
+                self.migrated = checks['migrations']['status'] == 'ok'
+            self.result = {
+                'status': 'ok' if all(c['status'] == 'ok' for c in checks.values()) else 'error',
+                'checks': checks,
+                'checked_at': time.monotonic(),
+                'timestamp': timezone.now().isoformat(),
+            }
+        finally:
+            self.lock.release()
+        return True
+
+    def refresh_in_background(self):
+        def run():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Readiness probe failed')
+            finally:
+                # The thread owns its own DB connections; don't leak them.
+                connections.close_all()
+
+        threading.Thread(target=run, name='readiness-probe', daemon=True).start()
+
+    def snapshot(self):
+        """Latest result and its age in seconds; ``(None, None)`` before the
+        first probe of this process has finished"""
+        result = self.result
+        age = time.monotonic() - result['checked_at'] if result else None
+        if (result is None or age >= getattr(settings, 'HEALTH_READINESS_TTL', 10)) and not self.lock.locked():
+            self.refresh_in_background()
+
+        if result is None:
+            # A fresh worker waits briefly for its first probe rather than
+            # reporting "not ready" for no reason.
+            deadline = time.monotonic() + getattr(settings, 'HEALTH_READINESS_WAIT', 2.0)
+            while self.result is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+            result = self.result
+            age = time.monotonic() - result['checked_at'] if result else None
+        return result, age
+
+
+readiness = Readiness()
+
+
+def livez(request):
+    return JsonResponse({'status': 'ok'})
+
+
+def readyz(request):
+    result, age = readiness.snapshot()
+    if result is None:
+        return JsonResponse({'status': 'starting'}, status=503)
+
+    body = {
+        'status': result['status'],
+        'checked_at': result['timestamp'],
+        'age_seconds': round(age, 1),
+        'checks': result['checks'],
+    }
+    if age > getattr(settings, 'HEALTH_READINESS_MAX_AGE', 30):
+        body['status'] = 'error'
+        body['error'] = 'probe result is stale; the last probe has not finished'
+    return JsonResponse(body, status=200 if body['status'] == 'ok' else 503)
@@ -0,0 +1,101 @@
+"""
+Start-up import profiling (``manage.py import_profile`` and the import-time
+budget test).
+
+The target (``wsgi``: importing ``pharma_backend.wsgi``, which sets Django
+up; ``manage``: running ``manage.py <command>``) runs in a fresh interpreter
+with ``-X importtime``. That flag only times ``import`` statements, but
+Django loads settings, apps, models and admin modules with
+``importlib.import_module``. A shim therefore also reports those
+"dynamic" imports, with their cumulative time.
+
+``HEAVY_MODULES`` are installed for optional features (AI enrichment in the
+medicine admin, analysis scripts) and must only be imported by the code
+that uses them, never at start-up.
+"""
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = (
+    'pandas', 'numpy', 'matplotlib', 'scipy', 'PyQt5', 'pyqtgraph', 'ccxt', 'google.generativeai',
+    'deriv_api', 'reactivex', 'requests', 'aiohttp',
+)
+
+_SHIM = r'''
+import importlib, importlib.util, sys, time
+_started = time.perf_counter_ns()
+_import_module = importlib.import_module
+
+def import_module(name, package=None):
+    absolute = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+    if absolute in sys.modules:
+        return _import_module(name, package)
+    started = time.perf_counter_ns()
+    try:
+        return _import_module(name, package)
+    finally:
+        sys.stderr.write(f'dynamic import: {(time.perf_counter_ns() - started) // 1000} | {absolute}\n')
+
+importlib.import_module = import_module
+'''
+
+_TARGETS = {
+    'wsgi': 'import pharma_backend.wsgi',
+    'manage': "import runpy; sys.argv = ['manage.py', *{args!r}]; runpy.run_path('manage.py', run_name='__main__')",
+}
+
+_TOTAL = "\nsys.stderr.write(f'startup total: {(time.perf_counter_ns() - _started) // 1000}\\n')\n"
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+_DYNAMIC_LINE = re.compile(r'^dynamic import: (\d+) \| (\S+)$')
+
+
+def profile(target='wsgi', args=('check',), env=None):
+    """
+    Import profile of one start-up of ``target``, times in microseconds:
+    ``{'total', 'modules': {name: (self, cumulative)}, 'dynamic': {name: cumulative}}``
+    """
+    code = _SHIM + _TARGETS[target].format(args=list(args)) + _TOTAL
+    environment = dict(os.environ, DJANGO_SETTINGS_MODULE='pharma_backend.settings', **(env or {}))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SERVER_DIR, env=environment, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f'{target} start-up failed:\n{result.stderr[-2000:]}')
+
+    modules, dynamic, total = {}, {}, None
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            modules[match[4]] = (int(match[1]), int(match[2]))
+            continue
+        match = _DYNAMIC_LINE.match(line)
+        if match:
+            dynamic[match[2]] = int(match[1])
+        elif line.startswith('startup total: '):
+            total = int(line.split(': ')[1])
+    return {'total': total, 'modules': modules, 'dynamic': dynamic}
+
+
+def by_package(modules):
+    """Self time summed per top-level package, largest first"""
+    totals = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.split('.')[0]] += self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def heavy_imports(result):
+    """The ``HEAVY_MODULES`` (or their submodules) a start-up imported"""
+    loaded = set(result['modules']) | set(result['dynamic'])
+    return sorted(
+        heavy for heavy in HEAVY_MODULES
+        if any(name == heavy or name.startswith(heavy + '.') for name in loaded)
+    )
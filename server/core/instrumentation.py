@@ -0,0 +1,104 @@
+"""
+Per-request performance bookkeeping.
+
+``RequestMetrics`` collects SQL timings (via ``connection.execute_wrapper``)
+and named spans such as serialization and rendering for the request that is
+currently being handled. Code anywhere in the stack can add to it through
+``timed()`` without having the request object at hand.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_metrics', default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse literals and placeholder lists so identical query shapes compare equal"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecord:
+    __slots__ = ('sql', 'duration', 'alias', 'many', 'started')
+
+    def __init__(self, sql, duration, alias, many, started):
+        self.sql = sql
+        self.duration = duration
+        self.alias = alias
+        self.many = many
+        self.started = started
+
+    @property
+    def normalized_sql(self):
+        return normalize_sql(self.sql)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.spans = {}
+        self.listeners = []
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def query_time(self):
+        return sum(q.duration for q in self.queries)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def __call__(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            record = QueryRecord(sql, time.perf_counter() - started, context['connection'].alias, many, started)
+            self.queries.append(record)
+            for listener in self.listeners:
+                listener(record)
+
+
+def current_metrics():
+    """Metrics of the request being handled on this thread/task, if any"""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the wall time of the block to span ``name`` of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, time.perf_counter() - started)
@@ -0,0 +1,212 @@
+"""
+Non-blocking logging: request threads put records on a bounded in-memory
+queue, and one background thread per process writes them out.
+
+``QueueHandler`` is the only handler the loggers in ``LOGGING`` use. Its
+listener thread writes each record as one JSON object per line to a
+size-rotated file (``LOG_FILE``, ``LOG_MAX_BYTES``, ``LOG_BACKUP_COUNT``) and
+optionally to stderr, which gunicorn captures. So a slow disk or a blocked
+pipe only delays the listener, never a POS request.
+
+When the queue (``LOG_QUEUE_SIZE`` records) is full, new records are dropped
+rather than waited for. Drops are counted (``dropped``, and
+``pharma_log_records_dropped_total`` on ``/metrics``), and the listener logs
+how many were lost once it catches up.
+
+The listener starts with the first record a process logs, so each gunicorn
+worker forked from a preloaded master gets its own. Remaining records are
+written at interpreter exit (``logging.shutdown`` closes the handler).
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# LogRecord attributes; anything else was passed with ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '{levelname} {message}'
+
+_traceback_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, ``extra=`` fields included"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        if record.stack_info:
+            entry['stack_info'] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+@contextmanager
+def _file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    ``RotatingFileHandler`` for a file that every gunicorn worker appends
+    to: only one process rotates at a time, and the others follow it to the
+    new file instead of writing on into the rotated one.
+    """
+
+    def shouldRollover(self, record):
+        if self.stream is not None:
+            try:
+                current = os.path.samestat(os.stat(self.baseFilename), os.fstat(self.stream.fileno()))
+            except OSError:
+                current = False
+            if not current:
+                self.stream.close()
+                self.stream = self._open()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        with _file_lock(self.baseFilename + '.lock'):
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            # Another worker rotated it while this one waited for the lock
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) < self.maxBytes:
+                self.stream = self._open()
+                return
+            super().doRollover()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def __init__(self, owner):
+        super().__init__(owner.queue, *owner.sinks, respect_handler_level=True)
+        self.owner = owner
+        self.reported = owner.dropped
+
+    def handle(self, record):
+        super().handle(record)
+        dropped = self.owner.dropped
+        if dropped != self.reported:
+            lost, self.reported = dropped - self.reported, dropped
+            super().handle(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': 'Logging queue full: dropped %d record(s)', 'args': (lost,),
+            }))
+
+    def enqueue_sentinel(self):
+        # The queue may be full; stop() waits for room rather than failing
+        self.queue.put(self._sentinel)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Bounded queue handler writing through a per-process listener thread.
+
+    ``filename`` adds a ``SharedRotatingFileHandler`` (JSON lines),
+    ``console`` a stderr handler ('json' or 'text'); ``handlers`` are
+    further sinks.
+    """
+
+    def __init__(self, handlers=(), filename=None, max_bytes=10 * 1024 * 1024, backup_count=5,
+                 console=None, queue_size=10000):
+        # Sinks first: logging.shutdown() closes handlers newest first, so
+        # this one drains its queue before they are closed.
+        self.sinks = list(handlers)
+        if filename:
+            sink = SharedRotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                             encoding='utf-8', delay=True)
+            sink.setFormatter(JsonFormatter())
+            self.sinks.append(sink)
+        if console:
+            sink = logging.StreamHandler(sys.stderr)
+            sink.setFormatter(JsonFormatter() if console == 'json' else logging.Formatter(TEXT_FORMAT, style='{'))
+            self.sinks.append(sink)
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.listener = None
+        self._start_lock = threading.Lock()
+        # Weak, so closed handlers (e.g. in tests) can be collected
+        after_fork = weakref.WeakMethod(self._after_fork)
+        os.register_at_fork(after_in_child=lambda: after_fork() and after_fork()())
+
+    def _after_fork(self):
+        # The parent's listener thread does not exist in the child, and its
+        # queue may have been locked mid-operation when the fork happened.
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.listener is None:
+                self.listener = _Listener(self)
+                self.listener.start()
+
+    def prepare(self, record):
+        # Rendered here: args may be objects the request thread goes on to
+        # change, and a traceback keeps the request's frames alive. The
+        # sinks format the rest (JSON or text) in the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            from . import metrics
+            metrics.observe_log_drop(record.name)
+
+    def emit(self, record):
+        if self.listener is None:
+            self.start()
+        super().emit(record)
+
+    def close(self):
+        with self._start_lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+        for sink in self.sinks:
+            sink.close()
+        super().close()
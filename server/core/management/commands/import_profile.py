@@ -0,0 +1,79 @@
+"""
+Per-module import costs of a cold start (see core/importtime.py).
+
+    python manage.py import_profile                   # importing pharma_backend.wsgi
+    python manage.py import_profile --target manage   # running manage.py check
+    python manage.py import_profile --top 40 --format json > startup.json
+
+Times are in milliseconds: "self" excludes the module's own imports,
+"cumulative" includes them. Modules Django loads dynamically (settings,
+apps, models, admin) are listed with their cumulative time.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importtime
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import times of the WSGI app or manage.py start-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['wsgi', 'manage'], default='wsgi')
+        parser.add_argument(
+            '--command', default='check',
+            help='manage.py command run for --target manage (default: %(default)s)',
+        )
+        parser.add_argument('--top', type=int, default=25, help='Modules listed per table (default: %(default)s)')
+        parser.add_argument('--repeat', type=int, default=3, help='Start-ups measured; the fastest is reported')
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        try:
+            runs = [
+                importtime.profile(options['target'], options['command'].split())
+                for _ in range(options['repeat'])
+            ]
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        # The fastest start-up has the least scheduling noise
+        result = min(runs, key=lambda run: run['total'])
+        top = options['top']
+
+        modules = sorted(result['modules'].items(), key=lambda item: item[1][0], reverse=True)[:top]
+        dynamic = sorted(result['dynamic'].items(), key=lambda item: item[1], reverse=True)[:top]
+        packages = list(importtime.by_package(result['modules']).items())[:top]
+        heavy = importtime.heavy_imports(result)
+
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps({
+                'target': options['target'],
+                'total_ms': _ms(result['total']),
+                'modules': [{'module': name, 'self_ms': _ms(own), 'cumulative_ms': _ms(cumulative)}
+                            for name, (own, cumulative) in modules],
+                'dynamic': [{'module': name, 'cumulative_ms': _ms(cumulative)} for name, cumulative in dynamic],
+                'packages': [{'package': name, 'self_ms': _ms(own)} for name, own in packages],
+                'heavy_imports': heavy,
+            }, indent=2))
+            return
+
+        self.stdout.write(f"{options['target']} start-up: {_ms(result['total'])} ms "
+                          f"(fastest of {options['repeat']}, {len(result['modules'])} modules)")
+        self.stdout.write('\nSlowest modules (self / cumulative ms)')
+        for name, (own, cumulative) in modules:
+            self.stdout.write(f'  {_ms(own):8}  {_ms(cumulative):8}  {name}')
+        self.stdout.write('\nDynamic imports (cumulative ms)')
+        for name, cumulative in dynamic:
+            self.stdout.write(f'  {_ms(cumulative):8}  {name}')
+        self.stdout.write('\nPackages (self ms)')
+        for name, own in packages:
+            self.stdout.write(f'  {_ms(own):8}  {name}')
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"\nOptional heavy modules imported: {', '.join(heavy)}"))
+
+
+def _ms(microseconds):
+    return round(microseconds / 1000, 1)
@@ -0,0 +1,66 @@
+"""
+Refresh the query planner's statistics and, on SQLite, trim the WAL.
+
+    python manage.py optimize_db              # PRAGMA optimize / ANALYZE
+    python manage.py optimize_db --analyze    # full ANALYZE on SQLite too
+
+SQLite's ``PRAGMA optimize`` only re-analyzes tables whose statistics are
+missing or stale, so it is cheap enough to run hourly from cron. Without
+statistics (``sqlite_stat1``) the planner guesses, and on the sales table
+it may pick the date index over the medicine one. The WAL checkpoint
+folds the log back into the database file so it doesn't keep growing
+while readers are active.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Refresh query planner statistics; on SQLite also checkpoint the WAL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to maintain (default: %(default)s)',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Run a full ANALYZE on SQLite instead of PRAGMA optimize',
+        )
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database {options['database']!r}")
+        connection = connections[options['database']]
+
+        if connection.vendor == 'sqlite':
+            self.sqlite(connection, options['analyze'])
+        elif connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(self.style.SUCCESS('Analyzed all tables'))
+        else:
+            raise CommandError(f'Nothing to do for {connection.vendor}')
+
+    def sqlite(self, connection, analyze):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            # PRAGMA optimize skips tables that were never analyzed
+            if analyze or cursor.fetchone() is None:
+                cursor.execute('ANALYZE')
+                self.stdout.write('Analyzed all tables')
+            else:
+                cursor.execute('PRAGMA optimize')
+                self.stdout.write('Refreshed stale statistics')
+
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0].lower() == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, log_pages, checkpointed = cursor.fetchone()
+                if busy:
+                    self.stdout.write(self.style.WARNING(
+                        f'WAL checkpoint incomplete ({checkpointed}/{log_pages} pages); readers were active'
+                    ))
+                else:
+                    self.stdout.write(f'Checkpointed {checkpointed} WAL page(s)')
+        self.stdout.write(self.style.SUCCESS('Done'))
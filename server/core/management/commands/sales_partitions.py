@@ -0,0 +1,46 @@
+"""
+Maintain time-partitioned sales storage (see sales/partitions.py).
+
+    python manage.py sales_partitions                      # partitions for the next months
+    python manage.py sales_partitions --archive-after 24   # and archive sales older than 24 months
+
+Safe to run repeatedly, e.g. daily from cron.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from sales import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly sales partitions and archive old sales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=settings.SALES_PARTITION_MONTHS_AHEAD,
+            help='Months of partitions to create in advance (PostgreSQL only, default: %(default)s)',
+        )
+        parser.add_argument(
+            '--archive-after', type=int, default=settings.SALES_ARCHIVE_AFTER_MONTHS,
+            help='Archive sales older than this many months; 0 archives nothing (default: %(default)s)',
+        )
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0 or options['archive_after'] < 0:
+            raise CommandError('--months-ahead and --archive-after must not be negative')
+
+        if partitions.is_partitioned(connection):
+            created = partitions.ensure_partitions(options['months_ahead'], connection)
+            self.stdout.write(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else ''}")
+        elif connection.vendor == 'postgresql':
+            raise CommandError(f'{partitions.TABLE} is not partitioned; run migrate first')
+
+        if options['archive_after']:
+            cutoff = partitions.archive_cutoff(options['archive_after'])
+            archived = partitions.archive_before(cutoff, connection)
+            for month, rows in archived.items():
+                self.stdout.write(f"  {month:%Y-%m}: {'partition' if rows is None else f'{rows} sales'}")
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {len(archived)} month(s) of sales dated before {cutoff.isoformat()}'
+            ))
@@ -0,0 +1,86 @@
+"""
+Management command to load a synthetic, reproducible dataset for benchmarks
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import datagen
+from medicines.models import Medicine
+from sales import partitions
+from sales.models import ArchivedSale, Sale
+from stock.models import Stock
+from suppliers.models import Supplier
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic medicines, stock batches, suppliers and sales for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medicines', type=int, default=500)
+        parser.add_argument('--batches-per-medicine', type=int, default=4)
+        parser.add_argument('--suppliers', type=int, default=50)
+        parser.add_argument('--sales', type=int, default=100_000)
+        parser.add_argument('--years', type=float, default=2, help='How far back sales go (default: 2)')
+        parser.add_argument('--seed', type=int, default=42, help='Same seed and counts give the same data')
+        parser.add_argument('--chunk-size', type=int, default=datagen.DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Delete all existing sales, stock, medicines and suppliers first',
+        )
+        parser.add_argument(
+            '--password',
+            help='Also create bench_admin, bench_manager and bench_staff users with this password',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if settings.IS_PRODUCTION:
+            raise CommandError('Refusing to generate synthetic data in production')
+
+        if options['flush']:
+            with transaction.atomic():
+                for model in (ArchivedSale, Sale, Stock, Medicine, Supplier):
+                    model.objects.all().delete()
+        elif Medicine.objects.exists():
+            raise CommandError('Database already contains medicines; pass --flush to replace them')
+
+        started = time.perf_counter()
+        counts = datagen.generate(
+            medicines=options['medicines'],
+            batches_per_medicine=options['batches_per_medicine'],
+            suppliers=options['suppliers'],
+            sales=options['sales'],
+            years=options['years'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            progress=self.report_progress,
+        )
+        if partitions.is_partitioned():
+            # Past sales went to the default partition; give them their months
+            partitions.ensure_partitions(settings.SALES_PARTITION_MONTHS_AHEAD)
+        if options['password']:
+            self.create_users(options['password'])
+
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {elapsed:.1f}s'))
+
+    def report_progress(self, model, done, total):
+        if self.verbosity >= 2 or done == total:
+            self.stdout.write(f'  {model}: {done}/{total}')
+
+    def create_users(self, password):
+        User = get_user_model()
+        for role in User.Role.values:
+            username = f'bench_{role.lower()}'
+            user, _ = User.objects.get_or_create(
+                username=username,
+                defaults={'email': f'{username}@example.com', 'role': role, 'is_staff': role == User.Role.ADMIN},
+            )
+            user.set_password(password)
+            user.save(update_fields=['password'])
+            self.stdout.write(f'  user {username} ({role})')
@@ -0,0 +1,216 @@
+"""
+Management command to build a latency SLO report from gunicorn access logs
+"""
+import csv
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.accesslog import AccessLogReader, RouteNormalizer
+from core.quantiles import QuantileSketch
+
+QUANTILES = (0.5, 0.95, 0.99)
+_WINDOW = re.compile(r'^(\d+)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_window(value):
+    match = _WINDOW.match(value)
+    if not match:
+        raise CommandError(f'Invalid window {value!r}; use e.g. 15m, 1h or 1d')
+    return int(match[1]) * _UNITS[match[2]]
+
+
+class Aggregate:
+    """Counters plus a latency sketch for one route (in one window)"""
+
+    def __init__(self, slo_ms):
+        self.slo_ms = slo_ms
+        self.sketch = QuantileSketch()
+        self.server_errors = 0
+        self.client_errors = 0
+        self.within_slo = 0
+        self.bytes = 0
+        self.first = self.last = None
+
+    def add(self, record, duration_ms):
+        self.sketch.add(duration_ms)
+        if record.status >= 500:
+            self.server_errors += 1
+        elif record.status >= 400:
+            self.client_errors += 1
+        if self.slo_ms is not None and duration_ms <= self.slo_ms:
+            self.within_slo += 1
+        self.bytes += record.bytes
+        if self.first is None or record.timestamp < self.first:
+            self.first = record.timestamp
+        if self.last is None or record.timestamp > self.last:
+            self.last = record.timestamp
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.server_errors += other.server_errors
+        self.client_errors += other.client_errors
+        self.within_slo += other.within_slo
+        self.bytes += other.bytes
+        self.first = min(filter(None, (self.first, other.first)), default=None)
+        self.last = max(filter(None, (self.last, other.last)), default=None)
+
+    def row(self, seconds):
+        count = self.sketch.count
+        row = {
+            'requests': count,
+            'throughput_rps': round(count / seconds, 3) if seconds else None,
+            'error_rate': round(self.server_errors / count, 5),
+            'client_error_rate': round(self.client_errors / count, 5),
+        }
+        for q in QUANTILES:
+            row[f'p{int(q * 100)}_ms'] = round(self.sketch.quantile(q), 2)
+        row['max_ms'] = round(self.sketch.max, 2)
+        row['mean_ms'] = round(self.sketch.mean, 2)
+        if self.slo_ms is not None:
+            row['within_slo'] = round(self.within_slo / count, 5)
+        return row
+
+
+class Command(BaseCommand):
+    help = 'Per-route p50/p95/p99, throughput and error rate from gunicorn access logs, per time window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='+', help='Access log files (.gz ok, - for stdin)')
+        parser.add_argument('--window', default='1h', help='Window size, e.g. 5m, 1h, 1d (default: 1h)')
+        parser.add_argument('--format', choices=['json', 'csv'], default='json')
+        parser.add_argument('--output', help='Output file (default: stdout)')
+        parser.add_argument('--slo-ms', type=float, help='Also report the share of requests at or under this latency')
+        parser.add_argument('--prefix', default='/api/', help='Only count paths starting with this (default: /api/)')
+        parser.add_argument(
+            '--late-windows', type=int, default=1,
+            help='Windows kept open for out-of-order lines before they are written (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        self.window = parse_window(options['window'])
+        self.slo_ms = options['slo_ms']
+        self.late = timedelta(seconds=self.window * options['late_windows'])
+        if options['output']:
+            stream = open(options['output'], 'w', newline='')
+        else:
+            # Chunks are written as windows close, not as whole lines
+            self.stdout.ending = ''
+            stream = self.stdout
+        try:
+            self.writer = CSVWriter(stream, self.slo_ms) if options['format'] == 'csv' else JSONWriter(stream)
+            reader = AccessLogReader(options['logs'])
+            self.process(reader, options['prefix'])
+        finally:
+            if options['output']:
+                stream.close()
+        if reader.skipped:
+            self.stderr.write(f'Skipped {reader.skipped} of {reader.lines} lines that were not access log lines')
+
+    def process(self, reader, prefix):
+        normalize = RouteNormalizer(resolve=True)
+        windows = {}   # window start -> {route: Aggregate}; only the open ones
+        totals = {}    # route -> Aggregate over the whole log
+        newest = None
+        late_records = 0
+
+        for record in reader:
+            if not record.path.startswith(prefix):
+                continue
+            start = self.window_start(record.timestamp)
+            if newest is not None and start + self.late < newest:
+                late_records += 1  # its window was already written
+                routes = None
+            else:
+                routes = windows.setdefault(start, {})
+            route = f'{record.method} {normalize(record.path)}'
+            duration_ms = record.duration * 1000
+            if routes is not None:
+                routes.setdefault(route, Aggregate(self.slo_ms)).add(record, duration_ms)
+            else:
+                totals.setdefault(route, Aggregate(self.slo_ms)).add(record, duration_ms)
+
+            if newest is None or start > newest:
+                newest = start
+                for closed in [w for w in windows if w + self.late < newest]:
+                    self.flush(closed, windows.pop(closed), totals)
+
+        for start in sorted(windows):
+            self.flush(start, windows.pop(start), totals)
+
+        first = min((a.first for a in totals.values()), default=None)
+        last = max((a.last for a in totals.values()), default=None)
+        span = (last - first).total_seconds() + 1 if first else 0
+        self.writer.finish(
+            {route: totals[route].row(span) for route in sorted(totals)},
+            {
+                'window_seconds': self.window,
+                'first': first.isoformat() if first else None,
+                'last': last.isoformat() if last else None,
+                'requests': sum(a.sketch.count for a in totals.values()),
+                'late_records': late_records,
+                'slo_ms': self.slo_ms,
+                'lines': reader.lines,
+                'unparsable_lines': reader.skipped,
+            },
+        )
+
+    def window_start(self, timestamp):
+        epoch = int(timestamp.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % self.window, tz=timezone.utc)
+
+    def flush(self, start, routes, totals):
+        overall = Aggregate(self.slo_ms)
+        rows = {}
+        for route in sorted(routes):
+            aggregate = routes[route]
+            rows[route] = aggregate.row(self.window)
+            overall.merge(aggregate)
+            totals.setdefault(route, Aggregate(self.slo_ms)).merge(aggregate)
+        rows['*'] = overall.row(self.window)
+        self.writer.window(start, rows)
+
+
+class JSONWriter:
+    """``{"windows": [...], "routes": {...}, "meta": {...}}``, written as
+    windows close so the whole report is never held in memory"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        stream.write('{"windows": [')
+
+    def window(self, start, rows):
+        self.stream.write(',\n' if self.count else '\n')
+        self.stream.write(json.dumps({'start': start.isoformat(), 'routes': rows}))
+        self.count += 1
+
+    def finish(self, totals, meta):
+        self.stream.write('\n], "routes": ')
+        json.dump(totals, self.stream, indent=2)
+        self.stream.write(', "meta": ')
+        json.dump(meta, self.stream, indent=2)
+        self.stream.write('}\n')
+
+
+class CSVWriter:
+    """One row per window and route; the whole-log totals use window ``total``"""
+
+    def __init__(self, stream, slo_ms):
+        self.columns = ['requests', 'throughput_rps', 'error_rate', 'client_error_rate']
+        self.columns += [f'p{int(q * 100)}_ms' for q in QUANTILES] + ['max_ms', 'mean_ms']
+        if slo_ms is not None:
+            self.columns.append('within_slo')
+        self.writer = csv.writer(stream)
+        self.writer.writerow(['window', 'route'] + self.columns)
+
+    def window(self, start, rows):
+        for route, row in rows.items():
+            self.writer.writerow([start.isoformat(), route] + [row[c] for c in self.columns])
+
+    def finish(self, totals, meta):
+        for route, row in totals.items():
+            self.writer.writerow(['total', route] + [row[c] for c in self.columns])
@@ -0,0 +1,161 @@
+"""
+Prometheus metrics in text exposition format.
+
+Under gunicorn every worker is a separate process, so metric values are
+written to mmap files in ``PROMETHEUS_MULTIPROC_DIR`` (set up by
+``gunicorn.conf.py``) and aggregated across workers when ``/metrics`` is
+scraped. Without that variable the in-process registry is exposed, which is
+what ``runserver`` and tests use.
+
+Every metric here has labels: a metric without labels opens its file when
+it is created, i.e. when this module is imported, which may happen before
+gunicorn has set the directory up.
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+if prometheus_client is not None:
+    REQUESTS = prometheus_client.Counter(
+        'pharma_http_requests_total', 'HTTP requests by route and status',
+        ['method', 'route', 'status'],
+    )
+    LATENCY = prometheus_client.Histogram(
+        'pharma_http_request_duration_seconds', 'Request latency',
+        ['method', 'route'], buckets=LATENCY_BUCKETS,
+    )
+    RESPONSE_SIZE = prometheus_client.Histogram(
+        'pharma_http_response_size_bytes', 'Response body size',
+        ['method', 'route'], buckets=SIZE_BUCKETS,
+    )
+    DB_QUERIES = prometheus_client.Histogram(
+        'pharma_db_queries_per_request', 'SQL queries executed per request',
+        ['route'], buckets=QUERY_COUNT_BUCKETS,
+    )
+    DB_TIME = prometheus_client.Histogram(
+        'pharma_db_time_per_request_seconds', 'Time spent in SQL per request',
+        ['route'], buckets=LATENCY_BUCKETS,
+    )
+    CACHE = prometheus_client.Counter(
+        'pharma_cache_requests_total', 'Cache lookups by outcome',
+        ['cache', 'result'],
+    )
+    POOL_CONNECTIONS = prometheus_client.Gauge(
+        'pharma_db_pool_connections', 'Pooled database connections by state',
+        ['alias', 'state'], multiprocess_mode='livesum',
+    )
+    POOL_CHECKOUTS = prometheus_client.Counter(
+        'pharma_db_pool_checkouts_total', 'Pool checkouts by outcome (reused, new, timeout)',
+        ['alias', 'outcome'],
+    )
+    POOL_WAIT = prometheus_client.Histogram(
+        'pharma_db_pool_checkout_seconds', 'Time to check a connection out of the pool',
+        ['alias'], buckets=LATENCY_BUCKETS,
+    )
+    POOL_DISCARDS = prometheus_client.Counter(
+        'pharma_db_pool_discards_total', 'Pooled connections closed, by reason',
+        ['alias', 'reason'],
+    )
+    PROCESS_MEMORY = prometheus_client.Gauge(
+        'pharma_process_memory_bytes', 'Resident (rss), proportional (pss) and unique (uss) memory',
+        ['kind'], multiprocess_mode='all',
+    )
+    LOG_DROPS = prometheus_client.Counter(
+        'pharma_log_records_dropped_total', 'Log records dropped because the logging queue was full',
+        ['logger'],
+    )
+
+
+def enabled():
+    return prometheus_client is not None and getattr(settings, 'METRICS_ENABLED', True)
+
+
+def route_label(request):
+    """Low-cardinality route name; unmatched paths share one label"""
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else '<unmatched>'
+
+
+def observe_request(request, response, metrics, elapsed):
+    if not enabled():
+        return
+    route = route_label(request)
+    method = request.method
+    REQUESTS.labels(method, route, str(response.status_code)).inc()
+    LATENCY.labels(method, route).observe(elapsed)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(method, route).observe(len(response.content))
+    DB_QUERIES.labels(route).observe(metrics.query_count)
+    DB_TIME.labels(route).observe(metrics.query_time)
+
+
+def observe_cache(cache_name, result):
+    """Count a lookup; ``result`` is e.g. 'hit', 'stale' or 'miss'"""
+    if enabled():
+        CACHE.labels(cache_name, result).inc()
+
+
+def observe_pool_checkout(alias, outcome, seconds):
+    if enabled():
+        POOL_CHECKOUTS.labels(alias, outcome).inc()
+        POOL_WAIT.labels(alias).observe(seconds)
+
+
+def observe_pool_discard(alias, reason):
+    if enabled():
+        POOL_DISCARDS.labels(alias, reason).inc()
+
+
+def set_pool_connections(alias, idle, in_use):
+    if enabled():
+        POOL_CONNECTIONS.labels(alias, 'idle').set(idle)
+        POOL_CONNECTIONS.labels(alias, 'in_use').set(in_use)
+
+
+def set_process_memory(usage):
+    if enabled():
+        for kind, value in usage.items():
+            PROCESS_MEMORY.labels(kind).set(value)
+
+
+def observe_log_drop(logger_name):
+    if enabled():
+        LOG_DROPS.labels(logger_name).inc()
+
+
+def _client_allowed(request):
+    """From ``METRICS_ALLOWED_IPS``, or from anywhere with the bearer token"""
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1')):
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    # Bytes: compare_digest rejects str with non-ASCII characters
+    return bool(token) and scheme == 'Bearer' and hmac.compare_digest(supplied.strip().encode(), token.encode())
+
+
+def metrics_view(request):
+    """Scrape endpoint for allowlisted addresses and ``METRICS_TOKEN`` holders"""
+    if not _client_allowed(request):
+        return HttpResponseForbidden('Forbidden')
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client is not installed', status=503, content_type='text/plain')
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
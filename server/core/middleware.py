@@ -0,0 +1,99 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics as prometheus
+from .instrumentation import RequestMetrics, activate, deactivate
+
+logger = logging.getLogger('pharma.performance')
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestMetricsMiddleware:
+    """
+    Count and time every SQL query of a request, emit a ``Server-Timing``
+    header and log slow requests/queries as structured records.
+
+    Thresholds: ``REQUEST_METRICS_SLOW_REQUEST_MS`` and
+    ``REQUEST_METRICS_SLOW_QUERY_MS``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        self.slow_request = getattr(settings, 'REQUEST_METRICS_SLOW_REQUEST_MS', 500) / 1000
+        self.slow_query = getattr(settings, 'REQUEST_METRICS_SLOW_QUERY_MS', 100) / 1000
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        token = activate(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+
+        elapsed = metrics.elapsed
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(metrics, elapsed)
+        self.log_slow(request, response, metrics, elapsed)
+        prometheus.observe_request(request, response, metrics, elapsed)
+        return response
+
+    def server_timing_header(self, metrics, elapsed):
+        db = metrics.query_time
+        spans = dict(metrics.spans)
+        app = max(elapsed - db - sum(spans.values()), 0)
+        parts = [f'db;dur={_ms(db)};desc="{metrics.query_count} queries"']
+        parts += [f'{name};dur={_ms(duration)}' for name, duration in spans.items()]
+        parts += [f'app;dur={_ms(app)}', f'total;dur={_ms(elapsed)}']
+        return ', '.join(parts)
+
+    def log_slow(self, request, response, metrics, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else None
+
+        for query in metrics.queries:
+            if query.duration >= self.slow_query:
+                logger.warning(
+                    'Slow query %.1fms on %s %s',
+                    query.duration * 1000, request.method, request.path,
+                    extra={
+                        'event': 'slow_query',
+                        'duration_ms': _ms(query.duration),
+                        'db_alias': query.alias,
+                        'sql': query.normalized_sql,
+                        'method': request.method,
+                        'path': request.path,
+                        'route': route,
+                    },
+                )
+
+        if elapsed >= self.slow_request:
+            logger.warning(
+                'Slow request %.1fms %s %s (%d queries, %.1fms SQL)',
+                elapsed * 1000, request.method, request.path, metrics.query_count, metrics.query_time * 1000,
+                extra={
+                    'event': 'slow_request',
+                    'duration_ms': _ms(elapsed),
+                    'method': request.method,
+                    'path': request.path,
+                    'route': route,
+                    'status': response.status_code,
+                    'db_queries': metrics.query_count,
+                    'db_ms': _ms(metrics.query_time),
+                    'spans_ms': {name: _ms(duration) for name, duration in metrics.spans.items()},
+                },
+            )
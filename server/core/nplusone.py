@@ -0,0 +1,203 @@
+"""
+N+1 query detector for development and tests.
+
+Every query of a request is keyed by its normalized SQL and the innermost
+stack frame of this project that issued it, not counting middleware (or of
+library code such as DRF fields, when that is all there is). A key seen ``NPLUSONE_THRESHOLD``
+times or more is almost always a loop doing one query per row, e.g.::
+
+    for m in Medicine.objects.all():
+        m.stocks.aggregate(...)
+
+Findings are logged with the view, file:line and a ``select_related`` /
+``prefetch_related`` hint. With ``NPLUSONE_RAISE`` the request fails with
+``NPlusOneError`` instead, which is how the test suite enforces it.
+"""
+import logging
+import os
+import re
+import sys
+import sysconfig
+from collections import Counter
+from pathlib import Path
+
+import django.db
+from django.apps import apps
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('pharma.performance')
+
+PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+# The ORM runs queries on behalf of its callers; the detector's own listener
+# frames are on every stack.
+_SKIPPED_DIRS = (str(Path(django.db.__file__).resolve().parent) + os.sep,)
+_SKIPPED_FILES = {os.path.realpath(__file__), os.path.realpath(Path(__file__).with_name('instrumentation.py'))}
+_STDLIB_DIR = os.path.realpath(sysconfig.get_paths()['stdlib']) + os.sep
+
+_COLUMN_MATCH = re.compile(r'"(\w+)"\."(\w+)" (?:= \?|IN \(\.\.\.\))')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+_middleware_code = None
+_frame_labels = {}
+
+
+def _middleware():
+    """Code objects of the methods of the classes in ``settings.MIDDLEWARE``"""
+    global _middleware_code
+    if _middleware_code is None:
+        _middleware_code = {
+            value.__code__
+            for path in settings.MIDDLEWARE
+            for klass in import_string(path).__mro__
+            for value in vars(klass).values()
+            if hasattr(value, '__code__')
+        }
+    return _middleware_code
+
+
+def _frame_label(filename):
+    """
+    ``(path, is_project_code)`` for a frame that can be reported, else None
+    (cached). Library paths are relative to their site-packages directory.
+    """
+    try:
+        return _frame_labels[filename]
+    except KeyError:
+        pass
+    path = os.path.realpath(filename)
+    label = None
+    if path in _SKIPPED_FILES or path.startswith(_SKIPPED_DIRS):
+        pass
+    elif 'site-packages' in path:
+        label = (path.rpartition('site-packages' + os.sep)[2], False)
+    elif path.startswith(PROJECT_DIR):
+        label = (os.path.relpath(path, PROJECT_DIR), True)
+    elif not path.startswith(_STDLIB_DIR):
+        label = (path, False)
+    _frame_labels[filename] = label
+    return label
+
+
+def _call_site():
+    """
+    The innermost frame of this project's code that issued the query, or
+    of library code (e.g. a DRF ``source=`` traversal) if the view ran none.
+    The search stops at the first middleware: every query of the request
+    passes through it, and beyond it is the server (or a test calling the
+    test client).
+    """
+    frame = sys._getframe(1)
+    middleware = _middleware()
+    library = None
+    while frame is not None:
+        if frame.f_code in middleware:
+            break
+        label = _frame_label(frame.f_code.co_filename)
+        if label is not None:
+            site = f'{label[0]}:{frame.f_lineno}'
+            if label[1]:
+                return site
+            library = library or site
+        frame = frame.f_back
+    return library
+
+
+def _model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def suggest(sql):
+    """Best-effort hint for a repeated query shape"""
+    _, _, where = sql.partition(' WHERE ')
+    for table, column in _COLUMN_MATCH.findall(where):
+        model = _model_for_table(table)
+        hint = model and _suggest_for_column(model, column)
+        if hint:
+            return hint
+    return None
+
+
+def _suggest_for_column(model, column):
+    if column == model._meta.pk.column:
+        # One row fetched by pk per iteration: a forward FK being traversed.
+        relations = [
+            f"{other.__name__}.objects.select_related('{field.name}')"
+            for other in apps.get_models()
+            for field in other._meta.fields
+            if field.many_to_one and field.related_model is model
+        ]
+        if relations:
+            return f"load {model.__name__} through a join: {' or '.join(relations)}"
+        return f'fetch {model.__name__} rows in one query (filter(pk__in=...) / in_bulk)'
+
+    for field in model._meta.fields:
+        if field.many_to_one and field.column == column:
+            parent = field.related_model.__name__
+            accessor = field.remote_field.get_accessor_name()
+            return (
+                f"{parent}.objects.prefetch_related('{accessor}'), or annotate the "
+                f"aggregate on the {parent} queryset instead of querying per row"
+            )
+    return None
+
+
+class NPlusOneDetector:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+
+    def __call__(self, record):
+        """``RequestMetrics`` query listener"""
+        site = _call_site()
+        if site is None:
+            return
+        key = (record.normalized_sql, site)
+        self.counts[key] += 1
+
+    def findings(self):
+        return [
+            {'call_site': site, 'count': count, 'sql': sql, 'suggestion': suggest(sql)}
+            for (sql, site), count in self.counts.most_common()
+            if count >= self.threshold
+        ]
+
+
+class NPlusOneMiddleware:
+    """Must sit after RequestMetricsMiddleware; only installed when enabled"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return self.get_response(request)
+
+        # Read per request so tests can flip them with override_settings.
+        detector = NPlusOneDetector(getattr(settings, 'NPLUSONE_THRESHOLD', 3))
+        metrics.listeners.append(detector)
+        response = self.get_response(request)
+        findings = detector.findings()
+        if not findings:
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        view = match._func_path if match else request.path
+        messages = []
+        for finding in findings:
+            message = f"N+1 in {view} at {finding['call_site']}: {finding['count']}x {finding['sql']}"
+            if finding['suggestion']:
+                message += f" -> {finding['suggestion']}"
+            messages.append(message)
+            logger.warning(message, extra={'event': 'n_plus_one', 'view': view, 'path': request.path, **finding})
+        if getattr(settings, 'NPLUSONE_RAISE', False):
+            raise NPlusOneError('\n'.join(messages))
+        return response
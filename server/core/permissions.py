@@ -6,6 +6,20 @@ class IsAdmin(BasePermission):
         return bool(request.user and request.user.is_authenticated and request.user.role == 'ADMIN')
 
 
+def can_profile(user):
+    """ADMIN role or Django superuser: who may take and read request profiles"""
+    return bool(user and user.is_authenticated and (user.role == 'ADMIN' or user.is_superuser))
+
+
+class CanProfile(BasePermission):
+    """
+    Request profiles (core/profiling.py) are readable by the users the
+    profiler runs for: ADMIN role or superuser.
+    """
+    def has_permission(self, request, view):
+        return can_profile(request.user)
+
+
 class IsManagerOrAdmin(BasePermission):
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
@@ -0,0 +1,150 @@
+"""
+Opt-in, admin-only request profiling.
+
+Send ``X-Profile: 1`` (or ``?_profile=1``) as an admin and the request runs
+under cProfile. The stats dump plus a JSON sidecar (top functions and the SQL
+timeline from ``RequestMetricsMiddleware``) are written to ``PROFILER_DIR``,
+which keeps only the newest ``PROFILER_MAX_PROFILES`` entries. The profile id
+is returned in the ``X-Profile-Id`` response header; fetch it from
+``/api/profiles/``.
+"""
+import io
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .permissions import can_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_RE = re.compile(r'^[0-9T]+-[0-9a-f]{8}$')
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILER_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def _prune(directory, keep):
+    metas = sorted(directory.glob('*.json'))
+    for meta in metas[:max(len(metas) - keep, 0)]:
+        meta.with_suffix('.prof').unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+
+
+def save_profile(profiler, request, response, elapsed, user):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Sortable by creation time, which is what the ring buffer prunes on.
+    profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    stream = io.StringIO()
+    import pstats  # only needed once a profile is taken
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(40)
+
+    metrics = getattr(request, 'metrics', None)
+    timeline = []
+    if metrics is not None:
+        timeline = [{
+            'offset_ms': round((q.started - metrics.started) * 1000, 2),
+            'duration_ms': round(q.duration * 1000, 2),
+            'alias': q.alias,
+            'sql': q.sql,
+        } for q in metrics.queries]
+
+    meta = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'user': user.get_username(),
+        'duration_ms': round(elapsed * 1000, 2),
+        'query_count': len(timeline),
+        'query_time_ms': round(sum(q['duration_ms'] for q in timeline), 2),
+        'created': time.time(),
+        'top_functions': stream.getvalue(),
+        'sql_timeline': timeline,
+    }
+    # Write the sidecar last: its presence marks the profile as complete.
+    tmp = directory / f'{profile_id}.json.tmp'
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, directory / f'{profile_id}.json')
+
+    _prune(directory, getattr(settings, 'PROFILER_MAX_PROFILES', 50))
+    return profile_id
+
+
+def list_profiles():
+    profiles = []
+    for path in sorted(profile_dir().glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # pruned or half-written by another worker
+        meta.pop('top_functions', None)
+        meta.pop('sql_timeline', None)
+        profiles.append(meta)
+    return profiles
+
+
+def profile_path(profile_id, suffix):
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = profile_dir() / f'{profile_id}{suffix}'
+    return path if path.exists() else None
+
+
+class ProfilingMiddleware:
+    """Must sit after AuthenticationMiddleware (session users) and after
+    RequestMetricsMiddleware (SQL timeline)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILER_ENABLED', True)
+
+    def requested(self, request):
+        return request.headers.get('X-Profile') == '1' or request.GET.get('_profile') == '1'
+
+    def authenticate(self, request):
+        user = getattr(request, 'user', None)
+        if can_profile(user):
+            return user
+        # API clients authenticate with JWT inside the DRF view, i.e. later.
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        return result[0] if result else None
+
+    def __call__(self, request):
+        if not self.enabled or not self.requested(request):
+            return self.get_response(request)
+        user = self.authenticate(request)
+        if not can_profile(user):
+            return self.get_response(request)
+
+        # Loaded on the first profiled request, not at start-up
+        import cProfile
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        try:
+            response['X-Profile-Id'] = save_profile(profiler, request, response, elapsed, user)
+        except OSError:
+            logger.exception('Could not store request profile')
+        return response
@@ -0,0 +1,83 @@
+"""
+Streaming quantile estimation with bounded memory.
+
+``QuantileSketch`` is a log-bucketed sketch in the style of DDSketch: every
+value lands in bucket ``ceil(log(v) / log(gamma))``, so any quantile it
+returns is within ``alpha`` relative error of the true value. Latencies from
+1 microsecond to an hour fit in roughly a thousand buckets at 1% accuracy,
+however many values are added, and sketches merge exactly, which is what lets
+per-window results roll up into per-route totals.
+"""
+import math
+
+
+class QuantileSketch:
+    MIN_VALUE = 1e-9
+
+    def __init__(self, alpha=0.01, max_buckets=2048):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= self.MIN_VALUE:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest buckets together: accuracy is only lost at the
+        # fast end, which latency SLOs never look at.
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - self.max_buckets]
+        folded = sum(self.buckets.pop(k) for k in excess)
+        target = keys[len(excess)]
+        self.buckets[target] += folded
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q):
+        """Estimate of the ``q`` quantile (0..1); None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return max(self.min, 0.0)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
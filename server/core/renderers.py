@@ -0,0 +1,61 @@
+"""
+JSON renderer backed by orjson, falling back to DRF's stdlib renderer.
+
+orjson serializes dicts, lists, str, int, float, bool and None natively in C.
+Anything else is handed to DRF's own ``JSONEncoder.default`` so the output
+matches the stock ``JSONRenderer`` byte-for-byte: ``Decimal`` (orjson has no
+native support), ``date``, ``datetime`` and ``time`` (passed through together
+by ``OPT_PASSTHROUGH_DATETIME``, which can't be set per type), ``timedelta``,
+querysets, ... Serializers render most dates and decimals as strings already,
+so the fallback is mainly hit by hand-built report payloads.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+_drf_default = encoders.JSONEncoder().default
+
+if orjson is not None:
+    # date/datetime/time go through DRF's encoder so UTC renders as 'Z', not
+    # '+00:00'.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        # orjson only emits compact, UTF-8, NaN-free output; pretty-printing
+        # (browsable API, ?indent=) and non-default JSON settings use stdlib.
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same JavaScript-subset escaping as JSONRenderer.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.concurrency import gather_queries
+from core.models import User
+from core.tests.test_query_budgets import seed_dataset
+from reports import views as reports
+from stock import views as stock
+
+# Sync and async variants side by side, whatever ASYNC_VIEWS is set to
+PAIRS = {
+    'reports/summary/': (reports.summary, reports.summary_async),
+    'reports/sales-trends/?days=365': (reports.sales_trends, reports.sales_trends_async),
+    'reports/sales-trends/?days=365&granularity=week': (reports.sales_trends, reports.sales_trends_async),
+    'reports/stock-analysis/': (reports.stock_analysis, reports.stock_analysis_async),
+    'reports/inventory-turnover/': (reports.inventory_turnover, reports.inventory_turnover_async),
+    'stock/summary/': (stock.StockViewSet.as_view({'get': 'summary'}), stock.summary_async),
+}
+
+urlpatterns = []
+for route, (sync_view, async_view) in PAIRS.items():
+    route = route.split('?')[0]
+    urlpatterns += [path(f'sync/{route}', sync_view), path(f'async/{route}', async_view)]
+
+
+@override_settings(ROOT_URLCONF=__name__, SINGLE_FLIGHT_ENABLED=False)
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(medicines=20, batches_per_medicine=3, sales=200, suppliers=0)
+        cls.user = User.objects.create_user('async-staff', password='Async-Pass-1', role='STAFF')
+
+    def setUp(self):
+        self.auth = {'headers': {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}}
+
+    async def test_same_response_as_sync_views(self):
+        for route in PAIRS:
+            with self.subTest(route=route):
+                expected = await self.async_client.get(f'/sync/{route}', **self.auth)
+                response = await self.async_client.get(f'/async/{route}', **self.auth)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.content, expected.content)
+
+    async def test_unauthenticated(self):
+        response = await self.async_client.get('/async/reports/summary/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        self.assertIn(b'credentials were not provided', response.content)
+
+    async def test_invalid_token_and_method(self):
+        response = await self.async_client.get('/async/stock/summary/', headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post('/async/stock/summary/', **self.auth)
+        self.assertEqual(response.status_code, 405)
+
+
+class GatherQueriesTests(SimpleTestCase):
+    async def test_runs_concurrently(self):
+        threads = set()
+
+        def query():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+            return len(threads)
+
+        started = time.perf_counter()
+        with self.settings(QUERY_POOL_SIZE=3):
+            results = await gather_queries({'a': query, 'b': query, 'c': query})
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(set(results), {'a', 'b', 'c'})
+        self.assertEqual(len(threads), 3)
+
+    async def test_pool_disabled_runs_in_order(self):
+        order = []
+        with self.settings(QUERY_POOL_SIZE=0):
+            await gather_queries({name: (lambda name=name: order.append(name)) for name in 'abc'})
+        self.assertEqual(order, ['a', 'b', 'c'])
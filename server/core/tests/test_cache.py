@@ -0,0 +1,34 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache import asingle_flight, single_flight
+
+LOCK_KEY = 'single-flight:test-report:lock'
+
+
+def overrun():
+    """A computation that outlives its lock, which the next caller takes"""
+    cache.delete(LOCK_KEY)
+    cache.add(LOCK_KEY, 'next-caller')
+    return 42
+
+
+class SingleFlightLockTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_lock_released_after_compute(self):
+        self.assertEqual(single_flight('test-report', lambda: 42), 42)
+        self.assertIsNone(cache.get(LOCK_KEY))
+
+    def test_expired_holder_keeps_the_next_callers_lock(self):
+        self.assertEqual(single_flight('test-report', overrun), 42)
+        self.assertEqual(cache.get(LOCK_KEY), 'next-caller')
+
+    async def test_async_expired_holder_keeps_the_next_callers_lock(self):
+        async def compute():
+            return overrun()
+
+        self.assertEqual(await asingle_flight('test-report', compute), 42)
+        self.assertEqual(await cache.aget(LOCK_KEY), 'next-caller')
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from core.databases import (
+    REPLICA, ReplicaMiddleware, ReplicaRouter, apply_statement_timeout, replica_routing, write_transaction,
+)
+from medicines.models import Medicine
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_follow_request_state(self):
+        self.assertIsNone(self.router.db_for_read(Medicine))
+        with replica_routing(replica=False):
+            self.assertIsNone(self.router.db_for_read(Medicine))
+        with replica_routing() as state:
+            self.assertEqual(self.router.db_for_read(Medicine), REPLICA)
+            # Related lookups stay on the instance's database
+            medicine = Medicine(id=1)
+            medicine._state.db = 'default'
+            self.assertEqual(self.router.db_for_read(Medicine, instance=medicine), 'default')
+            # Read-your-writes within the request
+            self.assertEqual(self.router.db_for_write(Medicine), 'default')
+            self.assertTrue(state.wrote)
+            self.assertIsNone(self.router.db_for_read(Medicine))
+
+    def test_replica_is_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate(REPLICA, 'sales'))
+        self.assertIsNone(self.router.allow_migrate('default', 'sales'))
+
+
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+        self.seen = []
+
+    def request(self, method, path, write=False):
+        def view(request):
+            self.seen.append(self.router.db_for_read(Medicine))
+            if write:
+                self.router.db_for_write(Medicine)
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(lambda request: (
+            middleware.process_view(request, resolve(path).func, (), {}) or view(request)
+        ))
+        middleware.enabled = True
+        request = getattr(self.factory, method)(path, HTTP_AUTHORIZATION='Bearer client-a')
+        middleware(request)
+        return self.seen[-1]
+
+    def test_eligible_views(self):
+        self.assertEqual(self.request('get', '/api/reports/summary/'), REPLICA)
+        self.assertEqual(self.request('get', '/api/sales/'), REPLICA)
+        self.assertEqual(self.request('get', '/api/stock/expiry-calendar/'), REPLICA)
+        self.assertIsNone(self.request('get', '/api/auth/me/'))
+        self.assertIsNone(self.request('get', '/api/sales/1/'))
+        self.assertIsNone(self.request('post', '/api/sales/'))
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.request('post', '/api/sales/', write=True)
+        self.assertIsNone(self.request('get', '/api/reports/summary/'))
+        cache.clear()
+        self.assertEqual(self.request('get', '/api/reports/summary/'), REPLICA)
+
+
+class StatementTimeoutTests(TestCase):
+    SLOW = 'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000) SELECT count(*) FROM n'
+
+    def tearDown(self):
+        apply_statement_timeout(connection=connection)
+
+    def test_sqlite_statement_interrupted(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite progress-handler timeout')
+        with override_settings(DATABASE_STATEMENT_TIMEOUTS={'default': 50}):
+            apply_statement_timeout(connection=connection)
+        with self.assertRaises(OperationalError), connection.cursor() as cursor:
+            cursor.execute(self.SLOW)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+
+
+class PooledStatementTimeoutTests(SimpleTestCase):
+    @override_settings(DATABASE_STATEMENT_TIMEOUTS={'default': 15000})
+    def test_set_once_per_physical_connection(self):
+        pooled = ConnectionHandler({'default': {
+            'ENGINE': 'core.backends.postgresql_pool', 'NAME': 'pharma',
+            'OPTIONS': {'pool': {'max_size': 2}, 'options': '-c search_path=pharma'},
+        }})['default']
+        self.assertEqual(pooled.get_connection_params()['options'], '-c search_path=pharma -c statement_timeout=15000')
+        # Not again on each checkout
+        with mock.patch.object(pooled, 'cursor') as cursor:
+            apply_statement_timeout(connection=pooled)
+        cursor.assert_not_called()
+
+
+class TunedSQLiteTests(TransactionTestCase):
+    def setUp(self):
+        if not hasattr(connection, 'begin_immediate'):
+            self.skipTest('Tuned SQLite backend (SQLITE_TUNED)')
+
+    def test_pragmas_applied_on_connect(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], pragmas['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_write_transaction_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with write_transaction():
+                Medicine.objects.exists()
+                # Nested blocks are savepoints of the outer transaction
+                with write_transaction():
+                    Medicine.objects.exists()
+            with transaction.atomic():
+                Medicine.objects.exists()
+        begins = [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+        self.assertFalse(connection.begin_immediate)
@@ -0,0 +1,51 @@
+from django.db.models import F
+from django.test import TestCase
+
+from core import datagen
+from medicines.models import Medicine
+from sales.models import Sale
+from stock.models import Stock
+from suppliers.models import Supplier
+
+COUNTS = {'medicines': 12, 'batches_per_medicine': 3, 'suppliers': 4, 'sales': 500}
+
+
+class DatagenTests(TestCase):
+    def snapshot(self, **options):
+        """Rows generated for ``options``, ids relative to the first row of each model"""
+        for model in (Sale, Stock, Medicine, Supplier):
+            model.objects.all().delete()
+        counts = datagen.generate(**COUNTS, chunk_size=100, **options)
+        self.assertEqual(counts, {
+            'suppliers': 4, 'medicines': 12, 'stock': 36, 'sales': 500,
+        })
+        first = {
+            model: model.objects.order_by('id').values_list('id', flat=True).first()
+            for model in (Medicine, Stock)
+        }
+        return {
+            'suppliers': list(Supplier.objects.order_by('id').values_list(
+                'name', 'contact_person', 'phone', 'email', 'reliability_rating')),
+            'medicines': list(Medicine.objects.order_by('id').values_list(
+                'name', 'generic_name', 'manufacturer', 'dosage_form', 'barcode', 'unit_price', 'reorder_level')),
+            'stock': [
+                (medicine_id - first[Medicine], *rest)
+                for medicine_id, *rest in Stock.objects.order_by('id').values_list(
+                    'medicine_id', 'expiry_date', 'quantity', 'purchase_price')
+            ],
+            'sales': [
+                (medicine_id - first[Medicine], stock_id - first[Stock], *rest)
+                for medicine_id, stock_id, *rest in Sale.objects.order_by('id').values_list(
+                    'medicine_id', 'stock_id', 'quantity_sold', 'sale_date', 'sale_price')
+            ],
+        }
+
+    def test_same_seed_same_rows(self):
+        first = self.snapshot(seed=7)
+        self.assertEqual(self.snapshot(seed=7), first)
+        self.assertNotEqual(self.snapshot(seed=8)['sales'], first['sales'])
+
+    def test_sales_reference_their_medicines_batches(self):
+        datagen.generate(**COUNTS)
+        mismatched = Sale.objects.exclude(stock__medicine_id=F('medicine_id'))
+        self.assertFalse(mismatched.exists())
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.dbpool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    opened = 0
+
+    def __init__(self):
+        FakeConnection.opened += 1
+        self.closed = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+
+def check(connection):
+    if connection.broken:
+        raise OSError('server closed the connection')
+
+
+def reset(connection):
+    return not connection.closed
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def pool(self, **options):
+        FakeConnection.opened = 0
+        return ConnectionPool('test', check, reset, **{'timeout': 0.05, **options})
+
+    def test_reuses_returned_connections(self):
+        pool = self.pool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(FakeConnection), first)
+        second = pool.getconn(FakeConnection)
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.stats(), {'size': 2, 'idle': 0, 'in_use': 2})
+        self.assertEqual(FakeConnection.opened, 2)
+
+    def test_waits_then_times_out_at_max_size(self):
+        pool = self.pool(max_size=1, timeout=2)
+        held = pool.getconn(FakeConnection)
+        threading.Timer(0.05, pool.putconn, [held]).start()
+        self.assertIs(pool.getconn(FakeConnection), held)
+
+        pool.timeout = 0.05
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+        self.assertEqual(FakeConnection.opened, 1)
+
+    def test_broken_connections_are_replaced(self):
+        pool = self.pool(check_after=0)
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+        connection.broken = True
+        time.sleep(0.001)
+        replacement = pool.getconn(FakeConnection)
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+
+        # Unusable on return (reset fails) and discarded on request
+        replacement.closed = True
+        pool.putconn(replacement)
+        pool.putconn(pool.getconn(FakeConnection), discard=True)
+        self.assertEqual(pool.stats(), {'size': 0, 'idle': 0, 'in_use': 0})
+
+    def test_idle_connections_above_min_size_close(self):
+        pool = self.pool(min_size=1, max_size=3, max_idle=0)
+        pool.fill(FakeConnection)
+        self.assertEqual(pool.stats()['idle'], 1)
+        connections = [pool.getconn(FakeConnection) for _ in range(3)]
+        for connection in connections:
+            pool.putconn(connection)
+        self.assertEqual(pool.stats(), {'size': 1, 'idle': 1, 'in_use': 0})
+        self.assertEqual(sum(connection.closed for connection in connections), 2)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = self.pool(max_size=1)
+
+        def refuse():
+            raise OSError('connection refused')
+
+        with self.assertRaises(OSError):
+            pool.getconn(refuse)
+        self.assertIsNotNone(pool.getconn(FakeConnection))
@@ -0,0 +1,72 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from django.test import SimpleTestCase
+
+from core.importtime import SERVER_DIR
+
+
+class GunicornBootTests(SimpleTestCase):
+    """
+    Start-up against a multiproc directory that doesn't exist yet, as on a
+    fresh host: importing the app must not open metric files before
+    gunicorn.conf.py has created the directory.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.metrics_dir = os.path.join(self.directory, 'metrics')
+        self.env = dict(
+            os.environ, DB_ENGINE='sqlite', ENVIRONMENT='development',
+            SQLITE_PATH=os.path.join(self.directory, 'db.sqlite3'),
+            LOG_FILE=os.path.join(self.directory, 'app.log'),
+            PROMETHEUS_MULTIPROC_DIR=self.metrics_dir,
+        )
+        self.env.pop('PHARMA_METRICS_DIR_OWNER', None)
+
+    def test_app_imports_without_multiproc_dir(self):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import pharma_backend.wsgi'],
+            cwd=SERVER_DIR, env=self.env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+
+    def test_gunicorn_boots_and_serves(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+             '--workers', '2', '--env', 'ENVIRONMENT=development',
+             '--pid', os.path.join(self.directory, 'gunicorn.pid')],
+            cwd=SERVER_DIR, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        try:
+            body = self.get_when_up(server, f'http://127.0.0.1:{port}/livez')
+        finally:
+            server.terminate()
+            _, stderr = server.communicate(timeout=30)
+        self.assertIsNotNone(body, stderr[-2000:])
+        self.assertIn(b'"ok"', body)
+        # The workers wrote their metrics to the directory the config created
+        self.assertTrue(any(name.endswith('.db') for name in os.listdir(self.metrics_dir)))
+        # Warm-up steps against the unmigrated database only log warnings
+        self.assertNotIn('Exception in worker process', stderr)
+        self.assertNotIn('FileNotFoundError', stderr)
+
+    def get_when_up(self, server, url, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    return response.read()
+            except OSError:
+                time.sleep(0.2)
+        return None
@@ -0,0 +1,50 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from core.health import readiness
+
+
+class HealthProbeTests(TestCase):
+    def setUp(self):
+        readiness.result = None
+        readiness.migrated = False
+
+    def test_livez_touches_nothing(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/livez')
+        self.assertEqual(response.status_code, 200)
+
+    def test_readyz_reports_checks(self):
+        self.assertTrue(readiness.refresh())
+        with self.assertNumQueries(0):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual({name: c['status'] for name, c in checks.items()},
+                         {'database': 'ok', 'cache': 'ok', 'migrations': 'ok'})
+
+    def test_failing_database_is_not_ready(self):
+        with mock.patch('core.health.check_database', side_effect=RuntimeError('down')):
+            readiness.refresh()
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['database']['error'], 'down')
+
+    def test_refreshes_do_not_pile_up(self):
+        with readiness.lock:
+            self.assertFalse(readiness.refresh())
+            with mock.patch.object(readiness, 'refresh_in_background') as background:
+                readiness.result = {'status': 'ok', 'checks': {}, 'checked_at': 0, 'timestamp': ''}
+                readiness.snapshot()
+            background.assert_not_called()
+
+    @override_settings(HEALTH_READINESS_MAX_AGE=30)
+    def test_stale_result_is_not_ready(self):
+        readiness.refresh()
+        readiness.result['checked_at'] = time.monotonic() - 60
+        with mock.patch.object(readiness, 'refresh_in_background'):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('stale', response.json()['error'])
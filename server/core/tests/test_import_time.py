@@ -0,0 +1,28 @@
+import os
+
+from django.test import SimpleTestCase
+
+from core import importtime
+
+# Cold start of pharma_backend.wsgi (Django set up, apps and admin loaded),
+# fastest of three. About 450 ms on a single slow core; raise it with
+# IMPORT_TIME_BUDGET_MS on slower CI machines rather than here.
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', '800'))
+
+
+class ImportTimeBudgetTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.runs = [importtime.profile('wsgi') for _ in range(3)]
+
+    def test_wsgi_import_within_budget(self):
+        fastest = min(run['total'] for run in self.runs) / 1000
+        self.assertLessEqual(
+            fastest, IMPORT_TIME_BUDGET_MS,
+            f'Importing pharma_backend.wsgi took {fastest:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms); '
+            'see manage.py import_profile',
+        )
+
+    def test_no_heavy_optional_modules_at_startup(self):
+        self.assertEqual(importtime.heavy_imports(self.runs[0]), [])
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import User
+from core.tests.test_query_budgets import seed_dataset
+from medicines.models import Medicine
+from stock.models import Stock
+from stock.statistics import SECTIONS, InventoryStatistics
+
+
+def expected_statistics(today):
+    """The buckets computed row by row in Python"""
+    batches = list(Stock.objects.all())
+    current = [b for b in batches if b.expiry_date >= today]
+
+    def expiring(days):
+        rows = [b for b in current if b.expiry_date <= today + timedelta(days=days) and b.quantity > 0]
+        return {'quantity': sum(b.quantity for b in rows), 'value': sum(b.quantity * b.purchase_price for b in rows)}
+
+    low = 0
+    for medicine in Medicine.objects.exclude(reorder_level=0):
+        quantities = [b.quantity for b in current if b.medicine_id == medicine.id]
+        if not quantities or sum(quantities) < medicine.reorder_level:
+            low += 1
+    return {
+        'total_stock_value': sum(b.quantity * b.purchase_price for b in current),
+        'expiring_count': sum(1 for b in current if b.expiry_date <= today + timedelta(days=30) and b.quantity > 0),
+        'expired_count': sum(1 for b in batches if b.expiry_date < today and b.quantity > 0),
+        'expiring_30_days': expiring(30),
+        'expiring_90_days': expiring(90),
+        'total_medicines': Medicine.objects.count(),
+        'low_stock_count': low,
+    }
+
+
+@override_settings(SINGLE_FLIGHT_ENABLED=False)
+class InventoryStatisticsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(medicines=40, batches_per_medicine=4, sales=0, suppliers=0)
+        Medicine.objects.create(name='No stock', unit_price=Decimal('1.00'), reorder_level=10)
+        cls.user = User.objects.create_user('stats-staff', password='Stats-Pass-1', role='STAFF')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_buckets_match_row_by_row(self):
+        today = timezone.now().date()
+        expected = expected_statistics(today)
+        # Medicine-level buckets group by medicine, the others scan stock_stock only.
+        for sections in (SECTIONS, ('expiring_count', 'expiring_90_days'), ('expired_count', 'total_stock_value')):
+            statistics = InventoryStatistics(sections, today=today).compute()
+            for name in sections:
+                if name == 'top_medicines_by_value':
+                    continue
+                with self.subTest(sections=sections, name=name):
+                    value = statistics[name]
+                    if isinstance(value, dict):
+                        self.assertEqual(value['quantity'], expected[name]['quantity'])
+                        self.assertAlmostEqual(value['value'], expected[name]['value'], places=2)
+                    else:
+                        self.assertAlmostEqual(value, expected[name], places=2)
+
+    def test_include(self):
+        response = self.client.get('/api/stock/summary/?include=expired_count,total_medicines')
+        self.assertEqual(list(response.data), ['total_medicines', 'expired_count'])
+
+        response = self.client.get('/api/reports/stock-analysis/?include=top_medicines_by_value')
+        self.assertEqual(list(response.data), ['top_medicines_by_value'])
+        self.assertEqual(len(response.data['top_medicines_by_value']), 10)
+
+        response = self.client.get('/api/reports/stock-analysis/?include=expired_count')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expired_count', response.data['include'])
+
+    def test_expiry_calendar_matches_row_by_row(self):
+        today = timezone.now().date()
+        batches = [
+            b for b in Stock.objects.select_related('medicine')
+            if today <= b.expiry_date <= today + timedelta(days=365) and b.quantity > 0
+        ]
+        for interval, start_of in (
+            ('month', lambda d: d.replace(day=1)),
+            ('week', lambda d: d - timedelta(days=d.weekday())),
+        ):
+            with self.subTest(interval=interval):
+                response = self.client.get(f'/api/stock/expiry-calendar/?interval={interval}&group_by=dosage_form')
+                self.assertEqual(response.status_code, 200)
+                expected = {}
+                for b in batches:
+                    key = (start_of(b.expiry_date).isoformat(), b.medicine.dosage_form)
+                    quantity, value, count = expected.get(key, (0, 0, 0))
+                    expected[key] = (quantity + b.quantity, value + b.quantity * b.purchase_price, count + 1)
+                rows = response.data['rows']
+                self.assertEqual(len(rows), len(expected))
+                for row in rows:
+                    quantity, value, count = expected[(str(row['bucket']), row['dosage_form'])]
+                    self.assertEqual((row['total_quantity'], row['batch_count']), (quantity, count))
+                    self.assertAlmostEqual(row['total_value'], value, places=2)
+                    self.assertIn(row['bucket'], response.data['buckets'])
+
+    def test_expiry_calendar_validation(self):
+        for query in ('interval=day', 'group_by=supplier', 'horizon=0', 'horizon=x', 'dosage_form=LOTION'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/stock/expiry-calendar/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [query.split('=')[0]])
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from core.logqueue import QueueHandler, SharedRotatingFileHandler
+
+
+class BlockingSink(logging.Handler):
+    """Collects records; blocks while ``gate`` is cleared"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.entered.set()
+        self.gate.wait(5)
+        self.records.append(record)
+
+
+class QueueHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('pharma.tests.logqueue')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'app.log')
+
+    def attach(self, handler):
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_json_lines_written_in_background(self):
+        handler = self.attach(QueueHandler(filename=self.path))
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception('Sale %s failed', 42, extra={'route': 'sales-list'})
+        handler.close()
+
+        with open(self.path) as f:
+            entry = json.loads(f.read())
+        self.assertEqual(entry['message'], 'Sale 42 failed')
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['route'], 'sales-list')
+        self.assertIn('ZeroDivisionError', entry['exc_info'])
+        self.assertEqual(entry['thread'], threading.get_ident())
+
+    def test_full_queue_drops_and_reports(self):
+        sink = BlockingSink()
+        handler = self.attach(QueueHandler(handlers=[sink], queue_size=2))
+        sink.gate.clear()
+        self.logger.info('record 0')
+        self.assertTrue(sink.entered.wait(5))
+        # The listener is stuck writing record 0: two fit in the queue
+        for number in range(1, 10):
+            self.logger.info('record %d', number)
+        self.assertEqual(handler.dropped, 7)
+        sink.gate.set()
+        handler.close()
+
+        self.assertEqual([record.getMessage() for record in sink.records], [
+            'record 0', 'Logging queue full: dropped 7 record(s)', 'record 1', 'record 2',
+        ])
+
+    def test_size_based_rotation(self):
+        handler = self.attach(QueueHandler(filename=self.path, max_bytes=2000, backup_count=2))
+        for number in range(100):
+            self.logger.info('record %d %s', number, 'x' * 50)
+        handler.close()
+
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertTrue(os.path.exists(self.path + '.2'))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        self.assertLessEqual(os.path.getsize(self.path), 2000)
+
+    def test_follows_file_rotated_by_another_process(self):
+        sink = SharedRotatingFileHandler(self.path, maxBytes=10000, backupCount=1)
+        self.addCleanup(sink.close)
+        sink.emit(logging.makeLogRecord({'msg': 'before'}))
+        os.rename(self.path, self.path + '.1')
+        sink.emit(logging.makeLogRecord({'msg': 'after'}))
+
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'after\n')
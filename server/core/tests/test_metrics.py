@@ -0,0 +1,26 @@
+from django.test import TestCase, override_settings
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'], METRICS_TOKEN='scrape-secret')
+class MetricsAccessTests(TestCase):
+    def scrape(self, address, authorization=None):
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization is not None else {}
+        return self.client.get('/metrics', REMOTE_ADDR=address, **headers).status_code
+
+    def test_allowlisted_address_without_token(self):
+        self.assertEqual(self.scrape('127.0.0.1'), 200)
+
+    def test_foreign_address_without_token(self):
+        self.assertEqual(self.scrape('203.0.113.7'), 403)
+
+    def test_token_from_anywhere(self):
+        self.assertEqual(self.scrape('203.0.113.7', 'Bearer scrape-secret'), 200)
+
+    def test_invalid_tokens(self):
+        for authorization in ('Bearer wrong', 'scrape-secret', 'Basic scrape-secret', 'Bearer scrape-secrét'):
+            with self.subTest(authorization=authorization):
+                self.assertEqual(self.scrape('203.0.113.7', authorization), 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_configured(self):
+        self.assertEqual(self.scrape('203.0.113.7', 'Bearer '), 403)
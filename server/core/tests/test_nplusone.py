@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from rest_framework import generics, serializers
+
+from core.nplusone import NPlusOneError
+from medicines.models import Medicine
+from stock.models import Stock
+
+
+def batch_counts(request):
+    counts = {}
+    for medicine in Medicine.objects.order_by('id'):
+        counts[medicine.name] = medicine.stocks.count()  # query per row
+    return JsonResponse(counts)
+
+
+class BatchSerializer(serializers.ModelSerializer):
+    medicine_name = serializers.CharField(source='medicine.name')
+
+    class Meta:
+        model = Stock
+        fields = ['id', 'medicine_name']
+
+
+# No code of this project runs inside the view
+batch_names = generics.ListAPIView.as_view(
+    queryset=Stock.objects.order_by('id'), serializer_class=BatchSerializer,
+    authentication_classes=[], permission_classes=[], pagination_class=None,
+)
+
+urlpatterns = [path('batch-counts/', batch_counts), path('batch-names/', batch_names)]
+
+with open(__file__) as source:
+    LOOP_LINE = next(number for number, line in enumerate(source, 1) if line.rstrip().endswith('# query per row'))
+
+
+@override_settings(ROOT_URLCONF=__name__, NPLUSONE_THRESHOLD=3, NPLUSONE_RAISE=False)
+class NPlusOneDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        expiry = timezone.localdate() + timedelta(days=90)
+        for number in range(3):
+            medicine = Medicine.objects.create(name=f'Medicine {number}', unit_price=Decimal('1.00'))
+            Stock.objects.create(medicine=medicine, batch_number=f'B{number}', expiry_date=expiry,
+                                 quantity=10, purchase_price=Decimal('0.50'))
+
+    def finding(self, url):
+        with self.assertLogs('pharma.performance', 'WARNING') as logs:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        findings = [record for record in logs.records if getattr(record, 'event', None) == 'n_plus_one']
+        self.assertEqual(len(findings), 1)
+        return findings[0]
+
+    def test_loop_flagged_at_its_line(self):
+        finding = self.finding('/batch-counts/')
+        self.assertEqual(finding.call_site, f'core/tests/test_nplusone.py:{LOOP_LINE}')
+        self.assertEqual(finding.count, 3)
+        self.assertIn("Medicine.objects.prefetch_related('stocks')", finding.suggestion)
+
+    def test_library_code_not_attributed_to_middleware(self):
+        # The per-row query runs in DRF's source= traversal, below no view code
+        finding = self.finding('/batch-names/')
+        self.assertTrue(finding.call_site.startswith('rest_framework/'), finding.call_site)
+        self.assertIn("Stock.objects.select_related('medicine')", finding.suggestion)
+
+    @override_settings(NPLUSONE_RAISE=True)
+    def test_raise(self):
+        with self.assertRaisesMessage(NPlusOneError, f'core/tests/test_nplusone.py:{LOOP_LINE}: 3x'):
+            self.client.get('/batch-counts/')
+
+    @override_settings(NPLUSONE_THRESHOLD=4, NPLUSONE_RAISE=True)
+    def test_below_threshold_passes(self):
+        with self.assertNoLogs('pharma.performance', 'WARNING'):
+            response = self.client.get('/batch-counts/')
+        self.assertEqual(response.status_code, 200)
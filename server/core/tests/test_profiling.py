@@ -0,0 +1,38 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import User
+
+
+class ProfilingAccessTests(TestCase):
+    """Whoever can take a profile can read it back, and nobody else"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILER_DIR=directory.name, PROFILER_ENABLED=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_superuser_without_admin_role(self):
+        user = User.objects.create_superuser('profiling-root', password='Profile-Pass-1', role='STAFF')
+        response = self.client.get('/api/profiles/', HTTP_X_PROFILE='1', **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+
+        response = self.client.get('/api/profiles/', **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([profile['id'] for profile in response.json()], [profile_id])
+        response = self.client.get(f'/api/profiles/{profile_id}/download/', **self.auth(user))
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_cannot_profile_or_read(self):
+        user = User.objects.create_user('profiling-staff', password='Profile-Pass-1', role='STAFF')
+        response = self.client.get('/api/profiles/', HTTP_X_PROFILE='1', **self.auth(user))
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('X-Profile-Id', response)
@@ -0,0 +1,205 @@
+"""
+Query-count budgets for every API route.
+
+Each route is asserted to run a fixed number of SQL queries, and the same
+budgets are checked against a small and a large dataset: a query that scales
+with the number of rows (an N+1) breaks the large run even when the small one
+happens to pass. ``NPLUSONE_RAISE`` is on under ``manage.py test`` as well, so
+repeated per-row queries also fail with the offending call site.
+
+When a change legitimately adds a query, bump the budget here in the same
+commit so the cost is visible in review.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import User
+from medicines.models import Medicine
+from sales.models import Sale
+from stock.models import Stock
+from suppliers.models import Supplier
+
+PASSWORD = 'Budget-Test-Pass-42'
+
+
+def seed_dataset(medicines, batches_per_medicine, sales, suppliers, seed=34):
+    """Inventory with expired, expiring, low and healthy batches plus a year of sales"""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    forms = [choice for choice, _ in Medicine.DosageForm.choices]
+
+    Medicine.objects.bulk_create(
+        Medicine(
+            name=f'Medicine {i:04d}',
+            generic_name=f'Generic {i % 17}',
+            manufacturer=f'Manufacturer {i % 5}',
+            dosage_form=forms[i % len(forms)],
+            unit_price=Decimal(rng.randint(50, 5000)) / 100,
+            reorder_level=rng.choice([0, 10, 25, 50]),
+        )
+        for i in range(medicines)
+    )
+    medicine_list = list(Medicine.objects.order_by('id'))
+
+    batches = []
+    for medicine in medicine_list:
+        for b in range(batches_per_medicine):
+            # Spread over expired, within 30 days, within 90 days and later
+            expiry = today + timedelta(days=rng.choice([-40, -1, 7, 25, 60, 200, 400]))
+            batches.append(Stock(
+                medicine=medicine,
+                batch_number=f'B-{medicine.id}-{b}',
+                expiry_date=expiry,
+                quantity=rng.choice([0, 5, 20, 80, 150]),
+                purchase_price=(medicine.unit_price * Decimal('0.8')).quantize(Decimal('0.01')),
+            ))
+    Stock.objects.bulk_create(batches)
+    stock_list = list(Stock.objects.order_by('id'))
+
+    sale_rows = []
+    for _ in range(sales):
+        stock = rng.choice(stock_list)
+        sale_rows.append(Sale(
+            medicine_id=stock.medicine_id,
+            stock=stock,
+            quantity_sold=rng.randint(1, 5),
+            sale_date=today - timedelta(days=rng.randint(0, 365)),
+            sale_price=Decimal(rng.randint(50, 5000)) / 100,
+        ))
+    Sale.objects.bulk_create(sale_rows)
+
+    Supplier.objects.bulk_create(
+        Supplier(name=f'Supplier {i}', email=f'supplier{i}@example.com', reliability_rating=Decimal('4.50'))
+        for i in range(suppliers)
+    )
+
+    for role in User.Role.values:
+        User.objects.create_user(
+            username=f'user-{role.lower()}', email=f'{role.lower()}.user@example.com', password=PASSWORD, role=role,
+        )
+
+
+class QueryBudgetTests:
+    """Mixed into one ``APITestCase`` per dataset size; caching is off so
+    every request hits the database"""
+
+    dataset = None
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(**cls.dataset)
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=PASSWORD,
+            role=User.Role.ADMIN, is_staff=True,
+        )
+        cls.medicine = Medicine.objects.order_by('id').first()
+        cls.stock = Stock.objects.filter(
+            quantity__gte=50, expiry_date__gt=timezone.localdate(),
+        ).order_by('id').first()
+        cls.sale = Sale.objects.order_by('id').first()
+        cls.supplier = Supplier.objects.order_by('id').first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def assertBudget(self, budget, method, path, data=None, status=200):
+        with self.assertNumQueries(budget):
+            response = getattr(self.client, method)(path, data, format='json')
+        self.assertEqual(response.status_code, status, response.content)
+        return response
+
+    def test_medicines(self):
+        self.assertBudget(2, 'get', '/api/medicines/')
+        self.assertBudget(2, 'get', '/api/medicines/?fields=id,name,unit_price')
+        self.assertBudget(2, 'get', '/api/medicines/?search=Medicine')
+        self.assertBudget(1, 'get', f'/api/medicines/{self.medicine.id}/')
+        self.assertBudget(2, 'patch', f'/api/medicines/{self.medicine.id}/', {'reorder_level': 30})
+        created = self.assertBudget(4, 'post', '/api/medicines/', {
+            'name': 'New Medicine', 'unit_price': '12.50', 'reorder_level': 10,
+        }, status=201)
+        # Sales and archived sales protect a medicine and its batches; the new
+        # one has none, and its opening batch is deleted with it
+        self.assertBudget(8, 'delete', f"/api/medicines/{created.json()['id']}/", status=204)
+
+    def test_stock(self):
+        self.assertBudget(2, 'get', '/api/stock/')
+        self.assertBudget(2, 'get', '/api/stock/?expand=medicine')
+        self.assertBudget(1, 'get', f'/api/stock/{self.stock.id}/')
+        self.assertBudget(1, 'get', '/api/stock/low_stock_alerts/')
+        self.assertBudget(1, 'get', '/api/stock/expiring_soon/')
+        self.assertBudget(1, 'get', '/api/stock/expired/')
+        self.assertBudget(1, 'get', '/api/stock/expiry-calendar/?group_by=medicine')
+        self.assertBudget(1, 'get', '/api/stock/summary/')
+        self.assertBudget(1, 'get', '/api/stock/summary/?include=expired_count')
+        created = self.assertBudget(2, 'post', '/api/stock/', {
+            'medicine': self.medicine.id, 'batch_number': 'NEW-1',
+            'expiry_date': str(timezone.localdate() + timedelta(days=100)),
+            'quantity': 10, 'purchase_price': '3.00',
+        }, status=201)
+        self.assertBudget(2, 'patch', f'/api/stock/{self.stock.id}/', {'quantity': 60})
+        # Batches with (archived) sales are protected from deletion
+        self.assertBudget(4, 'delete', f"/api/stock/{created.json()['id']}/", status=204)
+
+    def test_sales(self):
+        self.assertBudget(2, 'get', '/api/sales/')
+        self.assertBudget(2, 'get', '/api/sales/?ordering=-sale_date&expand=medicine')
+        self.assertBudget(1, 'get', f'/api/sales/{self.sale.id}/')
+        self.assertBudget(6, 'post', '/api/sales/', {
+            'medicine': self.stock.medicine_id, 'quantity_sold': 1, 'sale_price': '9.99',
+        }, status=201)
+        self.assertBudget(6, 'post', '/api/sales/', {
+            'medicine': self.stock.medicine_id, 'stock': self.stock.id, 'quantity_sold': 1, 'sale_price': '9.99',
+        }, status=201)
+        self.assertBudget(2, 'patch', f'/api/sales/{self.sale.id}/', {'sale_price': '8.50'})
+        self.assertBudget(2, 'delete', f'/api/sales/{self.sale.id}/', status=204)
+
+    def test_suppliers(self):
+        self.assertBudget(2, 'get', '/api/suppliers/')
+        self.assertBudget(1, 'get', f'/api/suppliers/{self.supplier.id}/')
+        self.assertBudget(1, 'post', '/api/suppliers/', {'name': 'New Supplier'}, status=201)
+        self.assertBudget(2, 'patch', f'/api/suppliers/{self.supplier.id}/', {'phone': '555-0100'})
+        self.assertBudget(2, 'delete', f'/api/suppliers/{self.supplier.id}/', status=204)
+
+    def test_reports(self):
+        self.assertBudget(6, 'get', '/api/reports/summary/')
+        self.assertBudget(2, 'get', '/api/reports/sales-trends/')
+        self.assertBudget(2, 'get', '/api/reports/sales-trends/?days=365')
+        self.assertBudget(1, 'get', '/api/reports/sales-trends/?days=3650&granularity=auto&layout=columnar')
+        self.assertBudget(2, 'get', '/api/reports/stock-analysis/')
+        self.assertBudget(1, 'get', '/api/reports/stock-analysis/?include=expiring_30_days')
+        self.assertBudget(2, 'get', '/api/reports/inventory-turnover/')
+
+    def test_auth(self):
+        self.assertBudget(0, 'get', '/api/auth/me/')
+        self.assertBudget(1, 'get', '/api/auth/users/count/')
+        self.assertBudget(2, 'post', '/api/auth/admin/create-user/', {
+            'username': 'new-staff', 'email': 'new@example.com', 'password': PASSWORD, 'role': 'STAFF',
+        }, status=201)
+
+        self.client.force_authenticate(None)
+        self.assertBudget(2, 'post', '/api/auth/login/', {'username': 'admin', 'password': PASSWORD})
+        self.assertBudget(3, 'post', '/api/auth/login/', {'username': 'admin@example.com', 'password': PASSWORD})
+        self.assertBudget(0, 'post', '/api/auth/refresh/', {'refresh': str(RefreshToken.for_user(self.admin))})
+
+        self.client.force_authenticate(self.admin)
+        self.assertBudget(1, 'post', '/api/auth/change-password/', {
+            'current_password': PASSWORD, 'new_password': 'Another-Strong-Pass-7',
+        })
+
+
+@override_settings(SINGLE_FLIGHT_ENABLED=False)
+class SmallDatasetQueryBudgetTests(QueryBudgetTests, APITestCase):
+    dataset = {'medicines': 5, 'batches_per_medicine': 3, 'sales': 20, 'suppliers': 3}
+
+
+@override_settings(SINGLE_FLIGHT_ENABLED=False)
+class LargeDatasetQueryBudgetTests(QueryBudgetTests, APITestCase):
+    dataset = {'medicines': 120, 'batches_per_medicine': 4, 'sales': 1500, 'suppliers': 60}
@@ -0,0 +1,30 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def render(self, data):
+        fast = FastJSONRenderer().render(data, 'application/json')
+        self.assertEqual(fast, JSONRenderer().render(data, 'application/json'))
+        return fast
+
+    def test_dates_and_decimals_match_drf(self):
+        data = {
+            'date': date(2024, 3, 1),
+            'utc': datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+            'naive': datetime(2024, 3, 1, 9, 30),
+            'time': time(9, 30),
+            'price': Decimal('12.50'),
+        }
+        self.assertEqual(self.render(data), (
+            b'{"date":"2024-03-01","utc":"2024-03-01T09:30:15.123456Z","naive":"2024-03-01T09:30:00",'
+            b'"time":"09:30:00","price":12.5}'
+        ))
+
+    def test_line_separators_escaped(self):
+        self.assertEqual(self.render({'name': 'a\u2028b'}), b'{"name":"a\\u2028b"}')
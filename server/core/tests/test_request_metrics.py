@@ -0,0 +1,84 @@
+from django.db import connection
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+
+from core.instrumentation import normalize_sql
+from medicines.models import Medicine
+from stock.models import Stock
+from suppliers.models import Supplier
+
+
+def inventory_counts(request):
+    return JsonResponse({
+        'medicines': Medicine.objects.filter(name__startswith='A').count(),
+        'stock': Stock.objects.count(),
+        'suppliers': Supplier.objects.count(),
+    })
+
+
+urlpatterns = [path('inventory-counts/', inventory_counts, name='inventory-counts')]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class RequestMetricsMiddlewareTests(TestCase):
+    def test_server_timing_counts_the_queries_run(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/inventory-counts/')
+        self.assertEqual(len(queries), 3)
+        header = response['Server-Timing']
+        self.assertRegex(header, r'^db;dur=[\d.]+;desc="3 queries"')
+        self.assertRegex(header, r'app;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get('/inventory-counts/'))
+
+    @override_settings(REQUEST_METRICS_SLOW_REQUEST_MS=0, REQUEST_METRICS_SLOW_QUERY_MS=0)
+    def test_slow_records_over_threshold(self):
+        with self.assertLogs('pharma.performance', 'WARNING') as logs:
+            self.client.get('/inventory-counts/')
+        records = {}
+        for record in logs.records:
+            records.setdefault(record.event, []).append(record)
+
+        self.assertEqual(len(records['slow_query']), 3)
+        query = records['slow_query'][0]
+        self.assertEqual(query.route, 'inventory-counts')
+        self.assertEqual(query.db_alias, 'default')
+        self.assertTrue(query.sql.startswith('SELECT COUNT(*)'), query.sql)
+        self.assertNotIn('%s', query.sql)
+
+        [request] = records['slow_request']
+        self.assertEqual((request.method, request.path, request.status), ('GET', '/inventory-counts/', 200))
+        self.assertEqual(request.db_queries, 3)
+        self.assertGreaterEqual(request.duration_ms, request.db_ms)
+
+    @override_settings(REQUEST_METRICS_SLOW_REQUEST_MS=60_000, REQUEST_METRICS_SLOW_QUERY_MS=60_000)
+    def test_nothing_logged_under_threshold(self):
+        with self.assertNoLogs('pharma.performance', 'WARNING'):
+            self.client.get('/inventory-counts/')
+
+
+class NormalizeSqlTests(SimpleTestCase):
+    def test_literals(self):
+        shapes = {
+            normalize_sql("SELECT * FROM stock WHERE quantity > 10 AND batch_number = 'B-1'"),
+            normalize_sql("SELECT  *\n FROM stock WHERE quantity > 2.5 AND batch_number = 'O''Brien'"),
+            normalize_sql('SELECT * FROM stock WHERE quantity > %s AND batch_number = %s'),
+        }
+        self.assertEqual(shapes, {'SELECT * FROM stock WHERE quantity > ? AND batch_number = ?'})
+
+    def test_in_lists(self):
+        shapes = {
+            normalize_sql('SELECT * FROM stock WHERE medicine_id IN (1, 2, 3)'),
+            normalize_sql('SELECT * FROM stock WHERE medicine_id IN (%s, %s)'),
+            normalize_sql('SELECT * FROM stock WHERE medicine_id IN (?,?,?,?,?)'),
+            normalize_sql("SELECT * FROM stock WHERE medicine_id IN ('a', 'b')"),
+        }
+        self.assertEqual(shapes, {'SELECT * FROM stock WHERE medicine_id IN (...)'})
+
+    def test_identifiers_with_digits_kept(self):
+        self.assertEqual(normalize_sql('SELECT t1.id FROM sales_sale_2024_01 t1'),
+                         'SELECT t1.id FROM sales_sale_2024_01 t1')
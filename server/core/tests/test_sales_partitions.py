@@ -0,0 +1,155 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from medicines.models import Medicine
+from sales import partitions
+from sales.models import ArchivedSale, Sale
+from stock.models import Stock
+
+postgresql_only = skipUnless(connection.vendor == 'postgresql', 'sales are partitioned on PostgreSQL only')
+
+
+class MonthTests(SimpleTestCase):
+    def test_add_months(self):
+        self.assertEqual(partitions.add_months(date(2024, 11, 1), 3), date(2025, 2, 1))
+        self.assertEqual(partitions.add_months(date(2024, 1, 1), -1), date(2023, 12, 1))
+        self.assertEqual(partitions.partition_name(date(2024, 3, 1)), 'sales_sale_p2024_03')
+
+
+class ArchiveTests(TestCase):
+    """The row-moving archive used where sales_sale is not partitioned"""
+
+    @classmethod
+    def setUpTestData(cls):
+        medicine = Medicine.objects.create(name='Archived', unit_price=Decimal('2.00'))
+        today = timezone.localdate()
+        Sale.objects.bulk_create(
+            Sale(medicine=medicine, quantity_sold=1, sale_price=Decimal('2.00'), sale_date=today - timedelta(days=days))
+            for days in range(0, 400, 5)
+        )
+
+    def test_archive_moves_old_months(self):
+        cutoff = partitions.archive_cutoff(6)
+        old = set(Sale.objects.filter(sale_date__lt=cutoff).values_list('id', 'sale_date'))
+        total = Sale.objects.count()
+
+        out = StringIO()
+        call_command('sales_partitions', archive_after=6, stdout=out)
+        self.assertIn(f'before {cutoff.isoformat()}', out.getvalue())
+        self.assertEqual(set(ArchivedSale.objects.values_list('id', 'sale_date')), old)
+        self.assertFalse(Sale.objects.filter(sale_date__lt=cutoff).exists())
+        self.assertEqual(Sale.objects.count() + ArchivedSale.objects.count(), total)
+
+        # Nothing left to move; the default keeps everything hot
+        self.assertEqual(partitions.archive_before(cutoff), {})
+        call_command('sales_partitions', stdout=StringIO())
+        self.assertEqual(Sale.objects.count(), total - len(old))
+
+
+def sale_on(medicine, sale_date, **fields):
+    return Sale.objects.create(medicine=medicine, quantity_sold=1, sale_price=Decimal('2.00'), sale_date=sale_date,
+                               **fields)
+
+
+def table_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM {table} ORDER BY id')
+        return [row_id for (row_id,) in cursor.fetchall()]
+
+
+@postgresql_only
+class PartitioningMigrationTests(TransactionTestCase):
+    """sales.0004 rebuilds an existing sales_sale as a partitioned table"""
+
+    def migrate(self, target):
+        MigrationExecutor(connection).migrate([('sales', target)])
+
+    def definitions(self):
+        """Secondary index names and foreign key definitions of sales_sale"""
+        with connection.cursor() as cursor:
+            indexes, foreign_keys, _ = partitions._table_definitions(cursor, partitions.TABLE)
+        return {definition.split(' ON ')[0].split()[-1] for definition in indexes}, set(foreign_keys)
+
+    def test_migration_keeps_rows_ids_indexes_and_foreign_keys(self):
+        self.migrate('0003_alter_sale_sale_date')
+        self.addCleanup(self.migrate, '0004_sale_partitions')
+        self.assertFalse(partitions.is_partitioned(connection))
+
+        medicine = Medicine.objects.create(name='Partitioned', unit_price=Decimal('2.00'))
+        stock = Stock.objects.create(medicine=medicine, batch_number='P-1', quantity=5,
+                                     expiry_date=date(2030, 1, 1), purchase_price=Decimal('1.00'))
+        this_month = partitions.month_start(timezone.localdate())
+        for months_ago in (14, 3, 3, 0):
+            sale_on(medicine, partitions.add_months(this_month, -months_ago), stock=stock)
+        rows = list(Sale.objects.order_by('id').values_list('id', 'medicine_id', 'stock_id', 'sale_date', 'sale_price'))
+        indexes, foreign_keys = self.definitions()
+
+        self.migrate('0004_sale_partitions')
+        self.assertTrue(partitions.is_partitioned(connection))
+        self.assertEqual(
+            list(Sale.objects.order_by('id').values_list('id', 'medicine_id', 'stock_id', 'sale_date', 'sale_price')),
+            rows,
+        )
+        # Every month from the oldest sale has its partition; none went to the default
+        self.assertEqual(set(partitions.partitions(connection)), {
+            partitions.add_months(this_month, -months_ago) for months_ago in range(15)
+        })
+        self.assertEqual(table_rows(partitions.DEFAULT_PARTITION), [])
+        self.assertEqual(self.definitions(), (indexes | {'sales_sale_date_idx'}, foreign_keys))
+
+        # The id sequence continues after the copied rows
+        self.assertEqual(sale_on(medicine, timezone.localdate()).id, rows[-1][0] + 1)
+
+
+@postgresql_only
+class PartitionMaintenanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.medicine = Medicine.objects.create(name='Partitioned', unit_price=Decimal('2.00'))
+        cls.this_month = partitions.month_start(timezone.localdate())
+
+    def create_sale(self, sale_date):
+        sale = sale_on(self.medicine, sale_date)
+        # The test transaction would otherwise hold the deferred foreign key
+        # checks, and PostgreSQL refuses to ATTACH or DETACH a partition
+        # with pending trigger events.
+        connection.check_constraints()
+        return sale
+
+    def test_stray_rows_move_to_a_new_partition(self):
+        month = partitions.add_months(self.this_month, 24)
+        self.assertNotIn(month, partitions.partitions(connection))
+        stray = self.create_sale(month + timedelta(days=3))
+        self.assertEqual(table_rows(partitions.DEFAULT_PARTITION), [stray.id])
+
+        created = partitions.ensure_partitions(0, connection)
+        self.assertIn(partitions.partition_name(month), created)
+        self.assertEqual(table_rows(partitions.partition_name(month)), [stray.id])
+        self.assertEqual(table_rows(partitions.DEFAULT_PARTITION), [])
+        self.assertEqual(Sale.objects.get(id=stray.id).sale_date, stray.sale_date)
+
+    def test_archive_detaches_old_months(self):
+        old_month = partitions.add_months(self.this_month, -13)
+        old = self.create_sale(old_month + timedelta(days=9))
+        recent = self.create_sale(timezone.localdate())
+
+        cutoff = partitions.archive_cutoff(12)
+        self.assertEqual(partitions.archive_before(cutoff, connection), {old_month: None})
+        self.assertNotIn(old_month, partitions.partitions(connection))
+        self.assertEqual(partitions.partitions(connection, partitions.ARCHIVE_TABLE),
+                         {old_month: partitions.partition_name(old_month)})
+
+        self.assertEqual(list(Sale.objects.values_list('id', flat=True)), [recent.id])
+        archived = ArchivedSale.objects.get(sale_date__lt=cutoff)
+        self.assertEqual(
+            (archived.id, archived.medicine_id, archived.sale_date, archived.sale_price),
+            (old.id, self.medicine.id, old.sale_date, old.sale_price),
+        )
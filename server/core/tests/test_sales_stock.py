@@ -0,0 +1,51 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from medicines.models import Medicine
+from sales.serializers import SaleSerializer
+from sales.views import SaleViewSet
+from stock.models import Stock
+
+
+class SaleStockDeductionTests(TestCase):
+    """A sale validated against a batch that another till sells from before it is saved"""
+
+    def setUp(self):
+        medicine = Medicine.objects.create(name='Paracetamol', unit_price=Decimal('2.00'))
+        self.stock = Stock.objects.create(
+            medicine=medicine, batch_number='B1', quantity=10, purchase_price=Decimal('1.00'),
+            expiry_date=timezone.localdate() + timedelta(days=90),
+        )
+        self.data = {'medicine': medicine.id, 'stock': self.stock.id, 'sale_price': '2.00'}
+
+    def validate(self, quantity):
+        serializer = SaleSerializer(data={**self.data, 'quantity_sold': quantity})
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def sell_elsewhere(self, quantity):
+        Stock.objects.filter(pk=self.stock.pk).update(quantity=F('quantity') - quantity)
+
+    def test_explicit_stock_deducts_from_current_quantity(self):
+        serializer = self.validate(3)
+        self.sell_elsewhere(4)
+        SaleViewSet().perform_create(serializer)
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 3)
+        self.assertEqual(serializer.instance.stock_id, self.stock.pk)
+
+    def test_explicit_stock_checks_current_quantity(self):
+        serializer = self.validate(8)
+        self.sell_elsewhere(4)
+        with self.assertRaises(ValidationError) as raised:
+            SaleViewSet().perform_create(serializer)
+
+        self.assertIn('quantity_sold', raised.exception.detail)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 6)
@@ -0,0 +1,79 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import User
+from core.tests.test_query_budgets import seed_dataset
+from core.timeseries import auto_granularity, bucket_count, bucket_start, bucket_starts
+from sales.models import Sale
+
+
+class TimeseriesTests(SimpleTestCase):
+    def test_bucket_starts(self):
+        first, last = date(2024, 1, 31), date(2024, 3, 4)
+        self.assertEqual(list(bucket_starts(first, last, 'month')), [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)])
+        weeks = list(bucket_starts(first, last, 'week'))
+        self.assertEqual((weeks[0], weeks[-1]), (date(2024, 1, 29), date(2024, 3, 4)))
+        for granularity in ('day', 'week', 'month'):
+            with self.subTest(granularity=granularity):
+                self.assertEqual(bucket_count(first, last, granularity), len(list(bucket_starts(first, last, granularity))))
+
+    def test_auto_granularity(self):
+        end = date(2024, 6, 30)
+        self.assertEqual(auto_granularity(end - timedelta(days=90), end, 120), 'day')
+        self.assertEqual(auto_granularity(end - timedelta(days=365), end, 120), 'week')
+        self.assertEqual(auto_granularity(end - timedelta(days=3650), end, 120), 'month')
+        self.assertEqual(auto_granularity(end - timedelta(days=36500), end, 120), 'month')
+
+
+class SalesTrendsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_dataset(medicines=10, batches_per_medicine=2, sales=300, suppliers=0)
+        cls.user = User.objects.create_user('trends-staff', password='Trends-Pass-1', role='STAFF')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_gap_filled_series_matches_row_by_row(self):
+        end = timezone.now().date()
+        start = end - timedelta(days=365)
+        for granularity in ('day', 'week', 'month'):
+            with self.subTest(granularity=granularity):
+                expected = defaultdict(lambda: [0, 0, 0])
+                for sale in Sale.objects.filter(sale_date__gte=start, sale_date__lte=end):
+                    totals = expected[bucket_start(sale.sale_date, granularity)]
+                    totals[0] += sale.quantity_sold
+                    totals[1] += sale.quantity_sold * sale.sale_price
+                    totals[2] += 1
+
+                response = self.client.get(f'/api/reports/sales-trends/?days=365&granularity={granularity}')
+                self.assertEqual(response.status_code, 200)
+                trends = response.data['trends']
+                self.assertEqual([row['period'] for row in trends], list(bucket_starts(start, end, granularity)))
+                for row in trends:
+                    quantity, revenue, count = expected.get(row['period'], (0, 0, 0))
+                    self.assertEqual((row['total_quantity'], row['transaction_count']), (quantity, count))
+                    self.assertAlmostEqual(row['total_revenue'], revenue, places=2)
+
+    def test_columnar(self):
+        rows = self.client.get('/api/reports/sales-trends/?days=730&granularity=auto&points=30').data
+        self.assertEqual(rows['granularity'], 'month')
+        response = self.client.get('/api/reports/sales-trends/?days=730&layout=columnar&points=30')
+        self.assertEqual(response.data['granularity'], 'month')
+        columns = response.data['trends']
+        self.assertEqual(list(columns), ['period', 'total_quantity', 'total_revenue', 'transaction_count'])
+        for name, values in columns.items():
+            self.assertEqual(values, [row[name] for row in rows['trends']])
+
+    def test_legacy_shape_and_validation(self):
+        response = self.client.get('/api/reports/sales-trends/?days=30')
+        self.assertEqual(list(response.data), ['monthly_trends', 'daily_trends', 'period_days'])
+        for query in ('days=x', 'days=99999', 'granularity=year', 'granularity=auto&points=1', 'layout=csv'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/reports/sales-trends/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.data), [query.split('&')[-1].split('=')[0]])
@@ -0,0 +1,86 @@
+import json
+import random
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.accesslog import parse_line, route_template
+from core.quantiles import QuantileSketch
+
+LINES = [
+    # Collector prefixes are tolerated; %(D)s is in microseconds.
+    'Oct 19 app[web]: 10.0.0.1 - - [19/Oct/2026:08:00:01 +0000] "GET /api/stock/12/ HTTP/1.1" 200 512 "-" "Mozilla/5.0" 20000',
+    '10.0.0.1 - - [19/Oct/2026:08:00:02 +0000] "GET /api/stock/13/?x=1 HTTP/1.1" 200 512 "-" "Mozilla/5.0" 40000',
+    '10.0.0.2 - - [19/Oct/2026:08:00:03 +0000] "POST /api/sales/ HTTP/1.1" 500 80 "-" "Mozilla/5.0" 900000',
+    '10.0.0.3 - - [19/Oct/2026:08:10:00 +0000] "GET /api/does-not-exist/7/ HTTP/1.1" 404 20 "-" "scanner" 1000',
+    '10.0.0.3 - - [19/Oct/2026:09:00:00 +0000] "GET /api/stock/14/ HTTP/1.1" 200 512 "-" "Mozilla/5.0" 30000',
+    '[2026-10-19 08:00:00 +0000] [7] [INFO] Booting worker with pid: 7',
+]
+
+
+class AccessLogTests(SimpleTestCase):
+    def test_parse_line(self):
+        record = parse_line(LINES[1])
+        self.assertEqual((record.method, record.path, record.query, record.status), ('GET', '/api/stock/13/', 'x=1', 200))
+        self.assertAlmostEqual(record.duration, 0.04)
+        self.assertIsNone(parse_line(LINES[-1]))
+
+    def test_route_template(self):
+        self.assertEqual(route_template('/api/stock/12/'), '/api/stock/{id}/')
+        self.assertEqual(route_template('/api/stock/low_stock_alerts/'), '/api/stock/low_stock_alerts/')
+
+
+class QuantileSketchTests(SimpleTestCase):
+    def test_relative_accuracy(self):
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(3, 1.5) for _ in range(50_000))
+        sketch = QuantileSketch(alpha=0.01)
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLess(abs(sketch.quantile(q) - exact) / exact, 0.011)
+
+    def test_merge_matches_single_sketch(self):
+        a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i in range(1, 1000):
+            (a if i % 2 else b).add(i)
+            both.add(i)
+        a.merge(b)
+        self.assertEqual(a.quantile(0.95), both.quantile(0.95))
+        self.assertEqual(a.count, both.count)
+
+
+class SLOReportCommandTests(SimpleTestCase):
+    def run_report(self, *args):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / 'access.log'
+            log.write_text('\n'.join(LINES) + '\n')
+            out, err = StringIO(), StringIO()
+            call_command('slo_report', str(log), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_json_report(self):
+        out, err = self.run_report('--window', '1h', '--slo-ms', '50')
+        report = json.loads(out)
+        self.assertEqual([w['start'] for w in report['windows']], ['2026-10-19T08:00:00+00:00', '2026-10-19T09:00:00+00:00'])
+
+        stock = report['routes']['GET /api/stock/{id}/']
+        self.assertEqual(stock['requests'], 3)
+        self.assertEqual(stock['within_slo'], 1.0)
+        self.assertAlmostEqual(stock['p50_ms'], 30, delta=0.5)
+
+        sales = report['routes']['POST /api/sales/']
+        self.assertEqual(sales['error_rate'], 1.0)
+        self.assertIn('<unmatched>', ' '.join(report['routes']))
+        self.assertEqual(report['windows'][0]['routes']['*']['requests'], 4)
+        self.assertIn('Skipped 1 of 6 lines', err)
+
+    def test_csv_report(self):
+        out, _ = self.run_report('--window', '1d', '--format', 'csv')
+        rows = out.strip().splitlines()
+        self.assertTrue(rows[0].startswith('window,route,requests,throughput_rps,error_rate'))
+        self.assertIn('total,GET /api/stock/{id}/,3,', out)
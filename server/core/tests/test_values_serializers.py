@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.models import User
+from medicines.models import Medicine
+from medicines.serializers import MedicineSerializer, MedicineValuesSerializer
+from sales.models import Sale
+from sales.serializers import SaleSerializer, SaleValuesSerializer
+from stock.models import Stock
+from stock.serializers import StockSerializer, StockValuesSerializer
+from suppliers.models import Supplier
+from suppliers.serializers import SupplierSerializer, SupplierValuesSerializer
+
+
+class AllFieldsValuesSerializerTests(TestCase):
+    """Values counterparts of ``fields = '__all__'`` serializers follow the model"""
+
+    PAIRS = [
+        (Medicine, MedicineSerializer, MedicineValuesSerializer),
+        (Supplier, SupplierSerializer, SupplierValuesSerializer),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        Medicine.objects.create(name='Amoxicillin', unit_price=Decimal('4.5'), barcode='5000001')
+        Supplier.objects.create(name='MedSupply', reliability_rating=Decimal('4.2'))
+
+    def test_same_fields_and_output(self):
+        for model, serializer_class, values_serializer_class in self.PAIRS:
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.order_by('id')
+                values_serializer = values_serializer_class()
+                self.assertEqual(values_serializer.fields, list(serializer_class().fields))
+                self.assertEqual(
+                    values_serializer.to_representation(values_serializer.rows(queryset)),
+                    serializer_class(queryset, many=True).data,
+                )
+
+
+class AnnotatedValuesSerializerTests(TestCase):
+    """Values counterparts computing related names and derived columns in SQL"""
+
+    PAIRS = [
+        (Stock.objects.select_related('medicine'), StockSerializer, StockValuesSerializer),
+        (Sale.objects.select_related('medicine', 'stock'), SaleSerializer, SaleValuesSerializer),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        medicine = Medicine.objects.create(name='Amoxicillin', unit_price=Decimal('4.5'))
+        # Expired, expiring today and future batches; prices needing quantization
+        batches = [
+            Stock.objects.create(medicine=medicine, batch_number=f'B-{days}', expiry_date=today + timedelta(days=days),
+                                 quantity=10, purchase_price=price)
+            for days, price in [(-3, Decimal('3')), (0, Decimal('3.5')), (400, Decimal('12345678.99'))]
+        ]
+        Sale.objects.create(medicine=medicine, stock=batches[0], quantity_sold=2, sale_price=Decimal('9.9'),
+                            sale_date=today - timedelta(days=40))
+        Sale.objects.create(medicine=medicine, stock=batches[2], quantity_sold=1, sale_price=Decimal('0.05'))
+        Sale.objects.create(medicine=medicine, stock=None, quantity_sold=5, sale_price=Decimal('100'))
+
+    def test_same_fields_and_output(self):
+        for queryset, serializer_class, values_serializer_class in self.PAIRS:
+            with self.subTest(model=queryset.model.__name__):
+                queryset = queryset.order_by('id')
+                values_serializer = values_serializer_class()
+                self.assertEqual(values_serializer.fields, list(serializer_class().fields))
+                self.assertEqual(
+                    values_serializer.to_representation(values_serializer.rows(queryset)),
+                    serializer_class(queryset, many=True).data,
+                )
+
+
+class SparseFieldsetTests(APITestCase):
+    """``?fields=`` and ``?expand=`` on a values-served list endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='manager', password='Sparse-Test-Pass-42', role=User.Role.MANAGER)
+        cls.medicine = Medicine.objects.create(name='Amoxicillin', unit_price=Decimal('4.5'), barcode='5000001')
+        expiry = timezone.localdate() + timedelta(days=90)
+        for quantity in (10, 20):
+            Stock.objects.create(medicine=cls.medicine, batch_number=f'B-{quantity}', expiry_date=expiry,
+                                 quantity=quantity, purchase_price=Decimal('3.5'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def results(self, query):
+        response = self.client.get(f'/api/stock/?ordering=quantity&{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results']
+
+    def test_fields_narrow_the_rows(self):
+        self.assertEqual(self.results('fields=quantity,id'), [
+            {'id': stock.id, 'quantity': stock.quantity} for stock in Stock.objects.order_by('quantity')
+        ])
+
+    def test_dotted_field_implies_expansion(self):
+        self.assertEqual(self.results('fields=quantity,medicine.name'), [
+            {'medicine': {'name': 'Amoxicillin'}, 'quantity': 10},
+            {'medicine': {'name': 'Amoxicillin'}, 'quantity': 20},
+        ])
+
+    def test_expand_embeds_the_related_row(self):
+        embedded = MedicineSerializer(self.medicine).data
+        for row in self.results('expand=medicine'):
+            self.assertEqual(row['medicine'], embedded)
+            self.assertEqual(row['medicine_name'], 'Amoxicillin')
+
+    def test_unknown_field_or_expansion(self):
+        for query, key in [
+            ('fields=id,colour', 'fields'),
+            ('fields=id,batch_number.name', 'expand'),
+            ('expand=supplier', 'expand'),
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/stock/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(key, response.json())
+
+    def test_expand_adds_no_query(self):
+        with CaptureQueriesContext(connection) as plain:
+            self.results('')
+        with self.assertNumQueries(len(plain)):
+            self.results('expand=medicine')
@@ -0,0 +1,53 @@
+import os
+import threading
+
+from django.db import connection, connections
+from django.test import TestCase
+
+from core import warmup
+from sales.views import SaleViewSet
+
+
+class WarmupTests(TestCase):
+    def test_warm_up_runs_every_step(self):
+        with self.assertLogs('pharma.performance', 'DEBUG') as logs:
+            warmup.warm_up()
+        self.assertFalse([line for line in logs.output if line.startswith('WARNING')])
+        warmed = next(record for record in logs.records if 'warmed up' in record.getMessage())
+        self.assertEqual(list(warmed.warmup_ms), ['databases', 'urls', 'serializers', 'catalogs'])
+
+    def test_connect_only_for_this_threads_requests(self):
+        opened = {}
+
+        def worker_thread(connect):
+            warmup.connect_databases(connect)
+            opened[connect] = connection.connection is not None
+            connections.close_all()
+
+        for connect in (True, False):
+            thread = threading.Thread(target=worker_thread, args=(connect,))
+            thread.start()
+            thread.join()
+        self.assertEqual(opened, {True: True, False: False})
+
+    def test_warm_up_without_connect_leaves_no_connection(self):
+        def worker_thread():
+            warmup.warm_up(connect=False)
+            opened.append(connection.connection is not None)
+
+        opened = []
+        thread = threading.Thread(target=worker_thread)
+        thread.start()
+        thread.join()
+        self.assertEqual(opened, [False])
+
+    def test_views_found_from_url_patterns(self):
+        self.assertIn(SaleViewSet, warmup.prime_urls())
+
+    def test_memory_usage(self):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            self.skipTest('Linux /proc only')
+        usage = warmup.memory_usage()
+        self.assertEqual(set(usage), {'rss', 'pss', 'uss'})
+        self.assertGreater(usage['rss'], 0)
+        self.assertLessEqual(usage['uss'], usage['rss'])
@@ -0,0 +1,59 @@
+"""
+Calendar buckets for time-series reports.
+
+Buckets are labelled by their start date as returned by ``Trunc`` (weeks
+start on Monday, months on the 1st), so rows grouped in SQL line up with
+``bucket_starts`` and missing buckets can be filled in without another query.
+"""
+from datetime import timedelta
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def bucket_start(value, granularity):
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def bucket_starts(first, last, granularity):
+    """Every bucket start from the one holding ``first`` to the one holding ``last``"""
+    current = bucket_start(first, granularity)
+    while current <= last:
+        yield current
+        if granularity == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=7 if granularity == 'week' else 1)
+
+
+def bucket_count(first, last, granularity):
+    if granularity == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    if granularity == 'week':
+        return (bucket_start(last, 'week') - bucket_start(first, 'week')).days // 7 + 1
+    return (last - first).days + 1
+
+
+def auto_granularity(first, last, points):
+    """The finest granularity with at most ``points`` buckets (months otherwise)"""
+    for granularity in GRANULARITIES:
+        if bucket_count(first, last, granularity) <= points:
+            return granularity
+    return GRANULARITIES[-1]
+
+
+def fill_buckets(rows, starts, key, empty):
+    """
+    ``rows`` (ordered by ``key``) with a copy of ``empty`` for every bucket
+    start in ``starts`` that has no row
+    """
+    by_start = {row[key]: row for row in rows}
+    return [by_start.get(start) or {key: start, **empty} for start in starts]
+
+
+def columnar(rows, columns):
+    """Parallel lists per column instead of one dict per row"""
+    return {column: [row[column] for row in rows] for column in columns}
@@ -0,0 +1,187 @@
+"""
+Read-only fast path for list endpoints.
+
+A ``ValuesSerializer`` renders rows fetched with ``.values()`` (related names
+and computed columns annotated in SQL) instead of building model instances and
+walking DRF field objects for every row. Its output must stay byte-for-byte
+identical to the matching ``ModelSerializer``.
+
+List views also accept sparse fieldsets and expansion of related objects:
+
+    ?fields=id,medicine_name,quantity    only these keys (and SQL columns)
+    ?expand=medicine                     embed the medicine instead of its id
+    ?fields=id,medicine.name             embed just the medicine's name
+"""
+from datetime import date
+
+from django.db.models import DateField, DurationField, ExpressionWrapper, F, Value
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .instrumentation import timed
+
+
+def days_until(field_name):
+    """SQL expression for ``(<field> - today)`` as a duration"""
+    return ExpressionWrapper(
+        F(field_name) - Value(timezone.now().date(), output_field=DateField()),
+        output_field=DurationField(),
+    )
+
+
+def format_date(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def format_days(value):
+    return value.days if value is not None else None
+
+
+def decimal_formatter(max_digits, decimal_places):
+    """Reuse DRF's own decimal formatting so quantizing/coercion never drifts"""
+    field = serializers.DecimalField(max_digits=max_digits, decimal_places=decimal_places)
+
+    def format_decimal(value):
+        return field.to_representation(value) if value is not None else None
+    return format_decimal
+
+
+def model_fields(model):
+    """Concrete field names, ordered like a ModelSerializer's ``fields = '__all__'``"""
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    return (
+        [model._meta.pk.name]
+        + [field.name for field in fields if not field.is_relation]
+        + [field.name for field in fields if field.is_relation]
+    )
+
+
+def parse_list_param(value):
+    """``'a, b,,c'`` -> ``['a', 'b', 'c']``; ``None`` when the param is absent"""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class ValuesSerializer:
+    """
+    Declarative, instance-free serializer over a ``.values()`` queryset.
+
+    Subclasses set ``fields`` (output order), ``formatters`` (per-field
+    callables applied to non-trivial columns), ``expandable`` (foreign key
+    field -> ``ValuesSerializer`` of the related model) and return
+    computed columns from ``get_annotations``. Expanded serializers are
+    read through the join, so they may only use concrete columns.
+    """
+    fields = ()
+    formatters = {}
+    expandable = {}
+
+    def __init__(self, fields=None, expand=None):
+        declared = type(self).fields
+        nested_fields = {}
+        top_level = []
+        for name in fields or ():
+            head, _, tail = name.partition('.')
+            top_level.append(head)
+            if tail:
+                nested_fields.setdefault(head, []).append(tail)
+
+        unknown = sorted(set(top_level) - set(declared))
+        if unknown:
+            raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}"})
+        expand = set(expand or ()) | set(nested_fields)
+        unknown = sorted(expand - set(self.expandable))
+        if unknown:
+            raise ValidationError({'expand': f"Cannot expand: {', '.join(unknown)}"})
+
+        if fields:
+            self.fields = [name for name in declared if name in top_level]
+        self.expanded = {
+            name: self.expandable[name](fields=nested_fields.get(name))
+            for name in expand if name in self.fields
+        }
+
+    def get_annotations(self):
+        return {}
+
+    def columns(self, prefix=''):
+        """``.values()`` lookups needed to render the selected fields"""
+        cols = []
+        for name in self.fields:
+            cols.append(f'{prefix}{name}')
+            if name in self.expanded:
+                cols.extend(self.expanded[name].columns(f'{prefix}{name}__'))
+        return cols
+
+    def rows(self, queryset):
+        """Lazy ``.values()`` queryset; safe to slice/paginate"""
+        annotations = {
+            name: expression for name, expression in self.get_annotations().items()
+            if name in self.fields
+        }
+        return queryset.annotate(**annotations).values(*self.columns())
+
+    def _plan(self):
+        return [(name, self.formatters.get(name), self.expanded.get(name)) for name in self.fields]
+
+    def _render_row(self, row, plan, prefix):
+        data = {}
+        for name, fmt, nested in plan:
+            value = row[prefix + name]
+            if nested is not None:
+                value = None if value is None else nested._render_row(row, nested._plan(), f'{prefix}{name}__')
+            elif fmt is not None:
+                value = fmt(value)
+            data[name] = value
+        return data
+
+    def to_representation(self, rows):
+        if self.expanded:
+            plan = self._plan()
+            return [self._render_row(row, plan, '') for row in rows]
+        formatters = [(name, self.formatters.get(name)) for name in self.fields]
+        return [
+            {name: fmt(row[name]) if fmt else row[name] for name, fmt in formatters}
+            for row in rows
+        ]
+
+
+class ValuesListMixin:
+    """
+    ViewSet mixin that serves ``list`` through ``values_serializer_class``.
+
+    Filtering, ordering and pagination behave exactly as in ``ListModelMixin``;
+    ``?fields=`` and ``?expand=`` narrow or widen the selected columns.
+    """
+    values_serializer_class = None
+    # Read-only actions whose queries may use the replica (core/databases.py)
+    replica_actions = ('list',)
+
+    def get_values_serializer(self):
+        params = self.request.query_params
+        return self.values_serializer_class(
+            fields=parse_list_param(params.get('fields')),
+            expand=parse_list_param(params.get('expand')),
+        )
+
+    def values_response(self, queryset, paginate=True):
+        serializer = self.get_values_serializer()
+        rows = serializer.rows(queryset)
+        if paginate:
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                with timed('serialize'):
+                    data = serializer.to_representation(page)
+                return self.get_paginated_response(data)
+        rows = list(rows)  # run the query outside the serialize span
+        with timed('serialize'):
+            data = serializer.to_representation(rows)
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        return self.values_response(self.filter_queryset(self.get_queryset()))
@@ -4,6 +4,10 @@ from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from django.http import FileResponse, Http404
+import json
+from .permissions import CanProfile
+from .profiling import list_profiles, profile_path
 from .serializers import RegisterSerializer, UserSerializer
 
 
@@ -64,3 +68,32 @@ class ChangePasswordView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ProfileListView(APIView):
+    """Stored request profiles, newest first"""
+    permission_classes = [CanProfile]
+
+    def get(self, _request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """Top functions and SQL timeline of one profile"""
+    permission_classes = [CanProfile]
+
+    def get(self, _request, profile_id):
+        path = profile_path(profile_id, '.json')
+        if path is None:
+            raise Http404
+        return Response(json.loads(path.read_text()))
+
+
+class ProfileDownloadView(APIView):
+    """Raw cProfile dump, loadable with pstats/snakeviz"""
+    permission_classes = [CanProfile]
+
+    def get(self, _request, profile_id):
+        path = profile_path(profile_id, '.prof')
+        if path is None:
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
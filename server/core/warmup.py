@@ -0,0 +1,168 @@
+"""
+Worker start-up for gunicorn with ``preload_app`` (hooks in gunicorn.conf.py).
+
+In the master, before forking: the URLconf and the views it imports are
+loaded, then ``gc.freeze()`` moves everything the preloaded app allocated
+into the permanent generation. The workers' garbage collector
+then never walks those objects, so it doesn't write to their pages and they
+stay shared copy-on-write between workers. The master's database connections
+are closed so no worker inherits a socket.
+
+In each worker, before its first request: fill the connection pools, connect
+to the other databases, compile the URL patterns, build each ViewSet's
+serializer fields and load the model and content type catalogs. A worker
+replaced after ``max_requests`` then serves its first request as fast as an
+old one. Django's connections are per thread, so only sync workers, which
+serve requests in the thread that warms up, connect outside the pool
+(``connect=False`` otherwise: gthread and uvicorn workers run views in other
+threads). The connection is only kept for that request with
+``CONN_MAX_AGE`` > 0; pooled connections are shared by every thread.
+
+Memory is reported per process as resident (rss), proportional (pss) and
+unique (uss, what the process would free by exiting) bytes, logged at start
+and exported as ``pharma_process_memory_bytes``.
+"""
+import gc
+import logging
+import os
+import time
+
+logger = logging.getLogger('pharma.performance')
+
+_SMAPS_FIELDS = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+
+
+def memory_usage():
+    """``{'rss', 'pss', 'uss'}`` in bytes for this process; empty where /proc is missing"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                kind = _SMAPS_FIELDS.get(name)
+                if kind:
+                    usage[kind] = usage.get(kind, 0) + int(value.split()[0]) * 1024
+    except OSError:
+        return {}
+    return usage
+
+
+def report_memory(label, log=True):
+    usage = memory_usage()
+    if not usage:
+        return usage
+    from . import metrics
+    metrics.set_process_memory(usage)
+    if log:
+        logger.info(
+            '%s %d memory: rss=%.1f MiB pss=%.1f MiB uss=%.1f MiB', label, os.getpid(),
+            *(usage.get(kind, 0) / 2 ** 20 for kind in ('rss', 'pss', 'uss')),
+            extra={'memory': usage},
+        )
+    return usage
+
+
+def before_fork():
+    """In the master, before each fork"""
+    from django.db import connections
+    connections.close_all()
+    # Objects allocated since the last fork (e.g. by the arbiter) are frozen
+    # too; cheap, as frozen objects are not scanned again.
+    gc.freeze()
+
+
+def freeze_heap():
+    """In the master once the app is loaded, before the first fork"""
+    # Django imports the URLconf, and with it every view, on the first
+    # request: done here, workers share the modules instead of each
+    # importing its own copy.
+    prime_serializers(prime_urls())
+    # Collect first so garbage isn't frozen along with the app
+    gc.collect()
+    before_fork()
+    report_memory('Master')
+
+
+def connect_databases(connect=True):
+    """Fill the pools; with ``connect``, open this thread's other connections"""
+    from django.db import connections
+    for connection in connections.all():
+        fill_pool = getattr(connection, 'fill_pool', None)
+        if fill_pool is not None:
+            fill_pool()
+        elif connect:
+            connection.ensure_connection()
+
+
+def prime_urls():
+    """Compile every URL pattern's regex; returns the ViewSets found"""
+    from django.urls import URLResolver, get_resolver
+
+    views = set()
+    resolvers = [get_resolver()]
+    while resolvers:
+        resolver = resolvers.pop()
+        resolver.pattern.regex
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLResolver):
+                resolvers.append(pattern)
+                continue
+            pattern.pattern.regex
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                views.add(view_class)
+    # Reverse lookups (e.g. pagination links) use this table
+    get_resolver().reverse_dict
+    return views
+
+
+def prime_serializers(views):
+    for view_class in views:
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None:
+            continue
+        try:
+            serializer_class().fields
+        except Exception:
+            # Serializers that need a request in their context build on first use
+            logger.debug('Not priming %s', serializer_class.__name__, exc_info=True)
+
+
+def prime_catalogs():
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+    ContentType.objects.get_for_models(*models)
+
+
+def _step(timings, name, func, *args):
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    except Exception:
+        logger.warning('Worker warm-up step %r failed', name, exc_info=True)
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def warm_up(connect=True):
+    """
+    In each worker before its first request; a failing step is logged and
+    skipped. ``connect=False`` where requests are served in other threads.
+    """
+    started = time.perf_counter()
+    timings = {}
+    _step(timings, 'databases', connect_databases, connect)
+    views = _step(timings, 'urls', prime_urls) or ()
+    _step(timings, 'serializers', prime_serializers, views)
+    _step(timings, 'catalogs', prime_catalogs)
+    if not connect:
+        # Opened by the catalog queries; pooled ones go back to the pool
+        from django.db import connections
+        connections.close_all()
+    logger.info('Worker %d warmed up in %.0f ms', os.getpid(), (time.perf_counter() - started) * 1000,
+                extra={'warmup_ms': timings})
+    report_memory('Worker')
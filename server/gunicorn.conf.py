@@ -6,9 +6,26 @@ import multiprocessing
 port = os.environ.get("PORT", "8000")
 bind = f"0.0.0.0:{port}"
 
+# SERVER_MODE=asgi serves pharma_backend.asgi with uvicorn workers, which
+# also switches the report/summary routes to their async variants.
+# Experimental: it has only been measured on SQLite, where it is slower than
+# the sync workers; keep the default until benchmarks/bench_async_reports.py
+# shows a gain on PostgreSQL.
+server_mode = os.environ.get("SERVER_MODE", "wsgi")
+if server_mode == "asgi":
+    wsgi_app = "pharma_backend.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "pharma_backend.wsgi:application"
+    worker_class = "sync"
+
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# GUNICORN_THREADS > 1 runs gthread workers (WSGI mode); with DB_POOL=1
+# their threads share the worker's pooled database connections.
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+if threads > 1 and server_mode != "asgi":
+    worker_class = "gthread"
 worker_connections = 1000
 
 # Restart workers after this many requests to prevent memory leaks
@@ -35,3 +52,65 @@ pidfile = "/tmp/gunicorn.pid"
 
 # Environment
 raw_env = ['ENVIRONMENT=production']
+
+# Prometheus multi-process metrics: workers write mmap files here and
+# /metrics aggregates them (see core/metrics.py). The directory must exist
+# and be empty before the app is preloaded, as metrics without labels open
+# their file on import; this file is loaded before the app, gunicorn's
+# on_starting hook only after it. Stale files from a previous run would be
+# summed into the new counters. A HUP reloads this file too, but the live
+# workers' files must stay: wiped once per master.
+prometheus_multiproc_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/pharma_metrics')
+if os.environ.get('PHARMA_METRICS_DIR_OWNER') != str(os.getpid()):
+    import shutil
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+    os.environ['PHARMA_METRICS_DIR_OWNER'] = str(os.getpid())
+
+
+# Worker start-up (core/warmup.py): the master freezes the preloaded heap
+# before forking so workers keep sharing it, and each worker connects and
+# primes its caches before taking requests. WORKER_WARMUP=0 disables both.
+worker_warmup = os.environ.get("WORKER_WARMUP", "1") == "1"
+# Requests between updates of a worker's pharma_process_memory_bytes
+memory_report_interval = int(os.environ.get("MEMORY_REPORT_INTERVAL", "100"))
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    if worker_warmup and preload_app:
+        from core import warmup
+        warmup.freeze_heap()
+
+
+def pre_fork(server, worker):
+    # Also before forking the replacement of a recycled worker
+    if worker_warmup and preload_app:
+        from core import warmup
+        warmup.before_fork()
+
+
+def post_worker_init(worker):
+    # After the worker has loaded the app (also without preload_app) and
+    # right before it accepts connections; post_fork would run too early
+    # for that case.
+    if worker_warmup:
+        from gunicorn.workers.sync import SyncWorker
+
+        from core import warmup
+        # Only a sync worker serves requests in this thread; a connection
+        # opened here would sit unused in gthread and uvicorn workers.
+        warmup.warm_up(connect=isinstance(worker, SyncWorker))
+
+
+def post_request(worker, req, environ, resp):
+    if memory_report_interval and worker.nr % memory_report_interval == 0:
+        from core import warmup
+        warmup.report_memory('Worker', log=False)
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.values_serializers import ValuesSerializer, decimal_formatter, model_fields
 from .models import Medicine
 
 
@@ -8,4 +9,9 @@ class MedicineSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-
+class MedicineValuesSerializer(ValuesSerializer):
+    """Read-only list counterpart of ``MedicineSerializer``"""
+    fields = model_fields(Medicine)
+    formatters = {
+        'unit_price': decimal_formatter(max_digits=10, decimal_places=2),
+    }
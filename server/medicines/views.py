@@ -1,19 +1,22 @@
 from rest_framework import viewsets, permissions, filters
 from rest_framework.response import Response
 from .models import Medicine
-from .serializers import MedicineSerializer
+from .serializers import MedicineSerializer, MedicineValuesSerializer
 from core.permissions import IsStaffOrReadOnly, IsAdmin
+from core.values_serializers import ValuesListMixin
 from stock.models import Stock
 from stock.serializers import StockSerializer
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 import random
 import string
 
 
-class MedicineViewSet(viewsets.ModelViewSet):
+class MedicineViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Medicine.objects.all().order_by('name')
     serializer_class = MedicineSerializer
+    values_serializer_class = MedicineValuesSerializer
     permission_classes = [IsStaffOrReadOnly]  # All users can read, only admin can create/edit/delete
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'generic_name']
@@ -37,7 +40,7 @@ class MedicineViewSet(viewsets.ModelViewSet):
         # Set default values for initial stock
         initial_quantity = 100  # Default initial stock
         expiry_date = timezone.now().date() + timedelta(days=365)  # 1 year from now
-        purchase_price = medicine.unit_price * 0.8  # 20% discount from selling price
+        purchase_price = (medicine.unit_price * Decimal('0.8')).quantize(Decimal('0.01'))  # 20% discount from selling price
 
         # Create the stock batch
         stock_data = {
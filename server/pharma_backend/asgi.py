@@ -2,8 +2,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pharma_backend.settings')
+# Serve the async report/summary variants (see core/concurrency.py)
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
-
-
-
@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -25,6 +26,7 @@ if not SECRET_KEY:
     SECRET_KEY = 'dev-secret-key-change-in-production-make-it-longer-for-security'
 
 DEBUG = os.getenv('DJANGO_DEBUG', '1' if IS_DEVELOPMENT else '0') == '1'
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
 # Allowed hosts
 ALLOWED_HOSTS = [h.strip() for h in os.getenv('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if h.strip()]
 
@@ -62,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -69,6 +72,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.databases.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,9 +104,26 @@ if DB_ENGINE.lower() == 'sqlite':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'NAME': os.getenv('SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')),
         }
     }
+    # Tuned profile for single-store deployments (core/backends/sqlite): WAL
+    # so reports don't block the tills, writers queue for busy_timeout ms,
+    # sale transactions take the write lock at BEGIN. Persistent connections
+    # keep their page cache between requests.
+    if os.getenv('SQLITE_TUNED', '1') == '1':
+        DATABASES['default'].update({
+            'ENGINE': 'core.backends.sqlite',
+            'CONN_MAX_AGE': int(os.getenv('SQLITE_CONN_MAX_AGE', '600')),
+            'OPTIONS': {'pragmas': {
+                'journal_mode': 'WAL',
+                'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+                'synchronous': 'NORMAL',
+                'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+                'cache_size': -int(os.getenv('SQLITE_CACHE_KIB', str(64 * 1024))),  # negative: KiB
+                'temp_store': 'MEMORY',
+            }},
+        })
 else:
     DATABASES = {
         'default': {
@@ -114,6 +136,24 @@ else:
         }
     }
 
+# Optional read replica (core/databases.py): report and list reads go to it.
+# Locally a copy of the SQLite file, or a second database on the same
+# PostgreSQL server, stands in for one.
+if DB_ENGINE.lower() == 'sqlite' and os.getenv('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.getenv('SQLITE_REPLICA_PATH')}
+elif DB_ENGINE.lower() != 'sqlite' and (os.getenv('POSTGRES_REPLICA_HOST') or os.getenv('POSTGRES_REPLICA_DB')):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('POSTGRES_REPLICA_DB', DATABASES['default']['NAME']),
+        'HOST': os.getenv('POSTGRES_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+    }
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.databases.ReplicaRouter']
+# After a write, the client's reads stay on the primary this long
+REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 AUTH_USER_MODEL = 'core.User'
 
 # CORS Settings - Production vs Development
@@ -135,6 +175,9 @@ if IS_PRODUCTION:
 else:
     CORS_ALLOW_ALL_ORIGINS = True
 
+# Let the SPA's devtools/RUM read per-request timings
+CORS_EXPOSE_HEADERS = ['Server-Timing']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -150,6 +193,10 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashing cost is irrelevant in tests and dominates their runtime otherwise
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -175,6 +222,8 @@ if IS_PRODUCTION:
 
     # HTTPS Settings
     SECURE_SSL_REDIRECT = True
+    # Platform probes call over plain HTTP inside the network
+    SECURE_REDIRECT_EXEMPT = [r'^livez$', r'^readyz$']
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     CSRF_COOKIE_HTTPONLY = True
@@ -187,43 +236,78 @@ if IS_PRODUCTION:
     # Add this to your main urls.py: path('custom-admin/', admin.site.urls)
 
 # Logging Configuration
+# Logging goes through one bounded queue per process (core/logqueue.py): a
+# background thread writes JSON lines to LOG_FILE, rotated at LOG_MAX_BYTES,
+# and to stderr (LOG_CONSOLE: json, text or off). Requests never wait on log
+# I/O; with LOG_QUEUE_SIZE records pending, further ones are dropped and counted.
+LOG_LEVEL = 'INFO' if IS_PRODUCTION else 'DEBUG'
+LOG_CONSOLE = os.getenv('LOG_CONSOLE', 'json' if IS_PRODUCTION else 'text')
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
     'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
-        },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': 'django.log',
-            'formatter': 'verbose',
+        'queue': {
+            'class': 'core.logqueue.QueueHandler',
+            'filename': os.getenv('LOG_FILE', 'django.log'),
+            'max_bytes': int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            'backup_count': int(os.getenv('LOG_BACKUP_COUNT', '5')),
+            'console': None if LOG_CONSOLE == 'off' else LOG_CONSOLE,
+            'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO' if IS_PRODUCTION else 'DEBUG',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO' if IS_PRODUCTION else 'DEBUG',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        # Slow request / slow query records from core.middleware
+        'pharma.performance': {
+            'handlers': ['queue'],
+            'level': 'INFO',
             'propagate': False,
         },
     },
 }
 
+# Per-request SQL instrumentation (core.middleware.RequestMetricsMiddleware)
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', '1') == '1'
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', '1') == '1'
+REQUEST_METRICS_SLOW_REQUEST_MS = int(os.getenv('REQUEST_METRICS_SLOW_REQUEST_MS', '500'))
+REQUEST_METRICS_SLOW_QUERY_MS = int(os.getenv('REQUEST_METRICS_SLOW_QUERY_MS', '100'))
+
+# N+1 query detection (core/nplusone.py), on in DEBUG and under `manage.py test`.
+# NPLUSONE_RAISE turns findings into request errors instead of log warnings;
+# the test suite runs with it on.
+NPLUSONE_ENABLED = os.getenv('NPLUSONE_ENABLED', '1' if DEBUG or TESTING else '0') == '1'
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', '3'))
+NPLUSONE_RAISE = os.getenv('NPLUSONE_RAISE', '1' if TESTING else '0') == '1'
+if NPLUSONE_ENABLED:
+    MIDDLEWARE.insert(MIDDLEWARE.index('core.middleware.RequestMetricsMiddleware') + 1, 'core.nplusone.NPlusOneMiddleware')
+
+# Health probes (core/health.py): /readyz serves probe results at most
+# HEALTH_READINESS_TTL seconds old, refreshed by one background thread.
+HEALTH_READINESS_TTL = float(os.getenv('HEALTH_READINESS_TTL', '10'))
+HEALTH_READINESS_MAX_AGE = float(os.getenv('HEALTH_READINESS_MAX_AGE', '30'))
+HEALTH_READINESS_WAIT = float(os.getenv('HEALTH_READINESS_WAIT', '2'))
+
+# On-demand admin profiling (core/profiling.py): send 'X-Profile: 1'
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', '1') == '1'
+PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILER_MAX_PROFILES = int(os.getenv('PROFILER_MAX_PROFILES', '50'))
+
+# Prometheus /metrics endpoint (core/metrics.py). Scrapes are accepted from
+# METRICS_ALLOWED_IPS, or from anywhere with 'Authorization: Bearer <METRICS_TOKEN>'.
+# Behind a reverse proxy on the same host every client looks local: set
+# METRICS_ALLOWED_IPS to an empty string there and scrape with the token.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
 # Cache Configuration (Redis in production, local memory in development)
 if IS_PRODUCTION:
     # Redis cache configuration
@@ -241,13 +325,61 @@ else:
         }
     }
 
+# Single-flight caching for expensive report aggregates (see core/cache.py).
+# 'fresh' is how long a result is served as-is, 'stale' how much longer it may
+# be served while one worker refreshes it in the background.
+SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', '1') == '1'
+SINGLE_FLIGHT_POLICIES = {
+    'reports.summary': {'fresh': 60, 'stale': 300},
+    'reports.stock_analysis': {'fresh': 120, 'stale': 600},
+    'stock.summary': {'fresh': 30, 'stale': 120},
+}
+
+# ASGI mode (pharma_backend/asgi.py sets ASYNC_VIEWS=1): the report and stock
+# summary routes serve async variants that run their independent queries on a
+# pool of QUERY_POOL_SIZE threads per process, each holding one DB connection.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+QUERY_POOL_SIZE = int(os.getenv('QUERY_POOL_SIZE', '4'))
+
+# Sales storage (see sales/partitions.py and `manage.py sales_partitions`): on
+# PostgreSQL sales_sale is partitioned by month, with partitions created
+# SALES_PARTITION_MONTHS_AHEAD months in advance. Sales older than
+# SALES_ARCHIVE_AFTER_MONTHS months move to sales_sale_archive (0 keeps all
+# sales in the hot table); reports only read the hot table.
+SALES_PARTITION_MONTHS_AHEAD = int(os.getenv('SALES_PARTITION_MONTHS_AHEAD', '3'))
+SALES_ARCHIVE_AFTER_MONTHS = int(os.getenv('SALES_ARCHIVE_AFTER_MONTHS', '0'))
+
 # Database Connection Optimization
-if IS_PRODUCTION:
-    DATABASES['default']['CONN_MAX_AGE'] = 600  # 10 minutes
-    DATABASES['default']['OPTIONS'] = {
-        'connect_timeout': 10,
-        'options': '-c statement_timeout=15s',
-    }
+if IS_PRODUCTION and DB_ENGINE.lower() != 'sqlite':
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600  # 10 minutes
+        database['OPTIONS'] = {**database.get('OPTIONS', {}), 'connect_timeout': 10}
+
+# Pooled PostgreSQL connections (core/dbpool.py): DB_POOL=1 swaps in a backend
+# whose connections come from one pool per process and alias, shared by the
+# worker's threads (gthread GUNICORN_THREADS, ASGI executor and query pool),
+# and go back to it at the end of each request instead of being kept per
+# thread (CONN_MAX_AGE). DB_POOL_MAX_SIZE bounds connections per worker.
+DB_POOL = os.getenv('DB_POOL', '0') == '1' and DB_ENGINE.lower() != 'sqlite'
+if DB_POOL:
+    for database in DATABASES.values():
+        database['ENGINE'] = 'core.backends.postgresql_pool'
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'] = {**database.get('OPTIONS', {}), 'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'check_after': float(os.getenv('DB_POOL_CHECK_AFTER', '5')),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+        }}
+
+# Per-alias statement timeouts in milliseconds (0: none); report queries on
+# the replica may run longer than POS queries on the primary.
+DATABASE_STATEMENT_TIMEOUTS = {
+    'default': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '15000' if IS_PRODUCTION else '0')),
+    'replica': int(os.getenv('DB_REPLICA_STATEMENT_TIMEOUT_MS', '60000' if IS_PRODUCTION else '0')),
+}
 
 # File Upload Security
 FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', str(50 * 1024 * 1024)))  # 50MB default
@@ -279,6 +411,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON with a stdlib fallback (see core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -1,42 +1,37 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
-from django.db import connection
-from django.core.cache import cache
+from django.utils import timezone
 import os
+from core.health import livez, readiness, readyz
+from core.metrics import metrics_view
+from core.views import ProfileListView, ProfileDetailView, ProfileDownloadView
+
+
+def _describe(check):
+    if check is None:
+        return 'unknown'
+    return 'connected' if check['status'] == 'ok' else f"error: {check['error']}"
 
 
 def health_check(request):
-    """Comprehensive health check endpoint"""
+    """Service info plus the cached readiness result (see core/health.py);
+    never queries the database or writes the cache itself"""
+    result, _ = readiness.snapshot()
+    checks = result['checks'] if result else {}
     health_status = {
         'status': 'ok',
         'name': 'Pharm MIS API',
         'version': '1.0.0',
         'environment': os.getenv('ENVIRONMENT', 'development'),
-        'timestamp': connection.cursor().execute('SELECT NOW()').fetchone()[0],
+        'timestamp': timezone.now().isoformat(),
+        'database': _describe(checks.get('database')),
+        'cache': _describe(checks.get('cache')),
     }
 
-    # Database check
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            health_status['database'] = 'connected'
-    except Exception as e:
-        health_status['status'] = 'error'
-        health_status['database'] = f'error: {str(e)}'
-
-    # Cache check
-    try:
-        cache.set('health_check', 'ok', 10)
-        if cache.get('health_check') == 'ok':
-            health_status['cache'] = 'connected'
-        else:
-            health_status['cache'] = 'error: write/read failed'
-    except Exception as e:
-        health_status['cache'] = f'error: {str(e)}'
-
     # Overall status
-    if health_status['status'] == 'error':
+    if checks.get('database', {}).get('status') == 'error':
+        health_status['status'] = 'error'
         return JsonResponse(health_status, status=500)
     else:
         return JsonResponse(health_status)
@@ -50,7 +45,16 @@ urlpatterns = [
     path('api/sales/', include('sales.urls')),
     path('api/suppliers/', include('suppliers.urls')),
     path('api/reports/', include('reports.urls')),
+    # Admin-only request profiles (see core/profiling.py)
+    path('api/profiles/', ProfileListView.as_view(), name='profile_list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile_detail'),
+    path('api/profiles/<str:profile_id>/download/', ProfileDownloadView.as_view(), name='profile_download'),
     # Health-check / root endpoint
     path('', health_check),
     path('health/', health_check),
+    # Load balancer probes: liveness touches nothing, readiness is cached
+    path('livez', livez),
+    path('readyz', readyz),
+    # Prometheus scrape endpoint (local/token-protected, see core/metrics.py)
+    path('metrics', metrics_view),
 ]
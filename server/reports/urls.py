@@ -1,5 +1,18 @@
+from django.conf import settings
 from django.urls import path
-from .views import summary, sales_trends, stock_analysis, inventory_turnover
+from . import views
+
+if settings.ASYNC_VIEWS:
+    # Async variants that run each report's queries concurrently (ASGI only)
+    summary = views.summary_async
+    sales_trends = views.sales_trends_async
+    stock_analysis = views.stock_analysis_async
+    inventory_turnover = views.inventory_turnover_async
+else:
+    summary = views.summary
+    sales_trends = views.sales_trends
+    stock_analysis = views.stock_analysis
+    inventory_turnover = views.inventory_turnover
 
 
 urlpatterns = [
@@ -8,6 +21,3 @@ urlpatterns = [
     path('stock-analysis/', stock_analysis, name='stock_analysis'),
     path('inventory-turnover/', inventory_turnover, name='inventory_turnover'),
 ]
-
-
-
@@ -1,181 +1,299 @@
 from datetime import timedelta
+from decimal import Decimal
 from django.utils import timezone
-from django.db.models import Sum, F, Count, Avg
+from django.db.models import Sum, F, Q, Count, Avg, DateField
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from medicines.models import Medicine
 from stock.models import Stock
 from sales.models import Sale
-from django.db.models.functions import TruncMonth
+from django.db.models.functions import Coalesce, Trunc, TruncMonth
+from core.asyncapi import async_api_view
+from core.cache import asingle_flight, single_flight
+from core.concurrency import gather_queries, run_queries
+from core.databases import replica_reads
+from core.timeseries import GRANULARITIES, auto_granularity, bucket_starts, columnar, fill_buckets
+from stock.statistics import InventoryStatistics, include_suffix, parse_include
 
+# Each report is a dict of independent queries plus a function shaping their
+# results: the sync views run the queries in order, the async variants
+# (served under ASGI) run them concurrently with gather_queries. All of them
+# read from the replica when one is configured.
 
+# Sales trends: ?days= range, ?points= target for ?granularity=auto
+TRENDS_MAX_DAYS = 3660
+TRENDS_POINTS = 120
+TRENDS_MAX_POINTS = 1000
+TRENDS_LAYOUTS = ('rows', 'columnar')
+TRENDS_COLUMNS = ('period', 'total_quantity', 'total_revenue', 'transaction_count')
+
+ANALYSIS_SECTIONS = ('stock_by_category', 'expiring_30_days', 'expiring_90_days', 'top_medicines_by_value')
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def summary(request):
+    return Response(single_flight('reports.summary', _compute_summary))
+
+
+@replica_reads
+@async_api_view(permission_classes=[IsAuthenticated])
+async def summary_async(request):
+    return await asingle_flight('reports.summary', _acompute_summary)
+
+
+def _compute_summary():
+    return _summary_result(run_queries(_summary_queries()))
+
+
+async def _acompute_summary():
+    return _summary_result(await gather_queries(_summary_queries()))
+
+
+def _summary_queries():
     today = timezone.now().date()
     soon = today + timedelta(days=30)
-    expiring_soon = Stock.objects.filter(expiry_date__lte=soon, expiry_date__gte=today).count()
-    expired = Stock.objects.filter(expiry_date__lt=today).count()
-
-    # Out of stock or below reorder
-    meds = Medicine.objects.all()
-    below_reorder = 0
-    total_stock_value = 0
-    for m in meds:
-        qty = m.stocks.aggregate(total=Sum('quantity'))['total'] or 0
-        value = m.stocks.aggregate(val=Sum(F('quantity') * F('purchase_price')))['val'] or 0
-        total_stock_value += float(value)
-        if qty <= 0 or qty < m.reorder_level:
-            below_reorder += 1
-
     # Sales performance (last 30 days)
     last_30 = today - timedelta(days=30)
-    monthly_sales = Sale.objects.filter(sale_date__gte=last_30).aggregate(total=Sum('quantity_sold'))['total'] or 0
+    return {
+        'expiring_soon': Stock.objects.filter(expiry_date__lte=soon, expiry_date__gte=today).count,
+        'expired': Stock.objects.filter(expiry_date__lt=today).count,
+        # Out of stock or below reorder
+        'below_reorder': Medicine.objects.annotate(
+            qty=Coalesce(Sum('stocks__quantity'), 0)
+        ).filter(Q(qty__lte=0) | Q(qty__lt=F('reorder_level'))).count,
+        'total_stock_value': lambda: Stock.objects.aggregate(
+            val=Sum(F('quantity') * F('purchase_price'))
+        )['val'] or 0,
+        'monthly_sales': lambda: Sale.objects.filter(
+            sale_date__gte=last_30
+        ).aggregate(total=Sum('quantity_sold'))['total'] or 0,
+        # Top 5 fast-moving
+        'top_fast': lambda: list(
+            Sale.objects.filter(sale_date__gte=last_30)
+            .values('medicine__name')
+            .annotate(total=Sum('quantity_sold'))
+            .order_by('-total')[:5]
+        ),
+    }
 
-    # Top 5 fast-moving
-    top_fast = (
-        Sale.objects.filter(sale_date__gte=last_30)
-        .values('medicine__name')
-        .annotate(total=Sum('quantity_sold'))
-        .order_by('-total')[:5]
-    )
 
-    return Response({
-        'expiring_soon': expiring_soon,
-        'expired': expired,
-        'below_reorder': below_reorder,
-        'total_stock_value': round(total_stock_value, 2),
-        'monthly_sales_qty': monthly_sales,
-        'top_fast_moving': list(top_fast),
-    })
+def _summary_result(results):
+    return {
+        'expiring_soon': results['expiring_soon'],
+        'expired': results['expired'],
+        'below_reorder': results['below_reorder'],
+        'total_stock_value': round(float(results['total_stock_value']), 2),
+        'monthly_sales_qty': results['monthly_sales'],
+        'top_fast_moving': results['top_fast'],
+    }
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def sales_trends(request):
-    """Get sales trends over time"""
-    days = int(request.query_params.get('days', 90))
+    """
+    Get sales trends over time. Without ``?granularity=`` this returns the
+    monthly and daily rows of the sales in the period; with it, one gap-filled
+    series at day, week or month resolution (``auto`` picks the finest one
+    with at most ``?points=`` buckets), as rows or ``?layout=columnar`` arrays.
+    """
+    params = _sales_trends_params(request)
+    return Response(_sales_trends_result(run_queries(_sales_trends_queries(params)), params))
+
+
+@replica_reads
+@async_api_view(permission_classes=[IsAuthenticated])
+async def sales_trends_async(request):
+    params = _sales_trends_params(request)
+    return _sales_trends_result(await gather_queries(_sales_trends_queries(params)), params)
+
+
+def _int_param(request, name, default, lowest, highest):
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        raise ValidationError({name: 'Expected a whole number'})
+    if not lowest <= value <= highest:
+        raise ValidationError({name: f'Expected between {lowest} and {highest}'})
+    return value
+
+
+def _sales_trends_params(request):
+    days = _int_param(request, 'days', 90, 0, TRENDS_MAX_DAYS)
     end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=days)
+    params = {'days': days, 'start': end_date - timedelta(days=days), 'end': end_date, 'granularity': None}
+
+    layout = request.query_params.get('layout', 'rows')
+    granularity = request.query_params.get('granularity', 'auto' if 'layout' in request.query_params else None)
+    if granularity is None:
+        return params
+    if granularity not in ('auto',) + GRANULARITIES:
+        raise ValidationError({'granularity': f"Expected one of: auto, {', '.join(GRANULARITIES)}"})
+    if layout not in TRENDS_LAYOUTS:
+        raise ValidationError({'layout': f"Expected one of: {', '.join(TRENDS_LAYOUTS)}"})
+    if granularity == 'auto':
+        points = _int_param(request, 'points', TRENDS_POINTS, 2, TRENDS_MAX_POINTS)
+        granularity = auto_granularity(params['start'], end_date, points)
+    return {**params, 'granularity': granularity, 'layout': layout}
+
+
+def _trend_aggregates():
+    return {
+        'total_quantity': Sum('quantity_sold'),
+        'total_revenue': Sum(F('quantity_sold') * F('sale_price')),
+        'transaction_count': Count('id'),
+    }
+
+
+def _sales_trends_queries(params):
+    in_period = Sale.objects.filter(sale_date__gte=params['start'], sale_date__lte=params['end'])
+
+    if params['granularity']:
+        # One series, grouped by the bucket start
+        granularity = params['granularity']
+        period = F('sale_date') if granularity == 'day' else Trunc('sale_date', granularity, output_field=DateField())
+        series = in_period.annotate(period=period).values('period').annotate(**_trend_aggregates()).order_by('period')
+        return {'series': lambda: list(series)}
 
     # Monthly sales aggregation
     monthly_sales = (
-        Sale.objects.filter(sale_date__gte=start_date, sale_date__lte=end_date)
+        in_period
         .annotate(month=TruncMonth('sale_date'))
         .values('month')
-        .annotate(
-            total_quantity=Sum('quantity_sold'),
-            total_revenue=Sum(F('quantity_sold') * F('sale_price')),
-            transaction_count=Count('id')
-        )
+        .annotate(**_trend_aggregates())
         .order_by('month')
     )
 
     # Daily sales for the last 30 days
     daily_sales = (
-        Sale.objects.filter(sale_date__gte=start_date, sale_date__lte=end_date)
+        in_period
         .values('sale_date')
-        .annotate(
-            total_quantity=Sum('quantity_sold'),
-            total_revenue=Sum(F('quantity_sold') * F('sale_price')),
-            transaction_count=Count('id')
-        )
+        .annotate(**_trend_aggregates())
         .order_by('sale_date')
     )
+    return {
+        'monthly': lambda: list(monthly_sales),
+        'daily': lambda: list(daily_sales),
+    }
 
-    return Response({
-        'monthly_trends': list(monthly_sales),
-        'daily_trends': list(daily_sales),
-        'period_days': days
-    })
+
+def _sales_trends_result(results, params):
+    if not params['granularity']:
+        return {
+            'monthly_trends': results['monthly'],
+            'daily_trends': results['daily'],
+            'period_days': params['days']
+        }
+    granularity = params['granularity']
+    trends = fill_buckets(
+        results['series'],
+        bucket_starts(params['start'], params['end'], granularity),
+        'period',
+        {'total_quantity': 0, 'total_revenue': Decimal('0'), 'transaction_count': 0},
+    )
+    if params['layout'] == 'columnar':
+        trends = columnar(trends, TRENDS_COLUMNS)
+    return {
+        'granularity': granularity,
+        'start': params['start'],
+        'end': params['end'],
+        'period_days': params['days'],
+        'trends': trends,
+    }
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stock_analysis(request):
-    """Get detailed stock analysis"""
-    today = timezone.now().date()
-    thirty_days = today + timedelta(days=30)
-    ninety_days = today + timedelta(days=90)
-
-    # Expiry analysis
-    expiring_30 = Stock.objects.filter(
-        expiry_date__lte=thirty_days,
-        expiry_date__gte=today,
-        quantity__gt=0
-    ).aggregate(
-        total_quantity=Sum('quantity'),
-        total_value=Sum(F('quantity') * F('purchase_price'))
-    )
+    """Get detailed stock analysis; ``?include=`` limits the sections"""
+    sections = parse_include(request, ANALYSIS_SECTIONS)
+    return Response(single_flight(
+        'reports.stock_analysis',
+        lambda: _stock_analysis_result(sections, _stock_analysis_statistics(sections).compute()),
+        key_suffix=include_suffix(sections, ANALYSIS_SECTIONS),
+    ))
+
+
+@replica_reads
+@async_api_view(permission_classes=[IsAuthenticated])
+async def stock_analysis_async(request):
+    sections = parse_include(request, ANALYSIS_SECTIONS)
 
-    expiring_90 = Stock.objects.filter(
-        expiry_date__lte=ninety_days,
-        expiry_date__gte=today,
-        quantity__gt=0
-    ).aggregate(
-        total_quantity=Sum('quantity'),
-        total_value=Sum(F('quantity') * F('purchase_price'))
+    async def compute():
+        return _stock_analysis_result(sections, await _stock_analysis_statistics(sections).acompute())
+
+    return await asingle_flight(
+        'reports.stock_analysis', compute, key_suffix=include_suffix(sections, ANALYSIS_SECTIONS),
     )
 
-    # Top medicines by stock value
-    top_by_value = Medicine.objects.annotate(
-        stock_value=Sum(F('stocks__quantity') * F('stocks__purchase_price')),
-        total_quantity=Sum('stocks__quantity')
-    ).filter(stock_value__gt=0).order_by('-stock_value')[:10]
-
-    return Response({
-        'stock_by_category': [],  # Removed category analysis
-        'expiring_30_days': {
-            'quantity': expiring_30['total_quantity'] or 0,
-            'value': float(expiring_30['total_value'] or 0)
-        },
-        'expiring_90_days': {
-            'quantity': expiring_90['total_quantity'] or 0,
-            'value': float(expiring_90['total_value'] or 0)
-        },
-        'top_medicines_by_value': [{
-            'name': med.name,
-            'stock_value': float(med.stock_value or 0),
-            'total_quantity': med.total_quantity or 0
-        } for med in top_by_value]
-    })
 
+def _stock_analysis_statistics(sections):
+    return InventoryStatistics([name for name in sections if name != 'stock_by_category'])
+
+
+def _stock_analysis_result(sections, statistics):
+    if 'stock_by_category' in sections:
+        return {'stock_by_category': [], **statistics}  # Removed category analysis
+    return statistics
 
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def inventory_turnover(request):
     """Calculate inventory turnover rates"""
     today = timezone.now().date()
+    return Response(_inventory_turnover_result(run_queries(_inventory_turnover_queries(today)), today))
+
+
+@replica_reads
+@async_api_view(permission_classes=[IsAuthenticated])
+async def inventory_turnover_async(request):
+    today = timezone.now().date()
+    return _inventory_turnover_result(await gather_queries(_inventory_turnover_queries(today)), today)
+
+
+def _inventory_turnover_queries(today):
     six_months_ago = today - timedelta(days=180)
 
-    # Get medicines with sales in the last 6 months
-    medicines_with_sales = Sale.objects.filter(
-        sale_date__gte=six_months_ago
-    ).values('medicine').distinct()
+    # Units sold per medicine with sales in the last 6 months
+    recent_sales = Sale.objects.filter(sale_date__gte=six_months_ago)
+    sold_by_medicine = (
+        recent_sales.values('medicine', 'medicine__name')
+        .annotate(total=Sum('quantity_sold'))
+        .order_by()
+    )
+
+    # Average non-expired stock level for the same medicines
+    avg_stock_by_medicine = Stock.objects.filter(
+        medicine__in=recent_sales.values('medicine'),
+        expiry_date__gte=today
+    ).values('medicine').annotate(avg=Avg('quantity')).order_by().values_list('medicine', 'avg')
+
+    return {
+        'sold_by_medicine': lambda: list(sold_by_medicine),
+        'avg_stock_by_medicine': lambda: dict(avg_stock_by_medicine),
+    }
+
 
+def _inventory_turnover_result(results, today):
+    avg_stock_by_medicine = results['avg_stock_by_medicine']
     turnover_data = []
-    for med_data in medicines_with_sales:
-        med_id = med_data['medicine']
-        medicine = Medicine.objects.get(id=med_id)
-
-        # Calculate average stock level
-        avg_stock = Stock.objects.filter(
-            medicine=medicine,
-            expiry_date__gte=today
-        ).aggregate(avg=Avg('quantity'))['avg'] or 0
-
-        # Calculate sales rate (units per day)
-        total_sold = Sale.objects.filter(
-            medicine=medicine,
-            sale_date__gte=six_months_ago
-        ).aggregate(total=Sum('quantity_sold'))['total'] or 0
+    for med_data in results['sold_by_medicine']:
+        avg_stock = avg_stock_by_medicine.get(med_data['medicine']) or 0
+        total_sold = med_data['total'] or 0
 
         sales_rate = total_sold / 180  # per day
         turnover_rate = (sales_rate / avg_stock) if avg_stock > 0 else 0
 
         turnover_data.append({
-            'medicine_name': medicine.name,
+            'medicine_name': med_data['medicine__name'],
             'avg_stock_level': round(avg_stock, 2),
             'total_sold_6months': total_sold,
             'daily_sales_rate': round(sales_rate, 2),
@@ -185,7 +303,7 @@ def inventory_turnover(request):
     # Sort by turnover rate (highest first)
     turnover_data.sort(key=lambda x: x['turnover_rate'], reverse=True)
 
-    return Response({
+    return {
         'inventory_turnover': turnover_data[:20],  # Top 20
         'calculated_date': today.isoformat()
-    })
+    }
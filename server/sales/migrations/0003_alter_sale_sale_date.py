@@ -0,0 +1,19 @@
+# Generated manually for Django migration
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_alter_sale_stock'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sale',
+            name='sale_date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
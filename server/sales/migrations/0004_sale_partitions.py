@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from sales import partitions
+
+
+def create_storage(apps, schema_editor):
+    # PostgreSQL: partitioned sales_sale and archive; elsewhere a plain archive table
+    if schema_editor.connection.vendor == 'postgresql':
+        partitions.create_partitioned_tables(schema_editor)
+    else:
+        schema_editor.create_model(apps.get_model('sales', 'ArchivedSale'))
+
+
+def drop_storage(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        partitions.drop_partitioned_tables(schema_editor)
+    else:
+        columns = ', '.join(partitions.COLUMNS)
+        schema_editor.execute(
+            f'INSERT INTO {partitions.TABLE} ({columns}) SELECT {columns} FROM {partitions.ARCHIVE_TABLE}'
+        )
+        schema_editor.delete_model(apps.get_model('sales', 'ArchivedSale'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medicines', '0003_remove_medicine_category_supplier'),
+        ('sales', '0003_alter_sale_sale_date'),
+        ('stock', '0002_stock_expiry_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity_sold', models.PositiveIntegerField()),
+                ('sale_date', models.DateField()),
+                ('sale_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='medicines.medicine')),
+                ('stock', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='stock.stock')),
+            ],
+            options={
+                'db_table': 'sales_sale_archive',
+                'managed': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['sale_date'], name='sales_sale_date_idx'),
+        ),
+        migrations.RunPython(create_storage, drop_storage),
+    ]
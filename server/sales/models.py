@@ -8,11 +8,35 @@ class Sale(models.Model):
     medicine = models.ForeignKey(Medicine, on_delete=models.PROTECT)
     stock = models.ForeignKey(Stock, on_delete=models.PROTECT, null=True, blank=True)
     quantity_sold = models.PositiveIntegerField()
-    sale_date = models.DateField(default=timezone.now)
+    sale_date = models.DateField(default=timezone.localdate)
     sale_price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def __str__(self) -> str:
         return f"{self.medicine.name} - {self.quantity_sold} units"
 
+    class Meta:
+        indexes = [
+            # Recent-window reports (trends, turnover, summary) filter by date
+            models.Index(fields=['sale_date'], name='sales_sale_date_idx'),
+        ]
 
 
+class ArchivedSale(models.Model):
+    """
+    Sales moved out of ``sales_sale`` by ``manage.py sales_partitions``, ids
+    preserved. The table is created by the partitioning migration (a
+    partitioned table on PostgreSQL, a plain one elsewhere), hence unmanaged.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    medicine = models.ForeignKey(Medicine, on_delete=models.PROTECT, related_name='+')
+    stock = models.ForeignKey(Stock, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    quantity_sold = models.PositiveIntegerField()
+    sale_date = models.DateField()
+    sale_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        managed = False
+        db_table = 'sales_sale_archive'
+
+    def __str__(self) -> str:
+        return f"{self.medicine.name} - {self.quantity_sold} units (archived {self.sale_date})"
@@ -0,0 +1,241 @@
+"""
+Time-partitioned sales storage.
+
+On PostgreSQL ``sales_sale`` is range-partitioned by ``sale_date``, one
+partition per month (``sales_sale_p2024_01``) plus ``sales_sale_default``
+for dates no partition covers yet. Queries filtering on ``sale_date`` only
+scan the partitions in range, and inserts land in the small current one.
+Archiving detaches whole partitions and attaches them to the partitioned
+``sales_sale_archive`` table: a metadata change, no rows are copied.
+
+Other databases keep one ``sales_sale`` table and archive by moving rows,
+a month per transaction, into a plain ``sales_sale_archive`` table.
+
+``manage.py sales_partitions`` runs both steps and is safe to repeat; run it
+from cron (at least monthly) or after ``migrate``.
+"""
+from datetime import date
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+TABLE = 'sales_sale'
+ARCHIVE_TABLE = 'sales_sale_archive'
+DEFAULT_PARTITION = 'sales_sale_default'
+COLUMNS = ('id', 'medicine_id', 'stock_id', 'quantity_sold', 'sale_date', 'sale_price')
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def is_partitioned(connection=default_connection, table=TABLE):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(connection=default_connection, table=TABLE):
+    """Monthly partitions of ``table`` as ``{month: name}``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits'
+            ' JOIN pg_class child ON child.oid = pg_inherits.inhrelid'
+            ' WHERE pg_inherits.inhparent = to_regclass(%s)', [table],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    months = {}
+    for name in names:
+        suffix = name.rsplit('_p', 1)[-1]
+        if name.startswith(f'{TABLE}_p') and len(suffix) == 7:
+            months[date(int(suffix[:4]), int(suffix[5:]), 1)] = name
+    return months
+
+
+def create_partitioned_tables(schema_editor):
+    """
+    Rebuild ``sales_sale`` as a partitioned table, keeping its rows, ids,
+    indexes and foreign keys, and create the partitioned archive table.
+    Called by the partitioning migration on PostgreSQL.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        indexes, foreign_keys, sequence = _table_definitions(cursor, TABLE)
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned')
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_unpartitioned) PARTITION BY RANGE (sale_date)')
+        cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+        cursor.execute(f'SELECT min(sale_date) FROM {TABLE}_unpartitioned')
+        first = cursor.fetchone()[0]
+
+    # Partitions from the oldest sale on, so the copy lands in them directly
+    ensure_partitions(0, connection, since=first)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_unpartitioned')
+        cursor.execute(f'DROP TABLE {TABLE}_unpartitioned')
+        # Partitioned tables need the partition key in the primary key
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, sale_date)')
+        _restore_definitions(cursor, indexes, foreign_keys, sequence)
+
+        cursor.execute(
+            f'CREATE TABLE {ARCHIVE_TABLE} (LIKE {TABLE}) PARTITION BY RANGE (sale_date)'
+        )
+        cursor.execute(f'ALTER TABLE {ARCHIVE_TABLE} ADD PRIMARY KEY (id, sale_date)')
+
+
+def drop_partitioned_tables(schema_editor):
+    """Reverse of ``create_partitioned_tables``: archived sales go back into one plain table"""
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys, sequence = _table_definitions(cursor, TABLE)
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned')
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned)')
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned')
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {ARCHIVE_TABLE}')
+        cursor.execute(f'DROP TABLE {TABLE}_partitioned, {ARCHIVE_TABLE} CASCADE')
+        cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id)')
+        _restore_definitions(cursor, indexes, foreign_keys, sequence)
+
+
+def _table_definitions(cursor, table):
+    """Secondary indexes, foreign keys and the id sequence's next value"""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s"
+        " AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+        [table, table],
+    )
+    indexes = [definition for (definition,) in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(f'SELECT coalesce(max(id), 0) + 1 FROM {table}')
+    return indexes, foreign_keys, cursor.fetchone()[0]
+
+
+def _restore_definitions(cursor, indexes, foreign_keys, next_id):
+    # The old table and its index names are gone, so the definitions
+    # (which name the table, not its oid) now apply to the new one.
+    for definition in indexes:
+        # Indexes of a partitioned table are defined ``ON ONLY``
+        cursor.execute(definition.replace(' ON ONLY ', ' ON '))
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+    # The id sequence belonged to the old table; ids continue where it stopped.
+    cursor.execute(f'CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id')
+    cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    cursor.execute(f"SELECT setval('{TABLE}_id_seq', %s, false)", [next_id])
+
+
+def ensure_partitions(months_ahead, connection=default_connection, since=None):
+    """
+    Create the monthly partitions missing from ``since`` (default: the
+    current month) through ``months_ahead`` months from now, plus any month
+    with rows in the default partition, moving those rows in.
+    Returns the names of the partitions created.
+    """
+    this_month = month_start(timezone.localdate())
+    existing = partitions(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', sale_date)::date FROM {DEFAULT_PARTITION}")
+        stray = {month for (month,) in cursor.fetchall()}
+
+    months = set(stray)
+    month = month_start(since) if since and since < this_month else this_month
+    while month <= add_months(this_month, months_ahead):
+        months.add(month)
+        month = add_months(month, 1)
+
+    # Stray rows dated in an archived month stay in the default partition
+    archived = partitions(connection, ARCHIVE_TABLE)
+    created = []
+    for month in sorted(months - set(existing) - set(archived)):
+        created.append(_create_partition(connection, month, month in stray))
+    return created
+
+
+def _create_partition(connection, month, has_rows):
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        if has_rows:
+            # A new partition may not overlap rows in the default partition
+            moved = 'sale_date >= %s AND sale_date < %s'
+            cursor.execute(f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {moved}', bounds)
+            cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE {moved}', bounds)
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+    return name
+
+
+def archive_cutoff(months):
+    """First day of the oldest month kept in the hot table"""
+    return add_months(month_start(timezone.localdate()), -months)
+
+
+def archive_before(cutoff, connection=default_connection):
+    """
+    Move sales dated before ``cutoff`` (a month start) to the archive.
+    Returns ``{month: rows}`` for partitioned storage, rows being ``None``
+    (a detached partition is not counted), and actual row counts otherwise.
+    """
+    if is_partitioned(connection):
+        return _archive_partitions(connection, cutoff)
+    return _archive_rows(connection, cutoff)
+
+
+def _archive_partitions(connection, cutoff):
+    # Rows the default partition holds for archived months get their own
+    # partition first, so the whole month moves with it.
+    ensure_partitions(0, connection)
+    archived = {}
+    for month, name in sorted(partitions(connection).items()):
+        if month >= cutoff:
+            continue
+        bounds = [month, add_months(month, 1)]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            # DETACH briefly locks sales_sale; CONCURRENTLY is not allowed
+            # next to a default partition.
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            cursor.execute(f'ALTER TABLE {ARCHIVE_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+        archived[month] = None
+    return archived
+
+
+def _archive_rows(connection, cutoff):
+    columns = ', '.join(connection.ops.quote_name(column) for column in COLUMNS)
+    archived = {}
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(sale_date) FROM {TABLE} WHERE sale_date < %s', [cutoff])
+        first = cursor.fetchone()[0]
+    if first is None:
+        return archived
+    if isinstance(first, str):
+        first = date.fromisoformat(first)
+
+    # One month per transaction keeps each write lock short
+    month = month_start(first)
+    while month < cutoff:
+        bounds = [month, add_months(month, 1)]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            moved = 'sale_date >= %s AND sale_date < %s'
+            cursor.execute(
+                f'INSERT INTO {ARCHIVE_TABLE} ({columns}) SELECT {columns} FROM {TABLE} WHERE {moved}', bounds,
+            )
+            cursor.execute(f'DELETE FROM {TABLE} WHERE {moved}', bounds)
+            if cursor.rowcount:
+                archived[month] = cursor.rowcount
+        month = add_months(month, 1)
+    return archived
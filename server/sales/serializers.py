@@ -1,4 +1,7 @@
+from django.db.models import F
 from rest_framework import serializers
+from core.values_serializers import ValuesSerializer, decimal_formatter, format_date
+from medicines.serializers import MedicineValuesSerializer
 from .models import Sale
 
 
@@ -14,4 +17,17 @@ class SaleSerializer(serializers.ModelSerializer):
         return obj.stock.batch_number if obj.stock else None
 
 
+class SaleValuesSerializer(ValuesSerializer):
+    """Read-only list/export counterpart of ``SaleSerializer``"""
+    fields = SaleSerializer.Meta.fields
+    formatters = {
+        'sale_date': format_date,
+        'sale_price': decimal_formatter(max_digits=10, decimal_places=2),
+    }
+    expandable = {'medicine': MedicineValuesSerializer}
 
+    def get_annotations(self):
+        return {
+            'medicine_name': F('medicine__name'),
+            'batch_number': F('stock__batch_number'),
+        }
@@ -1,22 +1,27 @@
 from rest_framework import viewsets, filters
 from core.permissions import CanProcessSales
 from .models import Sale
-from .serializers import SaleSerializer
-from django.db import transaction
+from .serializers import SaleSerializer, SaleValuesSerializer
+from django.db.models import F
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 from stock.models import Stock
+from core.databases import write_transaction
+from core.values_serializers import ValuesListMixin
 
 
-class SaleViewSet(viewsets.ModelViewSet):
+class SaleViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Sale.objects.select_related('medicine', 'stock').all()
     serializer_class = SaleSerializer
+    values_serializer_class = SaleValuesSerializer
     permission_classes = [CanProcessSales]
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['sale_date', 'quantity_sold']
 
     def perform_create(self, serializer):
-        with transaction.atomic():
+        # Takes SQLite's write lock up front: two tills selling at once
+        # queue on busy_timeout instead of failing with "database is locked"
+        with write_transaction():
             stock = serializer.validated_data.get('stock')
             quantity = serializer.validated_data.get('quantity_sold')
 
@@ -38,13 +43,15 @@ class SaleViewSet(viewsets.ModelViewSet):
             if stock.expiry_date < timezone.now().date():
                 raise ValidationError({'stock': 'Selected stock batch is expired.'})
 
-            if stock.quantity < quantity:
+            # Deduct quantity from the row's current value: the batch was
+            # read before the transaction began (or without a row lock), and
+            # another till may have sold from it since.
+            deducted = Stock.objects.filter(pk=stock.pk, quantity__gte=quantity).update(
+                quantity=F('quantity') - quantity
+            )
+            if not deducted:
                 raise ValidationError({'quantity_sold': 'Insufficient stock quantity.'})
 
-            # Deduct quantity
-            stock.quantity -= quantity
-            stock.save(update_fields=['quantity'])
-
             serializer.save(stock=stock)
 
 
@@ -74,7 +74,7 @@ elif command_exists gunicorn; then
 
     # Start Gunicorn
     echo "🚀 Starting Gunicorn server..."
-    nohup gunicorn pharma_backend.wsgi:application \
+    nohup gunicorn \
         --bind 0.0.0.0:8000 \
         --config gunicorn.conf.py \
         --log-file logs/gunicorn.log \
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medicines', '0003_remove_medicine_category_supplier'),
+        ('stock', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['expiry_date'], name='stock_expiry_date_idx'),
+        ),
+    ]
@@ -10,6 +10,12 @@ class Stock(models.Model):
     quantity = models.PositiveIntegerField()
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # Expiry range scans: alerts, inventory statistics, expiry calendar
+            models.Index(fields=['expiry_date'], name='stock_expiry_date_idx'),
+        ]
+
     @property
     def days_until_expiry(self) -> int:
         return (self.expiry_date - timezone.now().date()).days
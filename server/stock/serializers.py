@@ -1,4 +1,7 @@
+from django.db.models import F
 from rest_framework import serializers
+from core.values_serializers import ValuesSerializer, days_until, decimal_formatter, format_date, format_days
+from medicines.serializers import MedicineValuesSerializer
 from .models import Stock
 
 
@@ -14,4 +17,18 @@ class StockSerializer(serializers.ModelSerializer):
         ]
 
 
+class StockValuesSerializer(ValuesSerializer):
+    """Read-only list/export counterpart of ``StockSerializer``"""
+    fields = StockSerializer.Meta.fields
+    formatters = {
+        'expiry_date': format_date,
+        'purchase_price': decimal_formatter(max_digits=10, decimal_places=2),
+        'days_until_expiry': format_days,
+    }
+    expandable = {'medicine': MedicineValuesSerializer}
 
+    def get_annotations(self):
+        return {
+            'medicine_name': F('medicine__name'),
+            'days_until_expiry': days_until('expiry_date'),
+        }
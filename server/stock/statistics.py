@@ -0,0 +1,219 @@
+"""
+Inventory statistics for the stock summary and the stock analysis report.
+
+Every bucket (stock value, expiring and expired batches, the 30/90-day
+expiry windows, low-stock medicines) is a filtered aggregate, e.g.
+``Sum('stocks__quantity', filter=Q(...))``, in a single ``GROUP BY medicine``
+query, so ``stock_stock`` is read once however many buckets are asked for.
+The grouping is what lets a medicine's total be compared with its reorder
+level; when no medicine-level bucket is requested the buckets are
+aggregated straight over ``stock_stock`` instead, and the expiry windows on
+their own only read batches inside the widest window. The top-by-value
+ranking is the only section that needs a second query.
+
+Sections are named after the response keys, and callers compute only the
+ones they need (``?include=`` on the endpoints).
+
+The expiry calendar (``stock/expiry-calendar/``) buckets upcoming expiries
+per week or month in one grouped range scan over the ``expiry_date`` index.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.concurrency import gather_queries, run_queries
+from core.timeseries import bucket_starts
+from core.values_serializers import parse_list_param
+from medicines.models import Medicine
+
+from .models import Stock
+
+# Buckets over batches, medicine-level buckets and the ranking
+STOCK_SECTIONS = ('total_stock_value', 'expiring_count', 'expired_count', 'expiring_30_days', 'expiring_90_days')
+MEDICINE_SECTIONS = ('total_medicines', 'low_stock_count')
+SECTIONS = STOCK_SECTIONS + MEDICINE_SECTIONS + ('top_medicines_by_value',)
+EXPIRY_SECTIONS = ('expiring_count', 'expiring_30_days', 'expiring_90_days')
+WINDOWS = (30, 90)
+
+
+def parse_include(request, available):
+    """Sections named by ``?include=a,b`` (all of ``available`` when absent)"""
+    include = parse_list_param(request.query_params.get('include'))
+    if include is None:
+        return list(available)
+    unknown = sorted(set(include) - set(available))
+    if unknown:
+        raise ValidationError({'include': f"Unknown section(s): {', '.join(unknown)}"})
+    return [name for name in available if name in include]
+
+
+def include_suffix(sections, available):
+    """Single-flight key suffix for a partial ``?include=`` selection"""
+    return '' if list(sections) == list(available) else ':' + ','.join(sections)
+
+
+class InventoryStatistics:
+    def __init__(self, sections=SECTIONS, today=None):
+        self.order = list(sections)
+        self.sections = set(sections)
+        self.today = today or timezone.now().date()
+
+    def _stock_aggregates(self, prefix, within=None):
+        """
+        Aggregates of the requested batch-level buckets, over ``prefix``
+        fields. ``within`` (days) means the rows are already limited to
+        in-stock batches expiring within that many days, so the expiry
+        windows only filter on their end date.
+        """
+        today = self.today
+
+        def q(**lookups):
+            return Q(**{prefix + lookup: value for lookup, value in lookups.items()})
+
+        def expiring(days):
+            ends = q(expiry_date__lte=today + timedelta(days=days))
+            if within is None:
+                return current & ends & in_stock
+            return ends if days < within else None
+
+        value = F(prefix + 'quantity') * F(prefix + 'purchase_price')
+        current = q(expiry_date__gte=today)
+        in_stock = q(quantity__gt=0)
+
+        aggregates = {}
+        if 'total_stock_value' in self.sections:
+            aggregates['total_stock_value'] = Sum(value, filter=current)
+        if 'expiring_count' in self.sections:
+            aggregates['expiring_count'] = Count(prefix + 'id', filter=expiring(30))
+        if 'expired_count' in self.sections:
+            aggregates['expired_count'] = Count(prefix + 'id', filter=q(expiry_date__lt=today) & in_stock)
+        for days in WINDOWS:
+            if f'expiring_{days}_days' in self.sections:
+                aggregates[f'expiring_{days}_quantity'] = Sum(prefix + 'quantity', filter=expiring(days))
+                aggregates[f'expiring_{days}_value'] = Sum(value, filter=expiring(days))
+        return aggregates
+
+    def buckets(self):
+        """One query for all requested buckets except the ranking"""
+        requested = self.sections - {'top_medicines_by_value'}
+        if not requested:
+            return {}
+        if requested & set(MEDICINE_SECTIONS):
+            return self._medicine_buckets()
+        if requested <= set(EXPIRY_SECTIONS):
+            # Only in-stock batches expiring within the widest window count;
+            # each window then checks just its end date.
+            windows = [days for days in WINDOWS if f'expiring_{days}_days' in requested]
+            within = max(windows + [30] if 'expiring_count' in requested else windows)
+            return Stock.objects.filter(
+                expiry_date__gte=self.today,
+                expiry_date__lte=self.today + timedelta(days=within),
+                quantity__gt=0,
+            ).aggregate(**self._stock_aggregates('', within))
+        return Stock.objects.aggregate(**self._stock_aggregates(''))
+
+    def _medicine_buckets(self):
+        # Per-medicine subtotals, summed up by the outer query
+        inner = {f'medicine_{name}': aggregate for name, aggregate in self._stock_aggregates('stocks__').items()}
+        outer = {name[len('medicine_'):]: Sum(name) for name in inner}
+        if 'total_medicines' in self.sections:
+            outer['total_medicines'] = Count('id')
+        if 'low_stock_count' in self.sections:
+            inner['current_quantity'] = Sum('stocks__quantity', filter=Q(stocks__expiry_date__gte=self.today))
+            outer['low_stock_count'] = Count('id', filter=(
+                (Q(current_quantity__lt=F('reorder_level')) | Q(current_quantity__isnull=True))
+                & ~Q(reorder_level=0)
+            ))
+        return Medicine.objects.annotate(**inner).order_by().aggregate(**outer)
+
+    def top_by_value(self, limit=10):
+        return list(
+            Medicine.objects.annotate(
+                stock_value=Sum(F('stocks__quantity') * F('stocks__purchase_price')),
+                total_quantity=Sum('stocks__quantity')
+            ).filter(stock_value__gt=0).order_by('-stock_value').values('name', 'stock_value', 'total_quantity')[:limit]
+        )
+
+    def queries(self):
+        """Independent queries for ``run_queries``/``gather_queries``"""
+        queries = {}
+        if self.sections - {'top_medicines_by_value'}:
+            queries['buckets'] = self.buckets
+        if 'top_medicines_by_value' in self.sections:
+            queries['top_medicines_by_value'] = self.top_by_value
+        return queries
+
+    def compute(self):
+        return self.result(run_queries(self.queries()))
+
+    async def acompute(self):
+        return self.result(await gather_queries(self.queries()))
+
+    def result(self, results):
+        """Requested sections, in the order requested, from the query results"""
+        buckets = results.get('buckets', {})
+        data = {}
+        for name in self.order:
+            if name == 'total_stock_value':
+                data[name] = buckets[name] or Decimal('0')
+            elif name.startswith('expiring_') and name.endswith('_days'):
+                days = name.split('_')[1]
+                data[name] = {
+                    'quantity': buckets[f'expiring_{days}_quantity'] or 0,
+                    'value': buckets[f'expiring_{days}_value'] or Decimal('0'),
+                }
+            elif name == 'top_medicines_by_value':
+                data[name] = [{
+                    'name': row['name'],
+                    'stock_value': row['stock_value'] or Decimal('0'),
+                    'total_quantity': row['total_quantity'] or 0
+                } for row in results[name]]
+            else:
+                data[name] = buckets[name] or 0
+        return data
+
+
+CALENDAR_INTERVALS = ('week', 'month')
+CALENDAR_GROUPS = {
+    'medicine': ('medicine_id', 'medicine__name'),
+    'dosage_form': ('medicine__dosage_form',),
+}
+CALENDAR_MAX_HORIZON = 3 * 366
+
+
+def expiry_calendar(interval='month', horizon=365, group_by=None, today=None, filters=None):
+    """
+    In-stock quantity, value and batch count expiring per week or month from
+    today through ``horizon`` days, optionally per medicine or dosage form.
+
+    One grouped query over the ``expiry_date`` index. ``rows`` only holds
+    non-empty buckets; ``buckets`` lists every bucket start in the range.
+    """
+    today = today or timezone.now().date()
+    end = today + timedelta(days=horizon)
+    group_fields = CALENDAR_GROUPS[group_by] if group_by else ()
+
+    rows = (
+        Stock.objects.filter(expiry_date__gte=today, expiry_date__lte=end, quantity__gt=0, **(filters or {}))
+        .annotate(bucket=Trunc('expiry_date', interval, output_field=DateField()))
+        .values('bucket', *group_fields)
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_value=Sum(F('quantity') * F('purchase_price')),
+            batch_count=Count('id'),
+        )
+        .order_by('bucket', *group_fields)
+    )
+    renamed = {'medicine__name': 'medicine_name', 'medicine__dosage_form': 'dosage_form'}
+    return {
+        'interval': interval,
+        'start': today,
+        'end': end,
+        'group_by': group_by,
+        'buckets': list(bucket_starts(today, end, interval)),
+        'rows': [{renamed.get(key, key): value for key, value in row.items()} for row in rows],
+    }
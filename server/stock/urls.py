@@ -1,5 +1,7 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import StockViewSet
+from .views import StockViewSet, summary_async
 
 
 router = DefaultRouter()
@@ -7,5 +9,6 @@ router.register(r'', StockViewSet, basename='stock')
 
 urlpatterns = router.urls
 
-
-
+if settings.ASYNC_VIEWS:
+    # Listed first so it takes over the viewset's summary action
+    urlpatterns = [path('summary/', summary_async, name='stock-summary')] + urlpatterns
@@ -1,20 +1,34 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from core.permissions import CanManageStock
 from .models import Stock
-from .serializers import StockSerializer
+from .serializers import StockSerializer, StockValuesSerializer
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Sum, F
-from django.db import models
 from django.utils import timezone
 from medicines.models import Medicine
+from core.asyncapi import async_api_view
+from core.cache import asingle_flight, single_flight
+from core.databases import replica_reads
+from core.values_serializers import ValuesListMixin
+from .statistics import (
+    CALENDAR_GROUPS, CALENDAR_INTERVALS, CALENDAR_MAX_HORIZON, InventoryStatistics, expiry_calendar,
+    include_suffix, parse_include,
+)
 
+SUMMARY_SECTIONS = ('total_medicines', 'total_stock_value', 'low_stock_count', 'expiring_count', 'expired_count')
 
-class StockViewSet(viewsets.ModelViewSet):
+
+class StockViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Stock.objects.select_related('medicine').all()
     serializer_class = StockSerializer
+    values_serializer_class = StockValuesSerializer
     permission_classes = [CanManageStock]
+    replica_actions = ValuesListMixin.replica_actions + (
+        'low_stock_alerts', 'expiring_soon', 'expired', 'summary', 'expiry_calendar',
+    )
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['expiry_date', 'quantity']
     filterset_fields = {
@@ -43,7 +57,7 @@ class StockViewSet(viewsets.ModelViewSet):
                 'medicine_name': medicine.name,
                 'current_stock': total_stock,
                 'reorder_level': medicine.reorder_level,
-                'unit_price': float(medicine.unit_price),
+                'unit_price': medicine.unit_price,
                 'urgency': 'critical' if total_stock == 0 else 'low'
             })
         
@@ -59,10 +73,9 @@ class StockViewSet(viewsets.ModelViewSet):
             expiry_date__lte=cutoff_date,
             expiry_date__gte=timezone.now().date(),
             quantity__gt=0
-        ).select_related('medicine')
+        )
         
-        serializer = self.get_serializer(expiring_stocks, many=True)
-        return Response(serializer.data)
+        return self.values_response(expiring_stocks, paginate=False)
 
     @action(detail=False, methods=['get'])
     def expired(self, request):
@@ -71,47 +84,60 @@ class StockViewSet(viewsets.ModelViewSet):
         expired_stocks = Stock.objects.filter(
             expiry_date__lt=today,
             quantity__gt=0
-        ).select_related('medicine')
+        )
         
-        serializer = self.get_serializer(expired_stocks, many=True)
-        return Response(serializer.data)
+        return self.values_response(expired_stocks, paginate=False)
+
+    @action(detail=False, methods=['get'], url_path='expiry-calendar')
+    def expiry_calendar(self, request):
+        """
+        In-stock quantity and value expiring per ``interval`` (week or month)
+        over the next ``horizon`` days, optionally ``group_by`` medicine or
+        dosage_form and filtered to one ``medicine`` or ``dosage_form``
+        """
+        params = request.query_params
+        interval = params.get('interval', 'month')
+        if interval not in CALENDAR_INTERVALS:
+            raise ValidationError({'interval': f"Expected one of: {', '.join(CALENDAR_INTERVALS)}"})
+        group_by = params.get('group_by') or None
+        if group_by is not None and group_by not in CALENDAR_GROUPS:
+            raise ValidationError({'group_by': f"Expected one of: {', '.join(CALENDAR_GROUPS)}"})
+        try:
+            horizon = int(params.get('horizon', 365))
+        except ValueError:
+            raise ValidationError({'horizon': 'Expected a number of days'})
+        if not 1 <= horizon <= CALENDAR_MAX_HORIZON:
+            raise ValidationError({'horizon': f'Expected between 1 and {CALENDAR_MAX_HORIZON} days'})
+
+        filters = {}
+        if 'medicine' in params:
+            try:
+                filters['medicine_id'] = int(params['medicine'])
+            except ValueError:
+                raise ValidationError({'medicine': 'Expected a medicine id'})
+        if 'dosage_form' in params:
+            if params['dosage_form'] not in Medicine.DosageForm.values:
+                raise ValidationError({'dosage_form': f"Expected one of: {', '.join(Medicine.DosageForm.values)}"})
+            filters['medicine__dosage_form'] = params['dosage_form']
+
+        return Response(expiry_calendar(interval, horizon, group_by, filters=filters))
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get stock summary statistics"""
-        today = timezone.now().date()
-        
-        total_medicines = Medicine.objects.count()
-        total_stock_value = Stock.objects.filter(
-            expiry_date__gte=today
-        ).aggregate(
-            total_value=models.Sum(F('quantity') * F('purchase_price'))
-        )['total_value'] or 0
-        
-        low_stock_count = Medicine.objects.annotate(
-            total_stock=Sum('stocks__quantity', filter=Q(stocks__expiry_date__gte=today))
-        ).filter(
-            Q(total_stock__lt=F('reorder_level')) | Q(total_stock__isnull=True)
-        ).exclude(reorder_level=0).count()
-        
-        expiring_count = Stock.objects.filter(
-            expiry_date__lte=today + timezone.timedelta(days=30),
-            expiry_date__gte=today,
-            quantity__gt=0
-        ).count()
-        
-        expired_count = Stock.objects.filter(
-            expiry_date__lt=today,
-            quantity__gt=0
-        ).count()
-        
-        return Response({
-            'total_medicines': total_medicines,
-            'total_stock_value': float(total_stock_value),
-            'low_stock_count': low_stock_count,
-            'expiring_count': expiring_count,
-            'expired_count': expired_count
-        })
-
+        """Get stock summary statistics; ``?include=`` limits the sections"""
+        sections = parse_include(request, SUMMARY_SECTIONS)
+        return Response(single_flight(
+            'stock.summary', lambda: InventoryStatistics(sections).compute(),
+            key_suffix=include_suffix(sections, SUMMARY_SECTIONS),
+        ))
 
 
+@replica_reads
+@async_api_view(permission_classes=[CanManageStock])
+async def summary_async(request):
+    """``StockViewSet.summary`` for ASGI"""
+    sections = parse_include(request, SUMMARY_SECTIONS)
+    return await asingle_flight(
+        'stock.summary', InventoryStatistics(sections).acompute,
+        key_suffix=include_suffix(sections, SUMMARY_SECTIONS),
+    )
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.values_serializers import ValuesSerializer, decimal_formatter, model_fields
 from .models import Supplier
 
 
@@ -8,4 +9,9 @@ class SupplierSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-
+class SupplierValuesSerializer(ValuesSerializer):
+    """Read-only list counterpart of ``SupplierSerializer``"""
+    fields = model_fields(Supplier)
+    formatters = {
+        'reliability_rating': decimal_formatter(max_digits=3, decimal_places=2),
+    }
@@ -1,12 +1,14 @@
 from rest_framework import viewsets
 from core.permissions import IsStaffOrReadOnly
+from core.values_serializers import ValuesListMixin
 from .models import Supplier
-from .serializers import SupplierSerializer
+from .serializers import SupplierSerializer, SupplierValuesSerializer
 
 
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Supplier.objects.all().order_by('name')
     serializer_class = SupplierSerializer
+    values_serializer_class = SupplierValuesSerializer
     permission_classes = [IsStaffOrReadOnly]
 
 